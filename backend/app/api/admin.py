@@ -0,0 +1,63 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import JSONResponse, PlainTextResponse
+from typing import Optional
+import logging
+
+from app.config import get_settings
+from app.services.profiler_service import (
+    ProfilerBusy,
+    admin_authorized,
+    collapsed,
+    speedscope,
+    stack_sampler
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Admin endpoints do not exist unless admin_token is set."""
+    if not get_settings().admin_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not admin_authorized(x_admin_token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin token")
+
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    dependencies=[Depends(require_admin)],
+    include_in_schema=False
+)
+
+
+@router.post("/profile")
+async def profile(
+    seconds: float = Query(10.0, gt=0),
+    format: str = Query("collapsed", pattern="^(collapsed|speedscope)$"),
+    interval_ms: Optional[float] = Query(None, ge=1.0, le=1000.0)
+):
+    """
+    Sample every thread's stack (event loop included) for `seconds` and
+    return collapsed stacks (flamegraph.pl / speedscope) or speedscope JSON.
+    """
+    settings = get_settings()
+    if seconds > settings.profile_max_seconds:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"seconds must be at most {settings.profile_max_seconds}"
+        )
+    interval = (interval_ms or settings.profile_interval_ms) / 1000
+
+    try:
+        result = await stack_sampler.profile(seconds, interval)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+    headers = {"X-Profile-Samples": str(result["samples"])}
+    if format == "speedscope":
+        return JSONResponse(
+            speedscope(result["counts"], interval),
+            headers={**headers, "Content-Disposition": 'attachment; filename="profile.speedscope.json"'}
+        )
+    return PlainTextResponse(collapsed(result["counts"]), headers=headers)
@@ -1,25 +1,44 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
 from app.models.schemas import (
     LocationInput, 
     WeatherResponse, 
+    ForecastResponse,
     LocationDisambiguationResponse,
+    LocationSuggestion,
+    LocationSuggestResponse,
     Coordinates,
     UserPreference, 
     LocationLog, 
+    LocationPredictionResponse,
+    PredictedLocation,
     FashionFeedback,
+    EventBatch,
+    EventBatchResponse,
     CoordsWeatherRequest,
     FashionRequest
 )
+from app.config import get_settings
 from app.services import geocoding_service, weather_service
-from app.services.geocoding_service import GeocodingError
-from app.services.weather_service import WeatherAPIError
+from app.services.admission_service import AdmissionRejected
+from app.services.forecast_service import (
+    hourly_window,
+    summarize_window,
+    daily_outlook
+)
+from app.services.geocoding_service import GeocodingError, coordinate_label, reverse_geocode
+from app.services.weather_service import WeatherAPIError, forecast_store
 from app.services.logging_service import logging_service
 from app.services.fashion_service import fashion_service
-from datetime import datetime
-from typing import Dict, Any
+from app.services.suggest_service import suggest_index
+from app.services.profile_service import location_profiles
+from app.services.warmup_service import readiness
+from app.utils.timeofday import TIME_OF_DAY_BUCKETS, time_of_day
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional
 import logging
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 router = APIRouter(
@@ -34,7 +53,23 @@ async def health_check():
     return {
         "status": "healthy",
         "service": "Weather Agent API",
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "ready": readiness.ready
+    }
+
+@router.get("/health/live")
+async def liveness_check():
+    """Liveness: the process is up and serving (restart it if this fails)."""
+    return {"status": "alive"}
+
+@router.get("/health/ready")
+async def readiness_check(response: Response):
+    """Readiness: warm-up is done, route traffic here (503 until then)."""
+    if not readiness.ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {
+        "status": "ready" if readiness.ready else "warming_up",
+        **readiness.report()
     }
 
 @router.post("/weather/current", response_model=WeatherResponse)
@@ -62,18 +97,16 @@ async def get_current_weather(location_input: LocationInput):
             f"Fetching weather for ({coords.latitude}, {coords.longitude})"
         )
         
-        response = await weather_service.get_weather_with_suggestions(
+        body, weather = await weather_service.get_weather_response_body(
             coords.latitude,
             coords.longitude,
             coords
         )
         
-        logger.info(
-            f"Weather fetched: {response.current_weather.temperature}°C, "
-            f"{len(response.suggestions)} suggestion(s)"
-        )
+        logger.info(f"Weather fetched: {weather.temperature}°C")
         
-        return response
+        # Pre-serialized WeatherResponse; response_model still documents it
+        return Response(content=body, media_type="application/json")
     
     except WeatherAPIError as e:
         # External weather API failed
@@ -83,6 +116,10 @@ async def get_current_weather(location_input: LocationInput):
             detail=f"Weather service temporarily unavailable: {str(e)}"
         )
     
+    except AdmissionRejected:
+        # Over capacity: answered with 503 + Retry-After (see main.py)
+        raise
+    
     except Exception as e:
         # Unexpected error
         logger.error(f"Unexpected error: {str(e)}", exc_info=True)
@@ -91,11 +128,69 @@ async def get_current_weather(location_input: LocationInput):
             detail="An unexpected error occurred. Please try again."
         )
     
+@router.get("/weather/forecast", response_model=ForecastResponse)
+async def get_weather_forecast(
+    location: Optional[str] = Query(None, description="Address or city (ignored when coordinates are given)"),
+    latitude: Optional[float] = Query(None, ge=-90, le=90),
+    longitude: Optional[float] = Query(None, ge=-180, le=180),
+    start: Optional[datetime] = Query(None, description="Window start, ISO 8601 (defaults to now)"),
+    hours: int = Query(24, ge=1, le=384, description="Length of the hourly window"),
+    days: int = Query(7, ge=1, le=16, description="Days of daily outlook")
+):
+    """
+    Hourly window, window summary (min/max temperature, total rain, ...)
+    and daily outlook. One upstream call per weather cell serves every
+    window until the forecast goes stale.
+    """
+    if (latitude is None) != (longitude is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="latitude and longitude must be given together"
+        )
+    
+    try:
+        if latitude is not None:
+            coords = Coordinates(
+                latitude=latitude,
+                longitude=longitude,
+                location_name=location or coordinate_label(latitude, longitude),
+                confidence="high"
+            )
+        else:
+            coords = await geocoding_service.geocode(location)
+    except GeocodingError as e:
+        logger.error(f"Geocoding failed: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Could not find location: {str(e)}"
+        )
+    
+    try:
+        forecast = await forecast_store.get(coords.latitude, coords.longitude)
+    except WeatherAPIError as e:
+        logger.error(f"Forecast API failed: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Weather service temporarily unavailable: {str(e)}"
+        )
+    
+    window_start = (start or datetime.now()).timestamp()
+    window_end = window_start + timedelta(hours=hours).total_seconds()
+    
+    return ForecastResponse(
+        query=location or coords.location_name,
+        location=coords,
+        utc_offset_seconds=forecast.utc_offset_seconds,
+        hourly=hourly_window(forecast, window_start, window_end),
+        summary=summarize_window(forecast, window_start, window_end),
+        daily=daily_outlook(forecast, days),
+        timestamp=datetime.now()
+    )
+
+
 @router.post("/location/disambiguate", response_model=LocationDisambiguationResponse)
 async def disambiguate_location(location_input: LocationInput):
 
-    from app.models.schemas import LocationDisambiguationResponse
-    
     try:
         logger.info(f"Searching for locations matching: {location_input.location}")
         
@@ -126,12 +221,42 @@ async def disambiguate_location(location_input: LocationInput):
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Could not search for location: {str(e)}"
         )
+    except AdmissionRejected:
+        # Over capacity: answered with 503 + Retry-After (see main.py)
+        raise
+    
     except Exception as e:
         logger.error(f"Unexpected error: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An unexpected error occurred while searching locations."
         )
+@router.get("/location/suggest", response_model=LocationSuggestResponse)
+async def suggest_locations(
+    prefix: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(5, ge=1, le=20)
+):
+    """
+    Type-ahead suggestions from locations we have already resolved.
+    Served from memory - never calls the geocoder.
+    """
+    entries = suggest_index.suggest(prefix, limit)
+    
+    return LocationSuggestResponse(
+        prefix=prefix,
+        suggestions=[
+            LocationSuggestion(
+                short_name=entry.short_name,
+                location_name=entry.location_name,
+                latitude=entry.latitude,
+                longitude=entry.longitude,
+                popularity=entry.popularity
+            )
+            for entry in entries
+        ]
+    )
+
+
 @router.post("/preferences")
 async def save_preference(preference: UserPreference):
     """Save user preference for future personalization (Phase 3: RAG)."""
@@ -163,18 +288,10 @@ async def get_weather_by_coords(request: CoordsWeatherRequest):
     """
     try:
         # Reverse geocode coordinates to location name
-        import httpx
-        from app.services.geocoding_service import reverse_geocode
-        
-        async with httpx.AsyncClient() as session:
-            location_name = await reverse_geocode(
-                request.latitude, 
-                request.longitude, 
-                session
-            )
+        location_name = await reverse_geocode(request.latitude, request.longitude)
         
         if not location_name:
-            location_name = f"Location ({request.latitude:.2f}, {request.longitude:.2f})"
+            location_name = coordinate_label(request.latitude, request.longitude)
         
         # Create Coordinates object
         coords = Coordinates(
@@ -189,22 +306,12 @@ async def get_weather_by_coords(request: CoordsWeatherRequest):
             now = datetime.now()
             hour = now.hour
             
-            # Determine time of day
-            if 5 <= hour < 12:
-                time_of_day = "morning"
-            elif 12 <= hour < 17:
-                time_of_day = "afternoon"
-            elif 17 <= hour < 21:
-                time_of_day = "evening"
-            else:
-                time_of_day = "night"
-            
             location_log = LocationLog(
                 user_id=request.user_id,
                 latitude=request.latitude,
                 longitude=request.longitude,
                 location_name=location_name,
-                time_of_day=time_of_day,
+                time_of_day=time_of_day(hour),
                 day_of_week=now.strftime("%A").lower(),
                 is_weekend=now.weekday() >= 5,
                 hour=hour,
@@ -214,14 +321,18 @@ async def get_weather_by_coords(request: CoordsWeatherRequest):
             await logging_service.log_location(location_log)
         
         # Fetch weather (reuse existing service)
-        response = await weather_service.get_weather_with_suggestions(
+        body, _ = await weather_service.get_weather_response_body(
             coords.latitude,
             coords.longitude,
             coords
         )
         
-        return response
+        return Response(content=body, media_type="application/json")
         
+    except AdmissionRejected:
+        # Over capacity: answered with 503 + Retry-After (see main.py)
+        raise
+    
     except Exception as e:
         logger.error(f"Error in by-coords: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -235,9 +346,13 @@ async def get_fashion_recommendations(request: FashionRequest):
     """Get fashion recommendations based on current weather."""
     try:
         # Convert Pydantic model to dict
-        weather_data = request.dict()
+        weather_data = request.dict(exclude={"user_id", "personalized"})
         
-        recommendations = fashion_service.get_recommendations(weather_data)
+        recommendations = fashion_service.get_recommendations(
+            weather_data,
+            user_id=request.user_id,
+            personalized=request.personalized
+        )
         
         return {
             "status": "success",
@@ -262,6 +377,50 @@ async def save_fashion_feedback(feedback: FashionFeedback):
     }
 
 
+@router.post("/events/batch", response_model=EventBatchResponse)
+async def ingest_event_batch(request: Request):
+    """
+    Log a batch of buffered client events (EventBatch: preferences,
+    location logs and fashion feedback, tagged by `kind`).
+    
+    The body is read raw and validated in one pass, so it may also be
+    sent as text/plain, which is what navigator.sendBeacon uses on page
+    hide. One invalid event rejects the batch with the usual 422.
+    Oversized bodies are refused from Content-Length, or as soon as the
+    streamed body passes events_batch_max_bytes.
+    """
+    max_bytes = get_settings().events_batch_max_bytes
+    too_large = HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail="Event batch too large, send it in smaller parts"
+    )
+    
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > max_bytes:
+        raise too_large
+    
+    chunks = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > max_bytes:
+            raise too_large
+        chunks.append(chunk)
+    body = b"".join(chunks)
+    
+    try:
+        batch = EventBatch.model_validate_json(body)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors(include_url=False))
+    
+    result = await logging_service.log_batch(batch.events)
+    return EventBatchResponse(
+        status="success",
+        accepted=len(batch.events),
+        **result
+    )
+
+
 @router.get("/locations/recent/{user_id}")
 async def get_recent_locations(user_id: str, limit: int = 10):
     """Get user's recent location searches."""
@@ -271,4 +430,42 @@ async def get_recent_locations(user_id: str, limit: int = 10):
         "user_id": user_id,
         "locations": locations,
         "count": len(locations)
-    }
\ No newline at end of file
+    }
+
+
+@router.get("/locations/predicted/{user_id}", response_model=LocationPredictionResponse)
+async def get_predicted_location(
+    user_id: str,
+    time_of_day_bucket: Optional[str] = Query(
+        None,
+        alias="time_of_day",
+        description="morning | afternoon | evening | night (defaults to now)"
+    )
+):
+    """
+    Predict the user's next location from their decayed visit history,
+    so the frontend can prefetch weather before they ask.
+    """
+    if time_of_day_bucket is not None and time_of_day_bucket not in TIME_OF_DAY_BUCKETS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"time_of_day must be one of: {', '.join(TIME_OF_DAY_BUCKETS)}"
+        )
+    
+    bucket = time_of_day_bucket or time_of_day(datetime.now().hour)
+    cell, confidence, bucket_used = await location_profiles.predict_async(user_id, bucket)
+    
+    if cell is None:
+        return LocationPredictionResponse(user_id=user_id, prediction=None)
+    
+    return LocationPredictionResponse(
+        user_id=user_id,
+        prediction=PredictedLocation(
+            latitude=cell.latitude,
+            longitude=cell.longitude,
+            location_name=cell.location_name,
+            time_of_day=bucket_used,
+            confidence=min(1.0, confidence),
+            last_seen=cell.last_seen
+        )
+    )
@@ -19,6 +19,159 @@ class Settings(BaseSettings):
     open_meteo_base_url: str = "https://api.open-meteo.com/v1"
     nominatim_base_url: str = "https://nominatim.openstreetmap.org"
     
+    # Shared upstream connection pool
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_seconds: float = 30.0
+    
+    # Record/replay of upstream traffic: "off", "record" (store every
+    # exchange in the cassette) or "replay" (serve only from it, offline).
+    # Replay latency: "none", "recorded" or "synthetic" (fixed ms below).
+    http_cassette_mode: str = "off"
+    http_cassette_path: str = "data/cassettes/upstream.jsonl.gz"
+    http_cassette_latency: str = "none"
+    http_cassette_synthetic_latency_ms: float = 50.0
+    
+    # Admission control: concurrent upstream-bound requests per route and
+    # in-flight calls per upstream ("name=limit;..." overrides the default).
+    # Requests answered from cache never take a slot. Waiting longer than
+    # the queue-time budget is answered with 503 + Retry-After.
+    admission_enabled: bool = True
+    admission_route_limit: int = 64
+    admission_route_limits: str = ""
+    admission_upstream_limit: int = 32
+    admission_upstream_limits: str = "nominatim=8"
+    admission_max_waiting: int = 128
+    admission_queue_timeout_seconds: float = 2.0
+    admission_retry_after_seconds: int = 1
+    
+    # Rate limits per user id and per client IP, in requests per minute
+    # for each listed route ("path=limit;..."). The IP bucket is
+    # ip_multiplier times larger since several users can share an IP.
+    # "sqlite" shares the counters between workers on the host; if it
+    # stays locked past its timeout, requests are let through.
+    rate_limit_enabled: bool = True
+    rate_limit_routes: str = (
+        "/api/weather/by-coords=30;/api/location/disambiguate=30;"
+        "/api/weather/current=60;/api/weather/forecast=60"
+    )
+    rate_limit_ip_multiplier: float = 4.0
+    rate_limit_trust_forwarded: bool = False
+    rate_limit_backend: str = "memory"
+    rate_limit_sqlite_path: str = "data/cache/ratelimit.sqlite3"
+    rate_limit_sqlite_timeout_seconds: float = 0.1
+    rate_limit_sweep_seconds: float = 60.0
+
+    # Admin endpoints (/admin/*) and the X-Profile request header need
+    # this token in X-Admin-Token; empty disables them entirely
+    admin_token: str = ""
+    profile_max_seconds: float = 60.0
+    profile_interval_ms: float = 5.0
+
+    # Request tracing: "none", "memory" (tests) or "otlp" (OTLP/HTTP JSON
+    # to a local collector). sample_ratio is the share of new traces kept;
+    # incoming traceparent headers keep their caller's decision.
+    tracing_exporter: str = "none"
+    tracing_sample_ratio: float = 0.05
+    tracing_otlp_endpoint: str = "http://localhost:4318"
+    tracing_service_name: str = "weather-agent-api"
+    tracing_export_interval_seconds: float = 5.0
+    tracing_max_queue: int = 4096
+
+    # Candidates requested from Nominatim for disambiguation (max 40)
+    geocoding_search_limit: int = 20
+    
+    # Interaction logs (JSONL, one file per user and kind)
+    log_dir: str = "data/logs"
+    events_batch_max_bytes: int = 262144
+    
+    # Per-user location profiles (predicted next location)
+    location_cell_deg: float = 0.01
+    location_profile_half_life_days: float = 14.0
+    location_profile_max_users: int = 10000
+    
+    # Cache backend: "memory" (per process) or "sqlite" (shared by all
+    # workers on the host through cache_sqlite_path)
+    cache_backend: str = "memory"
+    cache_sqlite_path: str = "data/cache/cache.sqlite3"
+    # Busy timeout; a database locked longer than this is read as a miss
+    cache_sqlite_timeout_seconds: float = 0.25
+    
+    # Optional shared L2 tier for multi-node deployments, e.g.
+    # "redis://cache-host:6379/0" (empty = disabled)
+    cache_l2_url: str = ""
+    cache_l2_prefix: str = "weather-agent:"
+    cache_l2_timeout_seconds: float = 0.5
+    cache_l2_max_connections: int = 8
+    cache_l2_lock_ttl_seconds: float = 10.0
+    
+    # In-memory caches are snapshotted here at shutdown and restored
+    # during warm-up
+    cache_snapshot_dir: str = "data/cache"
+    
+    # Geocoding cache (raw Nominatim results per query)
+    geocode_cache_ttl_seconds: float = 86400.0
+    geocode_cache_max_entries: int = 10000
+    
+    # Names for coordinate literals ("40.71, -74.00", geo: URIs, plus codes)
+    # that geocode() resolves without Nominatim: "cache" uses a reverse
+    # geocode already in the cache, "reverse" also looks it up on a miss,
+    # "none" always uses "Location (lat, lon)"
+    geocode_coordinate_naming: str = "cache"
+    
+    # Weather cache (current conditions per grid cell)
+    weather_cell_deg: float = 0.01
+    weather_cache_ttl_seconds: float = 600.0
+    weather_cache_max_entries: int = 10000
+    
+    # Hourly/daily forecast store
+    forecast_days: int = 7
+    forecast_ttl_seconds: float = 3600.0
+    forecast_max_cells: int = 5000
+
+    # "live" asks Open-Meteo for current conditions; "derived" interpolates
+    # them from the cached hourly forecast and only falls back to live
+    weather_current_mode: str = "live"
+    weather_derived_forecast_max_age_seconds: float = 21600.0
+    
+    # Regional tile grid: "name:south,west,north,east;..." boxes whose
+    # current conditions come from batched calls at tile_deg spacing
+    region_grid_enabled: bool = False
+    weather_regions: str = ""
+    region_tile_deg: float = 0.05
+    region_batch_size: int = 100
+    region_refresh_seconds: float = 600.0
+    region_max_age_seconds: float = 900.0
+    
+    # Predictive weather prefetch. Prefetched cells keep the normal weather
+    # TTL and are re-warmed each interval while their hour is in demand.
+    # The call budget is per worker process: N workers make up to
+    # N x max_calls_per_hour.
+    prefetch_enabled: bool = True
+    prefetch_interval_seconds: float = 60.0
+    prefetch_lead_minutes: float = 5.0
+    prefetch_top_cells: int = 20
+    prefetch_max_calls_per_hour: int = 50
+    prefetch_concurrency: int = 4
+    
+    # Startup warm-up before /api/health/ready reports ready: snapshots,
+    # indexes, and weather for the default location plus the busiest cells
+    warmup_enabled: bool = True
+    warmup_prefetch_cells: int = 20
+    warmup_timeout_seconds: float = 30.0
+    
+    # Location autocomplete index
+    suggest_index_path: str = "data/index/suggest_index.json"
+    
+    # Running fashion feedback counters (personalized tips). A tip the
+    # user voted on at least min_votes times is hidden below this
+    # smoothed helpful rate. Per-user counters are kept for the most
+    # recently active max_users.
+    fashion_feedback_path: str = "data/index/fashion_feedback.json"
+    fashion_personalize_min_votes: int = 3
+    fashion_personalize_hide_below: float = 0.25
+    fashion_feedback_max_users: int = 10000
+    
     # CORS
     allowed_origins: str = "http://localhost:5173,http://localhost:3000"
     
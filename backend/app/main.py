@@ -1,32 +1,123 @@
-from fastapi import FastAPI
+import logging
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from app.api import routes
+from fastapi.responses import JSONResponse
+from app.api import admin, routes
 from app.config import get_settings
+from app.services.admission_service import AdmissionMiddleware, AdmissionRejected
+from app.services.cache_service import close_l2, geocode_cache, weather_cache
+from app.services.fashion_service import fashion_service
+from app.services.feedback_service import feedback_aggregator
+from app.services.http_client import close_client
+from app.services.ratelimit_service import RateLimitMiddleware, rate_limiter
+from app.services.logging_service import DATA_DIR
+from app.services.profiler_service import ProfileMiddleware
+from app.services.tracing_service import TraceContextFilter, TracingMiddleware, tracer
+from app.services.suggest_service import suggest_index
+from app.services.prefetch_service import demand_forecast, prefetch_scheduler
+from app.services.warmup_service import readiness, save_cache_snapshots, warmup
+from app.services.weather_service import region_grid
 
 # Get settings
 settings = get_settings()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm up in the background at startup; persist state at shutdown."""
+    # Configured here rather than at import, so importing the app (tests,
+    # tooling, the startup benchmark) has no global side effects
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s:%(name)s:%(message)s%(trace)s")
+    for handler in logging.getLogger().handlers:
+        handler.addFilter(TraceContextFilter())
+    tracer.start()
+    
+    print(f"\n{'='*60}")
+    print(f"🚀 {settings.app_name} starting...")
+    print(f"📍 Environment: {settings.environment}")
+    print(f"🐛 Debug Mode: {settings.debug}")
+    print(f"🌍 Default Location: {settings.default_location_name}")
+    print(f"📚 API Docs: http://localhost:8000/docs")
+    print(f"{'='*60}\n")
+    
+    if settings.warmup_enabled:
+        # Live right away, ready once warm (see /api/health/ready)
+        warmup.start()
+    else:
+        suggest_index.load(settings.suggest_index_path, DATA_DIR)
+        feedback_aggregator.load(settings.fashion_feedback_path, DATA_DIR, fashion_service.weather_bucket)
+        if settings.prefetch_enabled:
+            demand_forecast.load_history(DATA_DIR)
+        readiness.ready = True
+    
+    if settings.prefetch_enabled:
+        # After warm-up, so the first cycle sees the loaded demand history
+        prefetch_scheduler.start(after=warmup.wait)
+    
+    if settings.region_grid_enabled:
+        region_grid.load_regions(settings.weather_regions)
+        region_grid.start()
+    
+    yield
+    
+    # Stop background tasks and persist in-memory indexes
+    await warmup.stop()
+    await prefetch_scheduler.stop()
+    await region_grid.stop()
+    suggest_index.close()
+    feedback_aggregator.close()
+    save_cache_snapshots()
+    weather_cache.close()
+    geocode_cache.close()
+    rate_limiter.close()
+    await tracer.shutdown()
+    await close_l2()
+    await close_client()
+
+
 # Create FastAPI app
 app = FastAPI(
     title=settings.app_name,
     description="AI-powered weather monitoring and suggestion system",
     version="1.0.0",
     docs_url="/docs",  
-    redoc_url="/redoc"  
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 allowed_origins = settings.allowed_origins.split(",")
 
+# Middleware added last runs first: CORS, then the request span, rate
+# limits, per-request admission state for route / upstream concurrency
+# limits, and the opt-in per-request profiler (X-Profile, admin only)
+app.add_middleware(ProfileMiddleware)
+app.add_middleware(AdmissionMiddleware)
+app.add_middleware(RateLimitMiddleware)
+app.add_middleware(TracingMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=allowed_origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["RateLimit-Limit", "RateLimit-Remaining", "RateLimit-Reset", "Retry-After", "traceresponse"]
 )
 
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    """Shed load early instead of letting requests queue into timeouts."""
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": f"Service is busy, please retry: {exc}"},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
 # Register routes
 app.include_router(routes.router)
+app.include_router(admin.router)
 
 
 # Root endpoint
@@ -38,22 +129,10 @@ async def root():
         "version": "1.0.0",
         "docs": "/docs",
         "health": "/api/health",
+        "liveness": "/api/health/live",
+        "readiness": "/api/health/ready",
         "endpoints": {
-            "weather": "/api/weather/current"
+            "weather": "/api/weather/current",
+            "suggest": "/api/location/suggest"
         }
     }
-
-
-# Startup event
-@app.on_event("startup")
-async def startup_event():
-    """Log when server starts."""
-    print(f"\n{'='*60}")
-    print(f"🚀 {settings.app_name} starting...")
-    print(f"📍 Environment: {settings.environment}")
-    print(f"🐛 Debug Mode: {settings.debug}")
-    print(f"🌍 Default Location: {settings.default_location_name}")
-    print(f"📚 API Docs: http://localhost:8000/docs")
-    print(f"{'='*60}\n")
-
-
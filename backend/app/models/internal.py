@@ -0,0 +1,70 @@
+"""
+Internal records used on the service hot paths.
+
+These are plain __slots__ dataclasses built from upstream data we have
+already parsed ourselves, so no validation runs per field. They mirror
+the API models in app.models.schemas field for field: to_model() turns
+one into its API model at the boundary (also without validation), and
+pydantic_core.to_json serializes either form to the same JSON.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+from app.models.schemas import CurrentWeather, LocationOption
+
+
+@dataclass(slots=True)
+class WeatherRecord:
+    """Current conditions for one point (see schemas.CurrentWeather)."""
+    timestamp: datetime
+    temperature: float
+    precipitation: float
+    wind_speed: float
+    humidity: float
+    uv_index: float
+    derived: bool = False
+
+    def to_model(self) -> CurrentWeather:
+        return CurrentWeather.model_construct(
+            timestamp=self.timestamp,
+            temperature=self.temperature,
+            precipitation=self.precipitation,
+            wind_speed=self.wind_speed,
+            humidity=self.humidity,
+            uv_index=self.uv_index,
+            derived=self.derived
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "WeatherRecord":
+        """Inverse of pydantic_core.to_jsonable_python(record)."""
+        fields = dict(data)
+        if isinstance(fields["timestamp"], str):
+            fields["timestamp"] = datetime.fromisoformat(fields["timestamp"])
+        return cls(**fields)
+
+
+@dataclass(slots=True)
+class LocationRecord:
+    """One geocoding candidate (see schemas.LocationOption)."""
+    latitude: float
+    longitude: float
+    location_name: str
+    short_name: str
+    confidence: str
+    location_type: str
+
+    def to_model(self) -> LocationOption:
+        return LocationOption.model_construct(
+            latitude=self.latitude,
+            longitude=self.longitude,
+            location_name=self.location_name,
+            short_name=self.short_name,
+            confidence=self.confidence,
+            location_type=self.location_type
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "LocationRecord":
+        return cls(**data)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Annotated, Literal, Optional, Union
 from datetime import datetime
 
 
@@ -50,6 +50,20 @@ class LocationDisambiguationResponse(BaseModel):
     matches: list[LocationOption] = Field(..., description="Potential location matches")
     is_ambiguous: bool = Field(..., description="True if multiple good matches found")
 
+class LocationSuggestion(BaseModel):
+    """A previously resolved location offered while the user types."""
+    short_name: str = Field(..., description="Short name (e.g., 'Brooklyn, NY')")
+    location_name: str = Field(..., description="Full display name")
+    latitude: float = Field(..., ge=-90, le=90)
+    longitude: float = Field(..., ge=-180, le=180)
+    popularity: float = Field(..., description="How often this location has been resolved")
+
+
+class LocationSuggestResponse(BaseModel):
+    """Type-ahead suggestions for a partial location query."""
+    prefix: str = Field(..., description="Text typed so far")
+    suggestions: list[LocationSuggestion] = Field(..., description="Most popular matches first")
+
 class CurrentWeather(BaseModel):
     """Current weather conditions."""
     timestamp: datetime
@@ -58,6 +72,7 @@ class CurrentWeather(BaseModel):
     wind_speed: float = Field(..., description="Wind speed in km/h")
     humidity: float = Field(..., description="Relative humidity in %")
     uv_index: float = Field(..., description="UV index (0-11+)")
+    derived: bool = Field(False, description="Interpolated from the hourly forecast")
 
 
 class WeatherSuggestion(BaseModel):
@@ -76,6 +91,51 @@ class WeatherResponse(BaseModel):
     suggestions: list[WeatherSuggestion]
     timestamp: datetime
 
+class HourlyForecast(BaseModel):
+    """One hour of forecast data."""
+    time: datetime = Field(..., description="Start of the hour (UTC)")
+    temperature: Optional[float] = Field(None, description="Temperature in Celsius")
+    precipitation: Optional[float] = Field(None, description="Precipitation in mm")
+    precipitation_probability: Optional[float] = Field(None, description="Chance of precipitation in %")
+    humidity: Optional[float] = Field(None, description="Relative humidity in %")
+    wind_speed: Optional[float] = Field(None, description="Wind speed in km/h")
+    uv_index: Optional[float] = Field(None, description="UV index (0-11+)")
+
+
+class DailyForecast(BaseModel):
+    """One day of forecast data (days are local to the location)."""
+    date: datetime = Field(..., description="Local midnight (UTC timestamp)")
+    temperature_max: Optional[float] = None
+    temperature_min: Optional[float] = None
+    precipitation_sum: Optional[float] = None
+    precipitation_probability_max: Optional[float] = None
+    wind_speed_max: Optional[float] = None
+    uv_index_max: Optional[float] = None
+
+
+class ForecastSummary(BaseModel):
+    """Aggregates over the requested hourly window."""
+    start: datetime
+    end: datetime
+    temperature_min: Optional[float] = None
+    temperature_max: Optional[float] = None
+    precipitation_sum: Optional[float] = None
+    precipitation_probability_max: Optional[float] = None
+    wind_speed_max: Optional[float] = None
+    uv_index_max: Optional[float] = None
+    will_rain: bool = Field(..., description="True if any precipitation is forecast in the window")
+
+
+class ForecastResponse(BaseModel):
+    """Hourly window, window summary and daily outlook for a location."""
+    query: str = Field(..., description="Original user query")
+    location: Coordinates
+    utc_offset_seconds: int = Field(..., description="Offset of the location's local time from UTC")
+    hourly: list[HourlyForecast]
+    summary: ForecastSummary
+    daily: list[DailyForecast]
+    timestamp: datetime
+
 #RAG USER Prererence and Logging Models
 
 class UserPreference(BaseModel):
@@ -110,6 +170,22 @@ class LocationLog(BaseModel):
     weather_snapshot: Optional[dict] = None
 
 
+class PredictedLocation(BaseModel):
+    """Where a user is most likely to check the weather next."""
+    latitude: float = Field(..., ge=-90, le=90)
+    longitude: float = Field(..., ge=-180, le=180)
+    location_name: str
+    time_of_day: str = Field(..., description="Bucket the prediction came from: morning, afternoon, evening, night or all")
+    confidence: float = Field(..., ge=0, le=1, description="Share of the bucket's visit score held by this location")
+    last_seen: datetime
+
+
+class LocationPredictionResponse(BaseModel):
+    """Predicted next location for prefetching weather."""
+    user_id: str
+    prediction: Optional[PredictedLocation] = Field(None, description="Null when the user has no location history")
+
+
 class FashionFeedback(BaseModel):
     """Fashion tip feedback for personalization (Phase 3: ML training)."""
     user_id: str
@@ -121,6 +197,41 @@ class FashionFeedback(BaseModel):
     notes: Optional[str] = None
 
 
+class PreferenceEvent(UserPreference):
+    """UserPreference inside an event batch."""
+    kind: Literal["preference"]
+
+
+class LocationEvent(LocationLog):
+    """LocationLog inside an event batch."""
+    kind: Literal["location"]
+
+
+class FashionFeedbackEvent(FashionFeedback):
+    """FashionFeedback inside an event batch."""
+    kind: Literal["fashion_feedback"]
+
+
+# Validated straight to the right model by its `kind` tag
+LoggedEvent = Annotated[
+    Union[PreferenceEvent, LocationEvent, FashionFeedbackEvent],
+    Field(discriminator="kind")
+]
+
+
+class EventBatch(BaseModel):
+    """Client-side buffered events, sent together (see POST /api/events/batch)."""
+    events: list[LoggedEvent] = Field(..., min_length=1, max_length=500)
+
+
+class EventBatchResponse(BaseModel):
+    """Events written per kind, and the number of file appends it took."""
+    status: str
+    accepted: int
+    counts: dict[str, int]
+    appends: int
+
+
 class CoordsWeatherRequest(BaseModel):
     """Weather request by coordinates (for 'Use My Location' feature)."""
     latitude: float = Field(..., ge=-90, le=90)
@@ -133,6 +244,8 @@ class FashionRequest(BaseModel):
     precipitation: float = Field(0, description="Precipitation in mm")
     wind_speed: float = Field(0, description="Wind speed in km/h")
     uv_index: float = Field(0, description="UV index (0-11+)")
+    user_id: Optional[str] = Field(None, description="Whose feedback personalizes the tips")
+    personalized: bool = Field(False, description="Reorder and filter tips by past feedback")
     
     class Config:
         json_schema_extra = {
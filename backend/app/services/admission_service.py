@@ -0,0 +1,245 @@
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Upstream names passed to AdmissionController.upstream()
+OPEN_METEO = "open_meteo"
+NOMINATIM = "nominatim"
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot get a slot within its queue-time budget."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def parse_limits(spec: str) -> dict[str, int]:
+    """
+    Parse "name=limit;name=limit" overrides.
+    Malformed entries are logged and skipped.
+    """
+    limits = {}
+    for entry in filter(None, (part.strip() for part in spec.split(";"))):
+        try:
+            name, limit = entry.split("=", 1)
+            limits[name.strip()] = int(limit)
+        except ValueError:
+            logger.error(f"❌ Invalid admission limit '{entry}'")
+    return limits
+
+
+class Gate:
+    """
+    Concurrency limit with a bounded FIFO queue.
+
+    Waiters give up once their timeout passes, and nobody queues at all
+    while `max_waiting` others are already waiting, so under overload
+    requests fail fast instead of piling up behind upstream timeouts.
+    """
+
+    def __init__(self, name: str, limit: int, max_waiting: int):
+        self.name = name
+        self.limit = limit
+        self.max_waiting = max_waiting
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def _reject(self, reason: str) -> AdmissionRejected:
+        self.rejected += 1
+        retry_after = get_settings().admission_retry_after_seconds
+        # Roughly one retry interval per queue's worth of backlog
+        retry_after = math.ceil(retry_after * (1 + self.waiting / max(1, self.limit)))
+        logger.warning(f"Admission rejected ({self.name}): {reason}")
+        return AdmissionRejected(f"{self.name} is at capacity ({reason})", retry_after)
+
+    async def acquire(self, timeout: float) -> None:
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return
+
+        if timeout <= 0:
+            raise self._reject("queue-time budget spent")
+        if len(self._waiters) >= self.max_waiting:
+            raise self._reject(f"{self.waiting} already waiting")
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        try:
+            # release() hands its slot over by resolving the future
+            await asyncio.wait_for(future, timeout)
+        except BaseException as e:
+            if future.done() and not future.cancelled():
+                # Handed a slot just as we gave up: pass it on
+                self.release()
+            elif future in self._waiters:
+                self._waiters.remove(future)
+            if isinstance(e, asyncio.TimeoutError):
+                raise self._reject(f"waited {timeout:.2f}s") from None
+            raise
+        self.admitted += 1
+
+    def release(self) -> None:
+        while self._waiters:
+            future = self._waiters.popleft()
+            if not future.done():
+                future.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected
+        }
+
+
+@dataclass
+class RouteAdmission:
+    """
+    Per-request admission state, set by AdmissionMiddleware. The budget
+    only counts time spent queued for slots, not time spent working.
+    """
+    scope: dict
+    budget: float
+    waited: float = 0.0
+    gate: Optional[Gate] = None
+
+    def remaining(self) -> float:
+        return self.budget - self.waited
+
+    async def acquire(self, gate: Gate) -> None:
+        started = time.monotonic()
+        try:
+            await gate.acquire(self.remaining())
+        finally:
+            self.waited += time.monotonic() - started
+
+
+_request: ContextVar[Optional[RouteAdmission]] = ContextVar("admission_request", default=None)
+
+
+class AdmissionController:
+    """
+    Per-route and per-upstream concurrency limits.
+
+    Nothing is acquired when a request starts. The route slot is taken
+    the first time the request needs an upstream, so requests answered
+    from cache or memory are never queued or rejected. All waits of one
+    request share its queue-time budget (time spent on upstream calls
+    does not count against it); background work (prefetch, region
+    refresh) only goes through the upstream limits.
+    """
+
+    def __init__(self):
+        self._routes: dict[str, Gate] = {}
+        self._upstreams: dict[str, Gate] = {}
+
+    def _gate(self, gates: dict[str, Gate], prefix: str, name: str, default: int, overrides: str) -> Gate:
+        gate = gates.get(name)
+        if gate is None:
+            settings = get_settings()
+            limit = parse_limits(overrides).get(name, default)
+            gate = gates[name] = Gate(f"{prefix} {name}", limit, settings.admission_max_waiting)
+        return gate
+
+    def route_gate(self, name: str) -> Gate:
+        settings = get_settings()
+        return self._gate(
+            self._routes, "route", name,
+            settings.admission_route_limit, settings.admission_route_limits
+        )
+
+    def upstream_gate(self, name: str) -> Gate:
+        settings = get_settings()
+        return self._gate(
+            self._upstreams, "upstream", name,
+            settings.admission_upstream_limit, settings.admission_upstream_limits
+        )
+
+    @asynccontextmanager
+    async def upstream(self, name: str) -> AsyncIterator[None]:
+        """Hold an upstream slot (and the request's route slot) for one call."""
+        settings = get_settings()
+        if not settings.admission_enabled:
+            yield
+            return
+
+        request = _request.get()
+        if request is not None:
+            if request.gate is None:
+                # Routing has filled in the endpoint by now
+                endpoint = request.scope.get("endpoint")
+                gate = self.route_gate(getattr(endpoint, "__name__", request.scope["path"]))
+                await request.acquire(gate)
+                request.gate = gate
+
+        gate = self.upstream_gate(name)
+        if request is not None:
+            await request.acquire(gate)
+        else:
+            await gate.acquire(settings.admission_queue_timeout_seconds)
+        try:
+            yield
+        finally:
+            gate.release()
+
+    def reset(self) -> None:
+        """Drop all gates; limits are re-read from settings on next use."""
+        self._routes.clear()
+        self._upstreams.clear()
+
+    def stats(self) -> dict:
+        return {
+            "routes": {name: gate.stats() for name, gate in self._routes.items()},
+            "upstreams": {name: gate.stats() for name, gate in self._upstreams.items()}
+        }
+
+
+class AdmissionMiddleware:
+    """ASGI middleware giving each HTTP request its admission state."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        settings = get_settings()
+        if scope["type"] != "http" or not settings.admission_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        request = RouteAdmission(
+            scope=scope,
+            budget=settings.admission_queue_timeout_seconds
+        )
+        token = _request.set(request)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request.reset(token)
+            if request.gate is not None:
+                request.gate.release()
+
+
+admission = AdmissionController()
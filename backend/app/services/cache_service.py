@@ -0,0 +1,686 @@
+import asyncio
+import json
+import logging
+import os
+import secrets
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional
+
+from dataclasses import is_dataclass
+
+from pydantic import BaseModel
+from pydantic_core import to_jsonable_python
+
+from app.config import get_settings
+from app.models import internal, schemas
+from app.services.redis_client import RedisClient, RedisError
+
+try:
+    import msgpack
+except ImportError:  # optional: values fall back to JSON
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+
+def encode_value(value: Any) -> bytes:
+    """
+    Serialize a cache value to JSON bytes. Pydantic models from
+    app.models.schemas and records from app.models.internal are tagged
+    with their class name so they come back as the same type; everything
+    else must already be JSON-friendly.
+    """
+    return json.dumps(_tag(value), separators=(",", ":")).encode()
+
+
+def decode_value(data: bytes) -> Any:
+    return _untag(json.loads(data))
+
+
+def _tag(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return {"__model__": type(value).__name__, "data": value.model_dump(mode="json")}
+    if is_dataclass(value):
+        return {"__record__": type(value).__name__, "data": to_jsonable_python(value)}
+    if isinstance(value, (list, tuple)):
+        return [_tag(item) for item in value]
+    return value
+
+
+def _untag(value: Any) -> Any:
+    if isinstance(value, list):
+        return [_untag(item) for item in value]
+    if isinstance(value, dict) and "__model__" in value:
+        model = getattr(schemas, value["__model__"])
+        return model.model_validate(value["data"])
+    if isinstance(value, dict) and "__record__" in value:
+        return getattr(internal, value["__record__"]).from_dict(value["data"])
+    return value
+
+
+class BaseCache:
+    """Behaviour shared by every cache backend."""
+
+    async def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    async def get_or_set(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None
+    ) -> Any:
+        """Cached value, or fetch() stored under key on a miss."""
+        value = await self.get(key)
+        if value is None:
+            value = await fetch()
+            await self.set(key, value, ttl)
+        return value
+
+    def save_snapshot(self, path: Path) -> int:
+        """Persist live entries for the next start. Returns entries written."""
+        return 0
+
+    def load_snapshot(self, path: Path) -> int:
+        """Restore entries saved by save_snapshot. Returns entries loaded."""
+        return 0
+
+    async def load_snapshot_async(self, path: Path) -> int:
+        """load_snapshot with the file read and decoded in a worker thread."""
+        return self.load_snapshot(path)
+
+    async def remaining_ttl_async(self, key: str) -> float:
+        """remaining_ttl for callers on the event loop."""
+        return self.remaining_ttl(key)
+
+    def close(self) -> None:
+        pass
+
+
+class TTLCache(BaseCache):
+    """
+    In-process cache with per-entry expiry and LRU eviction.
+
+    The interface is async so callers do not change when a cache is
+    backed by something slower than a dict.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 10000):
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _lookup(self, key: str) -> Optional[tuple[float, Any]]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        if item[0] <= time.monotonic():
+            del self._data[key]
+            return None
+        return item
+
+    async def get(self, key: str) -> Optional[Any]:
+        item = self._lookup(key)
+        if item is None:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return item[1]
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    async def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    def remaining_ttl(self, key: str) -> float:
+        """Seconds until the entry expires (0 if missing)."""
+        item = self._lookup(key)
+        return max(0.0, item[0] - time.monotonic()) if item else 0.0
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def save_snapshot(self, path: Path) -> int:
+        """
+        Atomically write live entries with their remaining TTL. The SQLite
+        and Redis backends persist on their own and keep the no-op default.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+
+        now = time.monotonic()
+        entries = [
+            [key, expires_at - now, _tag(value)]
+            for key, (expires_at, value) in self._data.items()
+            if expires_at > now
+        ]
+        snapshot = {"version": SNAPSHOT_VERSION, "saved_at": time.time(), "entries": entries}
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+        return len(entries)
+
+    def load_snapshot(self, path: Path) -> int:
+        """Load entries that have not expired since the snapshot was taken."""
+        return self._restore(_read_snapshot(path))
+
+    async def load_snapshot_async(self, path: Path) -> int:
+        return self._restore(await asyncio.to_thread(_read_snapshot, path))
+
+    def _restore(self, entries: list[tuple[str, float, Any]]) -> int:
+        """
+        Insert snapshot entries unless the cache already holds a copy that
+        lives longer (set since startup, so fresher). Restored entries
+        rank as less recently used than everything already present.
+        """
+        now = time.monotonic()
+        present = list(self._data)
+        loaded = 0
+        # Saved in LRU order, so replaying keeps the recency order too
+        for key, remaining, value in entries:
+            expires_at = now + remaining
+            current = self._data.get(key)
+            if current is not None and current[0] >= expires_at:
+                continue
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            loaded += 1
+        for key in present:
+            if key in self._data:
+                self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+        return loaded
+
+    def stats(self) -> dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "backend": "memory",
+            "entries": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+
+def _read_snapshot(path: Path) -> list[tuple[str, float, Any]]:
+    """
+    (key, seconds left, value) for every entry of a TTLCache snapshot
+    that has not expired since it was saved. Touches no cache state, so
+    it can run in a worker thread.
+    """
+    try:
+        with open(path, "r") as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return []
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        return []
+
+    elapsed = max(0.0, time.time() - snapshot["saved_at"])
+    entries = []
+    for key, remaining, value in snapshot["entries"]:
+        if remaining - elapsed <= 0:
+            continue
+        try:
+            entries.append((key, remaining - elapsed, _untag(value)))
+        except Exception as e:
+            logger.warning(f"Skipping cache snapshot entry {key}: {e}")
+    return entries
+
+
+class SQLiteCache(BaseCache):
+    """
+    Cache stored in a local SQLite file, shared by every worker process on
+    the host. Each row carries its absolute expiry time; expired rows are
+    ignored on read and purged periodically on write. Queries run in a
+    worker thread with a short busy timeout, and any SQLite error is
+    logged and treated as a miss.
+
+    Same interface as TTLCache. Values go through encode_value, so they
+    must be JSON-friendly or schema models.
+    """
+
+    # Purge expired rows / enforce max_entries every N writes
+    PURGE_EVERY = 256
+
+    def __init__(
+        self,
+        path: str,
+        namespace: str,
+        ttl_seconds: float,
+        max_entries: int = 10000,
+        timeout: float = 0.25
+    ):
+        self.path = Path(path)
+        self.namespace = namespace
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._conn: Optional[sqlite3.Connection] = None
+        # Queries run in worker threads; one at a time on the connection
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # Opened lazily: connections must not be inherited across a fork
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # A short busy timeout: a locked database is a miss, not a stall
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " namespace TEXT NOT NULL,"
+                " key TEXT NOT NULL,"
+                " value BLOB NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " PRIMARY KEY (namespace, key))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_expiry ON cache (namespace, expires_at)")
+            self._conn = conn
+        return self._conn
+
+    def _query(self, sql: str, params: tuple) -> list:
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def __len__(self) -> int:
+        try:
+            rows = self._query(
+                "SELECT COUNT(*) FROM cache WHERE namespace = ? AND expires_at > ?",
+                (self.namespace, time.time())
+            )
+        except sqlite3.Error as e:
+            logger.error(f"❌ Cache count failed: {e}")
+            return 0
+        return rows[0][0]
+
+    def _lookup(self, key: str) -> Optional[tuple[float, bytes]]:
+        rows = self._query(
+            "SELECT expires_at, value FROM cache WHERE namespace = ? AND key = ?",
+            (self.namespace, key)
+        )
+        if not rows or rows[0][0] <= time.time():
+            return None
+        return rows[0]
+
+    def _read(self, key: str) -> Optional[Any]:
+        item = self._lookup(key)
+        return None if item is None else decode_value(item[1])
+
+    async def get(self, key: str) -> Optional[Any]:
+        try:
+            value = await asyncio.to_thread(self._read, key)
+        except Exception as e:
+            logger.error(f"❌ Cache read failed for {key}: {e}")
+            value = None
+
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        try:
+            await asyncio.to_thread(
+                self._query,
+                "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (self.namespace, key, encode_value(value), expires_at)
+            )
+        except Exception as e:
+            logger.error(f"❌ Cache write failed for {key}: {e}")
+            return
+
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            await asyncio.to_thread(self.purge)
+
+    async def delete(self, key: str) -> None:
+        try:
+            await asyncio.to_thread(
+                self._query,
+                "DELETE FROM cache WHERE namespace = ? AND key = ?", (self.namespace, key)
+            )
+        except sqlite3.Error as e:
+            logger.error(f"❌ Cache delete failed for {key}: {e}")
+
+    def purge(self) -> None:
+        """Drop expired rows, then the soonest-expiring rows over max_entries."""
+        try:
+            self._query(
+                "DELETE FROM cache WHERE namespace = ? AND expires_at <= ?",
+                (self.namespace, time.time())
+            )
+            self._query(
+                "DELETE FROM cache WHERE namespace = ? AND key IN ("
+                " SELECT key FROM cache WHERE namespace = ?"
+                " ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+                (self.namespace, self.namespace, self.max_entries)
+            )
+        except sqlite3.Error as e:
+            logger.error(f"❌ Cache purge failed: {e}")
+
+    def remaining_ttl(self, key: str) -> float:
+        """Seconds until the entry expires (0 if missing)."""
+        try:
+            item = self._lookup(key)
+        except sqlite3.Error as e:
+            logger.error(f"❌ Cache read failed for {key}: {e}")
+            return 0.0
+        return max(0.0, item[0] - time.time()) if item else 0.0
+
+    async def remaining_ttl_async(self, key: str) -> float:
+        return await asyncio.to_thread(self.remaining_ttl, key)
+
+    def clear(self) -> None:
+        try:
+            self._query("DELETE FROM cache WHERE namespace = ?", (self.namespace,))
+        except sqlite3.Error as e:
+            logger.error(f"❌ Cache clear failed: {e}")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def stats(self) -> dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "backend": "sqlite",
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+
+# Leading byte of every L2 value: how the compressed payload is encoded
+_FORMAT_JSON = b"j"
+_FORMAT_MSGPACK = b"m"
+
+
+def pack_value(value: Any) -> bytes:
+    """zlib-compressed msgpack (JSON when msgpack is not installed)."""
+    if msgpack is not None:
+        return _FORMAT_MSGPACK + zlib.compress(msgpack.packb(_tag(value)))
+    return _FORMAT_JSON + zlib.compress(encode_value(value))
+
+
+def unpack_value(data: bytes) -> Any:
+    fmt, payload = data[:1], zlib.decompress(data[1:])
+    if fmt == _FORMAT_MSGPACK:
+        if msgpack is None:
+            raise ValueError("msgpack value but msgpack is not installed")
+        return _untag(msgpack.unpackb(payload))
+    return decode_value(payload)
+
+
+# Deletes the lock key only if it still holds our token
+_UNLOCK_SCRIPT = (
+    "if redis.call('get', KEYS[1]) == ARGV[1] then "
+    "return redis.call('del', KEYS[1]) else return 0 end"
+)
+
+
+class RedisCache:
+    """
+    Shared cache tier on a Redis server (or anything speaking RESP).
+
+    Values are packed with pack_value and expire server-side. Redis errors
+    are logged and treated as misses, so an L2 outage only costs upstream
+    calls.
+    """
+
+    def __init__(self, client: RedisClient, namespace: str, ttl_seconds: float, prefix: str = ""):
+        self.client = client
+        self.namespace = namespace
+        self.ttl = ttl_seconds
+        self.prefix = prefix
+        self.errors = 0
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}{self.namespace}:{key}"
+
+    def _failed(self, action: str, key: str, e: Exception) -> None:
+        self.errors += 1
+        logger.warning(f"L2 cache {action} failed for {key}: {e}")
+
+    async def get(self, key: str) -> Optional[tuple[Any, float]]:
+        """(value, remaining ttl in seconds) or None."""
+        try:
+            data = await self.client.get(self._key(key))
+            if data is None:
+                return None
+            remaining_ms = await self.client.pttl(self._key(key))
+            remaining = self.ttl if remaining_ms < 0 else remaining_ms / 1000
+            return unpack_value(data), remaining
+        except (RedisError, ValueError, zlib.error) as e:
+            self._failed("read", key, e)
+            return None
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        try:
+            await self.client.set(self._key(key), pack_value(value), ttl=self.ttl if ttl is None else ttl)
+        except RedisError as e:
+            self._failed("write", key, e)
+
+    async def delete(self, key: str) -> None:
+        try:
+            await self.client.delete(self._key(key))
+        except RedisError as e:
+            self._failed("delete", key, e)
+
+    async def lock(self, key: str, ttl: float) -> Optional[str]:
+        """
+        Take the fill lock for key with SET NX. Returns the lock token, ""
+        when the server is unreachable (proceed unlocked), or None if
+        another node holds it.
+        """
+        token = secrets.token_hex(8)
+        try:
+            acquired = await self.client.set(self._key(key) + ":lock", token, ttl=ttl, nx=True)
+        except RedisError as e:
+            self._failed("lock", key, e)
+            return ""
+        return token if acquired else None
+
+    async def unlock(self, key: str, token: str) -> None:
+        if not token:
+            return
+        try:
+            # Only release our own lock (it may have expired and been
+            # retaken); compare and delete in one step on the server
+            await self.client.eval(_UNLOCK_SCRIPT, [self._key(key) + ":lock"], [token])
+        except RedisError as e:
+            self._failed("unlock", key, e)
+
+
+class TieredCache(BaseCache):
+    """
+    In-process L1 in front of a shared Redis L2.
+
+    Reads go L1 then L2; L2 hits are copied into L1 for at most the time
+    the L2 entry has left. Writes go to both. get_or_set holds a cross-node
+    SET NX lock while filling, so one node fetches upstream and the others
+    wait for its result in L2.
+    """
+
+    # How often waiters re-check L2 while another node fills a key
+    POLL_SECONDS = 0.05
+
+    def __init__(self, l1: BaseCache, l2: RedisCache, lock_ttl: float = 10.0):
+        self.l1 = l1
+        self.l2 = l2
+        self.lock_ttl = lock_ttl
+        self.ttl = l1.ttl
+        self.l2_hits = 0
+
+    def __len__(self) -> int:
+        return len(self.l1)
+
+    async def _get_l2(self, key: str) -> Optional[Any]:
+        item = await self.l2.get(key)
+        if item is None:
+            return None
+        value, remaining = item
+        await self.l1.set(key, value, ttl=min(self.l1.ttl, remaining))
+        self.l2_hits += 1
+        return value
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = await self.l1.get(key)
+        if value is None:
+            value = await self._get_l2(key)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        await self.l1.set(key, value, ttl)
+        await self.l2.set(key, value, ttl)
+
+    async def delete(self, key: str) -> None:
+        await self.l1.delete(key)
+        await self.l2.delete(key)
+
+    async def get_or_set(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None
+    ) -> Any:
+        value = await self.get(key)
+        if value is not None:
+            return value
+
+        token = await self.l2.lock(key, self.lock_ttl)
+        if token is None:
+            # Another node is fetching: wait for its result, then give up
+            # and fetch ourselves if the lock expires first
+            deadline = time.monotonic() + self.lock_ttl
+            while time.monotonic() < deadline:
+                await asyncio.sleep(self.POLL_SECONDS)
+                value = await self._get_l2(key)
+                if value is not None:
+                    return value
+
+        try:
+            value = await fetch()
+            await self.set(key, value, ttl)
+            return value
+        finally:
+            if token:
+                await self.l2.unlock(key, token)
+
+    def remaining_ttl(self, key: str) -> float:
+        return self.l1.remaining_ttl(key)
+
+    async def remaining_ttl_async(self, key: str) -> float:
+        return await self.l1.remaining_ttl_async(key)
+
+    def clear(self) -> None:
+        self.l1.clear()
+
+    def save_snapshot(self, path: Path) -> int:
+        return self.l1.save_snapshot(path)
+
+    def load_snapshot(self, path: Path) -> int:
+        return self.l1.load_snapshot(path)
+
+    async def load_snapshot_async(self, path: Path) -> int:
+        return await self.l1.load_snapshot_async(path)
+
+    def close(self) -> None:
+        self.l1.close()
+
+    def stats(self) -> dict[str, Any]:
+        stats = self.l1.stats()
+        stats.update({"l2_hits": self.l2_hits, "l2_errors": self.l2.errors})
+        return stats
+
+
+_redis_client: Optional[RedisClient] = None
+
+
+def _l2_client() -> RedisClient:
+    global _redis_client
+    if _redis_client is None:
+        settings = get_settings()
+        _redis_client = RedisClient(
+            settings.cache_l2_url,
+            timeout=settings.cache_l2_timeout_seconds,
+            max_connections=settings.cache_l2_max_connections
+        )
+    return _redis_client
+
+
+def make_cache(namespace: str, ttl_seconds: float, max_entries: int) -> BaseCache:
+    """
+    Cache for `namespace` on the backend chosen by settings.cache_backend,
+    behind a Redis L2 tier when cache_l2_url is set.
+    """
+    settings = get_settings()
+    if settings.cache_backend == "sqlite":
+        cache = SQLiteCache(
+            settings.cache_sqlite_path, namespace, ttl_seconds, max_entries,
+            timeout=settings.cache_sqlite_timeout_seconds
+        )
+    else:
+        if settings.cache_backend != "memory":
+            logger.warning(f"Unknown cache_backend '{settings.cache_backend}', using memory")
+        cache = TTLCache(ttl_seconds=ttl_seconds, max_entries=max_entries)
+
+    if settings.cache_l2_url:
+        l2 = RedisCache(_l2_client(), namespace, ttl_seconds, prefix=settings.cache_l2_prefix)
+        cache = TieredCache(cache, l2, lock_ttl=settings.cache_l2_lock_ttl_seconds)
+    return cache
+
+
+async def close_l2() -> None:
+    if _redis_client is not None:
+        await _redis_client.close()
+
+
+_settings = get_settings()
+
+# Current conditions per weather cell
+weather_cache = make_cache(
+    "weather",
+    ttl_seconds=_settings.weather_cache_ttl_seconds,
+    max_entries=_settings.weather_cache_max_entries
+)
+
+# Raw Nominatim results per normalized query
+geocode_cache = make_cache(
+    "geocode",
+    ttl_seconds=_settings.geocode_cache_ttl_seconds,
+    max_entries=_settings.geocode_cache_max_entries
+)
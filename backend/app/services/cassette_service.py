@@ -0,0 +1,186 @@
+import asyncio
+import base64
+import gzip
+import hashlib
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode
+
+import httpx
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Response headers worth replaying; hop-by-hop and encoding headers are
+# dropped since bodies are stored decoded
+KEPT_HEADERS = ("content-type", "cache-control", "date")
+
+
+class CassetteMiss(httpx.TransportError):
+    """Replay mode: no recorded response for this request."""
+    pass
+
+
+def request_key(method: str, url: httpx.URL, body: bytes = b"") -> str:
+    """
+    Identity of a request: method, URL without fragment and with sorted
+    query parameters, plus a hash of any body.
+    """
+    query = urlencode(sorted(parse_qsl(url.query.decode(), keep_blank_values=True)))
+    key = f"{method.upper()} {url.scheme}://{url.host}{url.path}"
+    if query:
+        key += f"?{query}"
+    if body:
+        key += f" #{hashlib.sha1(body).hexdigest()[:16]}"
+    return key
+
+
+def _encode_body(body: bytes) -> dict:
+    try:
+        return {"text": body.decode("utf-8")}
+    except UnicodeDecodeError:
+        return {"base64": base64.b64encode(body).decode("ascii")}
+
+
+def _decode_body(entry: dict) -> bytes:
+    if "base64" in entry:
+        return base64.b64decode(entry["base64"])
+    return entry.get("text", "").encode("utf-8")
+
+
+class Cassette:
+    """
+    Recorded upstream exchanges in a gzip-compressed JSONL file, one
+    exchange per line. Recording appends a gzip member per exchange, so
+    a crash loses at most the last line; loading reads every member up
+    to any damaged one and the latest recording of a request wins.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._entries: Optional[dict[str, dict]] = None
+
+    @property
+    def entries(self) -> dict[str, dict]:
+        if self._entries is None:
+            self._entries = {}
+            if self.path.exists():
+                try:
+                    with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                        for line in f:
+                            if line.strip():
+                                entry = json.loads(line)
+                                self._entries[entry["key"]] = entry
+                except (EOFError, gzip.BadGzipFile, ValueError, KeyError) as e:
+                    # A crash mid-write leaves a truncated last member;
+                    # everything recorded before it is still usable
+                    logger.warning(
+                        f"Cassette {self.path} is damaged after {len(self._entries)} "
+                        f"exchange(s), ignoring the rest: {e!r}"
+                    )
+                logger.info(f"✅ Loaded {len(self._entries)} recorded exchange(s) from {self.path}")
+        return self._entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: str) -> Optional[dict]:
+        return self.entries.get(key)
+
+    def add(self, key: str, status: int, headers: dict, body: bytes, latency_ms: float) -> dict:
+        entry = {
+            "key": key,
+            "status": status,
+            "headers": headers,
+            "latency_ms": round(latency_ms, 1),
+            "recorded_at": int(time.time()),
+            **_encode_body(body)
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with gzip.open(self.path, "at", encoding="utf-8") as f:
+            f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self.entries[key] = entry
+        return entry
+
+
+class CassetteTransport(httpx.AsyncBaseTransport):
+    """
+    httpx transport in front of the real one, for deterministic upstream
+    traffic (Open-Meteo, Nominatim):
+
+    - "record": forward, then store the exchange in the cassette
+    - "replay": answer from the cassette, never touching the network; a
+      request that was not recorded fails with CassetteMiss (an httpx
+      TransportError, so callers map it like any upstream failure)
+
+    Replay latency: "none", "recorded" (sleep as long as the original
+    call took) or "synthetic" (a fixed http_cassette_synthetic_latency_ms).
+    """
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        cassette: Cassette,
+        mode: str,
+        latency: str = "none",
+        synthetic_latency_ms: float = 0.0
+    ):
+        self._transport = transport
+        self.cassette = cassette
+        self.mode = mode
+        self.latency = latency
+        self.synthetic_latency_ms = synthetic_latency_ms
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        key = request_key(request.method, request.url, body)
+        if self.mode == "replay":
+            return await self._replay(key, request)
+
+        started = time.perf_counter()
+        response = await self._transport.handle_async_request(request)
+        content = await response.aread()
+        latency_ms = (time.perf_counter() - started) * 1000
+        headers = {name: response.headers[name] for name in KEPT_HEADERS if name in response.headers}
+        self.cassette.add(key, response.status_code, headers, content, latency_ms)
+        await response.aclose()
+        return httpx.Response(response.status_code, headers=headers, content=content, request=request)
+
+    async def _replay(self, key: str, request: httpx.Request) -> httpx.Response:
+        entry = self.cassette.get(key)
+        if entry is None:
+            raise CassetteMiss(f"No recorded response for {key}", request=request)
+
+        if self.latency == "recorded":
+            await asyncio.sleep(entry["latency_ms"] / 1000)
+        elif self.latency == "synthetic":
+            await asyncio.sleep(self.synthetic_latency_ms / 1000)
+
+        return httpx.Response(
+            entry["status"],
+            headers=entry["headers"],
+            content=_decode_body(entry),
+            request=request
+        )
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def wrap_transport(transport: httpx.AsyncBaseTransport) -> httpx.AsyncBaseTransport:
+    """The shared client's transport, behind a cassette when http_cassette_mode is set."""
+    settings = get_settings()
+    if settings.http_cassette_mode not in ("record", "replay"):
+        return transport
+    logger.info(f"Upstream traffic in {settings.http_cassette_mode} mode ({settings.http_cassette_path})")
+    return CassetteTransport(
+        transport,
+        Cassette(settings.http_cassette_path),
+        settings.http_cassette_mode,
+        settings.http_cassette_latency,
+        settings.http_cassette_synthetic_latency_ms
+    )
@@ -1,19 +1,74 @@
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 import logging
 
+from app.services.feedback_service import feedback_aggregator
+from app.services.tracing_service import traced
+
 logger = logging.getLogger(__name__)
 
+# Tips with measured values are kept as templates and filled per request
+WIND_TIP = "💨 Windy ({wind_speed} km/h) - secure loose items"
+UV_TIP = "☀️ High UV ({uv_index}) - wear sunscreen SPF 30+"
+
+
+def recommendation_signature(temp, precip, wind_speed, uv_index) -> int:
+    """
+    Pack the threshold bucket of every input into one int. Inputs with
+    the same signature produce the same outfit; only the numbers in the
+    wind/UV tips differ.
+    """
+    if temp < 0:
+        temperature_band = 0
+    elif 0 <= temp < 10:
+        temperature_band = 1
+    elif 10 <= temp < 18:
+        temperature_band = 2
+    elif 18 <= temp < 25:
+        temperature_band = 3
+    elif 25 <= temp < 30:
+        temperature_band = 4
+    else:
+        temperature_band = 5
+    
+    precip_tier = 2 if precip > 5 else 1 if precip > 0 else 0
+    windy = wind_speed > 20
+    wind_chill = windy and temp < 15
+    high_uv = uv_index >= 6
+    
+    return (((temperature_band * 3 + precip_tier) * 2 + windy) * 2 + wind_chill) * 2 + high_uv
+
 
 class FashionService:
     """Generate outfit recommendations based on weather conditions."""
     
+    # Signature -> (recommendation template, indexes of tips to fill in)
+    _templates: Dict[int, Tuple[Dict[str, Any], Tuple[int, ...]]] = {}
+    
     @staticmethod
-    def get_recommendations(weather: Dict[str, Any]) -> Dict[str, Any]:
+    def weather_bucket(weather: Dict[str, Any]) -> int:
+        """Quantized weather for feedback counters: the recommendation signature."""
+        return recommendation_signature(
+            weather.get("temperature", 20),
+            weather.get("precipitation", 0),
+            weather.get("wind_speed", 0),
+            weather.get("uv_index", 0)
+        )
+    
+    @staticmethod
+    @traced("fashion.recommendations")
+    def get_recommendations(
+        weather: Dict[str, Any],
+        user_id: Optional[str] = None,
+        personalized: bool = False
+    ) -> Dict[str, Any]:
         """
         Generate fashion recommendations.
         
         Args:
             weather: Dict with temperature, precipitation, wind_speed, uv_index
+            user_id: Whose feedback personalizes the tips
+            personalized: Reorder and filter tips by feedback counters
+                (in memory, see feedback_service)
             
         Returns:
             Dict with outfit recommendations and tips
@@ -23,6 +78,33 @@ class FashionService:
         wind_speed = weather.get("wind_speed", 0)
         uv_index = weather.get("uv_index", 0)
         
+        signature = recommendation_signature(temp, precip, wind_speed, uv_index)
+        cached = FashionService._templates.get(signature)
+        if cached is None:
+            template = FashionService._evaluate(temp, precip, wind_speed, uv_index)
+            numbered = tuple(i for i, tip in enumerate(template["tips"]) if tip in (WIND_TIP, UV_TIP))
+            cached = FashionService._templates[signature] = (template, numbered)
+        
+        template, numbered = cached
+        tips = list(template["tips"])
+        for i in numbered:
+            tips[i] = tips[i].format(wind_speed=wind_speed, uv_index=uv_index)
+        
+        if personalized:
+            tips = feedback_aggregator.rank(tips, user_id, signature)
+        
+        # Fresh lists so callers can never modify the shared template
+        return {
+            "summary": template["summary"],
+            "layers": {name: list(items) for name, items in template["layers"].items()},
+            "accessories": list(template["accessories"]),
+            "footwear": list(template["footwear"]),
+            "tips": tips
+        }
+    
+    @staticmethod
+    def _evaluate(temp, precip, wind_speed, uv_index) -> Dict[str, Any]:
+        """Apply the outfit rules; wind/UV tips are left as templates."""
         recommendation = {
             "summary": "",
             "layers": {
@@ -124,7 +206,7 @@ class FashionService:
         
         # Wind adjustments
         if wind_speed > 20:
-            recommendation["tips"].append(f"💨 Windy ({wind_speed} km/h) - secure loose items")
+            recommendation["tips"].append(WIND_TIP)
             if temp < 15:
                 recommendation["tips"].append("Wind chill will make it feel colder")
         
@@ -132,7 +214,7 @@ class FashionService:
         if uv_index >= 6:
             if "Sunglasses" not in recommendation["accessories"]:
                 recommendation["accessories"].append("Sunglasses")
-            recommendation["tips"].append(f"☀️ High UV ({uv_index}) - wear sunscreen SPF 30+")
+            recommendation["tips"].append(UV_TIP)
         
         return recommendation
 
@@ -0,0 +1,246 @@
+import json
+import logging
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Optional
+
+from app.config import get_settings
+from app.utils.snapshot import SnapshotWriter, read_snapshot
+
+logger = logging.getLogger(__name__)
+
+# Counter slots per (tip, weather bucket)
+HELPFUL, NOT_HELPFUL, IGNORED = 0, 1, 2
+FEEDBACK_SLOTS = {"helpful": HELPFUL, "not_helpful": NOT_HELPFUL, "ignored": IGNORED}
+
+# Bucket holding a tip's feedback in every kind of weather
+ALL_WEATHER = -1
+
+# An ignored tip counts as half a "not helpful"
+IGNORED_WEIGHT = 0.5
+
+# Pseudo-votes of the global rate mixed into each user's rate
+PRIOR_STRENGTH = 2.0
+
+# The global rate itself starts from an even split worth this many votes
+GLOBAL_PRIOR_RATE = 0.5
+GLOBAL_PRIOR_STRENGTH = 2.0
+
+SNAPSHOT_VERSION = 1
+
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+
+Counters = dict[tuple[str, int], list[int]]
+
+_NO_VOTES = (0, 0, 0)
+
+
+def tip_key(tip: str) -> str:
+    """Identity of a tip with its measured values blanked ("Windy (# km/h)...")."""
+    return _NUMBER.sub("#", tip)
+
+
+def _helpful_rate(counts, prior: float, strength: float) -> tuple[float, float]:
+    """Smoothed share of helpful votes, and the (weighted) number of votes."""
+    votes = counts[HELPFUL] + counts[NOT_HELPFUL] + IGNORED_WEIGHT * counts[IGNORED]
+    return (counts[HELPFUL] + strength * prior) / (votes + strength), votes
+
+
+class FeedbackAggregator:
+    """
+    Running helpful / not_helpful / ignored counts per tip, kept per user
+    and globally, for each weather bucket and across all weather. Every
+    feedback event is a constant number of counter increments per tip
+    shown, so nothing is ever rescanned; ranking reads a few counters.
+
+    Weather buckets are ints chosen by the caller (FashionService uses
+    its recommendation signature). Per-user counters are a bounded LRU
+    (fashion_feedback_max_users); a user dropped from it keeps their
+    share of the global counts. Counters are snapshotted every
+    `snapshot_every` events from a worker thread, and on close.
+    """
+
+    def __init__(self, snapshot_every: int = 100):
+        self._global: Counters = {}
+        self._users: OrderedDict[str, Counters] = OrderedDict()
+        # Loading may run in a worker thread while events keep arriving
+        self._lock = threading.Lock()
+        self._snapshots = SnapshotWriter("fashion feedback", self._snapshot, snapshot_every)
+        self.events = 0
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def _user(self, user_id: str) -> Counters:
+        user = self._users.get(user_id)
+        if user is None:
+            user = self._users[user_id] = {}
+            if len(self._users) > get_settings().fashion_feedback_max_users:
+                self._users.popitem(last=False)
+        else:
+            self._users.move_to_end(user_id)
+        return user
+
+    def observe(self, user_id: str, tips: list, bucket: int, feedback: str) -> bool:
+        """Count one feedback event on the tips that were shown. False if unknown feedback."""
+        slot = FEEDBACK_SLOTS.get(feedback)
+        if slot is None:
+            return False
+
+        with self._lock:
+            user = self._user(user_id)
+            for tip in tips:
+                key = tip_key(str(tip))
+                for counters in (self._global, user):
+                    for k in ((key, bucket), (key, ALL_WEATHER)):
+                        counts = counters.get(k)
+                        if counts is None:
+                            counts = counters[k] = [0, 0, 0]
+                        counts[slot] += 1
+            self.events += 1
+
+        self._snapshots.changed()
+        return True
+
+    def counts(self, tip: str, bucket: int = ALL_WEATHER, user_id: Optional[str] = None) -> tuple:
+        """(helpful, not_helpful, ignored) for a tip, globally or for one user."""
+        counters = self._global if user_id is None else self._users.get(user_id, {})
+        return tuple(counters.get((tip_key(tip), bucket), _NO_VOTES))
+
+    def rank(self, tips: list[str], user_id: Optional[str], bucket: int) -> list[str]:
+        """
+        Tips ordered by the user's smoothed helpful rate in this weather
+        (their all-weather counts when the bucket has none), shrunk toward
+        the global rate. Tips the user has clearly rejected are dropped,
+        but at least one tip is always kept. Ties keep the rule order.
+        """
+        settings = get_settings()
+        user = self._users.get(user_id, {}) if user_id else {}
+
+        scored = []
+        for i, tip in enumerate(tips):
+            key = tip_key(tip)
+            global_counts = self._global.get((key, bucket)) or self._global.get((key, ALL_WEATHER)) or _NO_VOTES
+            prior, _ = _helpful_rate(global_counts, GLOBAL_PRIOR_RATE, GLOBAL_PRIOR_STRENGTH)
+            user_counts = user.get((key, bucket)) or user.get((key, ALL_WEATHER)) or _NO_VOTES
+            rate, votes = _helpful_rate(user_counts, prior, PRIOR_STRENGTH)
+            scored.append((rate, votes, i, tip))
+
+        kept = [
+            entry for entry in scored
+            if entry[1] < settings.fashion_personalize_min_votes
+            or entry[0] >= settings.fashion_personalize_hide_below
+        ]
+        if not kept and scored:
+            kept = [max(scored, key=lambda entry: (entry[0], -entry[2]))]
+
+        kept.sort(key=lambda entry: (-entry[0], entry[2]))
+        return [tip for _, _, _, tip in kept]
+
+    def _merge(self, other: "FeedbackAggregator") -> None:
+        """Add another aggregator's counts to this one."""
+        with self._lock:
+            for user_id, source in [(None, other._global), *other._users.items()]:
+                target = self._global if user_id is None else self._user(user_id)
+                for k, counts in source.items():
+                    existing = target.get(k)
+                    if existing is None:
+                        target[k] = list(counts)
+                    else:
+                        for slot, n in enumerate(counts):
+                            existing[slot] += n
+            self.events += other.events
+
+    def load_history(self, log_dir: Path, bucket_of: Callable[[dict], int]) -> int:
+        """Add counts from FashionFeedback logs (fashion_*.jsonl); bad lines are skipped."""
+        count = 0
+        for file_path in sorted(Path(log_dir).glob("fashion_*.jsonl")):
+            skipped = 0
+            try:
+                with open(file_path, "r") as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                            count += self.observe(
+                                record["user_id"],
+                                record.get("tips_shown") or [],
+                                bucket_of(record.get("weather_conditions") or {}),
+                                record["feedback"]
+                            )
+                        except (ValueError, KeyError, TypeError, AttributeError):
+                            skipped += 1
+            except OSError as e:
+                logger.error(f"❌ Failed to read fashion feedback {file_path}: {e}")
+            if skipped:
+                logger.warning(f"Skipped {skipped} bad line(s) in {file_path}")
+        return count
+
+    def _snapshot(self) -> dict:
+        def rows(counters: Counters) -> list:
+            return [[tip, bucket, *counts] for (tip, bucket), counts in counters.items()]
+
+        with self._lock:
+            return {
+                "version": SNAPSHOT_VERSION,
+                "events": self.events,
+                "global": rows(self._global),
+                "users": {user_id: rows(counters) for user_id, counters in self._users.items()}
+            }
+
+    def save_snapshot(self, path: Path) -> None:
+        """Atomically write the counters to disk."""
+        self._snapshots.save(path)
+
+    def load_snapshot(self, path: Path) -> bool:
+        """Add the counts of a snapshot to the current ones. Returns False if unusable."""
+        snapshot = read_snapshot(path, SNAPSHOT_VERSION)
+        if snapshot is None:
+            return False
+
+        def counters(rows: list) -> Counters:
+            return {(tip, bucket): [helpful, not_helpful, ignored] for tip, bucket, helpful, not_helpful, ignored in rows}
+
+        loaded = FeedbackAggregator()
+        loaded._global = counters(snapshot["global"])
+        loaded._users = OrderedDict((user_id, counters(rows)) for user_id, rows in snapshot["users"].items())
+        loaded.events = snapshot.get("events", 0)
+        self._merge(loaded)
+        return True
+
+    def load(self, snapshot_path: Path, history_dir: Path, bucket_of: Callable[[dict], int]) -> None:
+        """
+        Startup: load the snapshot, or rebuild from the feedback logs when
+        there is none. Either way the counts are added to any events
+        observed before loading finished. Later updates are snapshotted
+        to the same path.
+        """
+        snapshot_path = Path(snapshot_path)
+
+        if self.load_snapshot(snapshot_path):
+            self._snapshots.path = snapshot_path
+            logger.info(f"✅ Loaded fashion feedback counters ({self.events} events, {len(self)} users)")
+            return
+
+        history = FeedbackAggregator()
+        count = history.load_history(history_dir, bucket_of)
+        self._merge(history)
+        self.save_snapshot(snapshot_path)
+        self._snapshots.path = snapshot_path
+        logger.info(f"✅ Built fashion feedback counters from {count} event(s) ({len(self)} users)")
+
+    def close(self) -> None:
+        """Flush pending updates to the snapshot."""
+        self._snapshots.close()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._global.clear()
+            self._users.clear()
+            self.events = 0
+        self._snapshots.dirty = 0
+
+
+# Singleton instance
+feedback_aggregator = FeedbackAggregator()
@@ -0,0 +1,318 @@
+import asyncio
+import logging
+import math
+import time
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Optional
+
+from app.config import get_settings
+from app.models.schemas import DailyForecast, ForecastSummary, HourlyForecast
+from app.utils.geo import cell_key
+
+logger = logging.getLogger(__name__)
+
+# Open-Meteo variables kept per hour / per day
+HOURLY_VARIABLES = (
+    "temperature_2m",
+    "precipitation",
+    "precipitation_probability",
+    "relative_humidity_2m",
+    "wind_speed_10m",
+    "uv_index",
+)
+
+DAILY_VARIABLES = (
+    "temperature_2m_max",
+    "temperature_2m_min",
+    "precipitation_sum",
+    "precipitation_probability_max",
+    "wind_speed_10m_max",
+    "uv_index_max",
+)
+
+HOUR = 3600
+DAY = 86400
+
+
+def _to_array(values) -> array:
+    """float32 column; missing values become NaN."""
+    if isinstance(values, array) and values.typecode == "f":
+        return values  # already decoded by the streaming reader
+    return array("f", (math.nan if v is None else v for v in values))
+
+
+def _present(values) -> list[float]:
+    return [v for v in values if v == v]  # drop NaN
+
+
+def _value(v: float) -> Optional[float]:
+    """float32 sample as a JSON-friendly float (None for missing)."""
+    return None if v != v else round(v, 2)
+
+
+def _utc(timestamp: float) -> datetime:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc)
+
+
+@dataclass(slots=True)
+class CellForecast:
+    """
+    Hourly and daily forecast for one weather cell, stored column-wise.
+
+    Each variable is an array('f'); sample i is at `start + i * step`
+    (epoch seconds, UTC). 7 days of hourly data for six variables is
+    about 4 KB.
+    """
+    latitude: float
+    longitude: float
+    utc_offset_seconds: int
+    hourly_start: int
+    hourly: dict[str, array]
+    daily_start: int
+    daily: dict[str, array]
+    fetched_at: float
+    step: int = HOUR
+
+    @property
+    def hours(self) -> int:
+        return len(self.hourly[HOURLY_VARIABLES[0]])
+
+    @property
+    def hourly_end(self) -> int:
+        """Epoch seconds just past the last hourly sample."""
+        return self.hourly_start + self.hours * self.step
+
+    @property
+    def nbytes(self) -> int:
+        columns = list(self.hourly.values()) + list(self.daily.values())
+        return sum(column.itemsize * len(column) for column in columns)
+
+    def index_range(self, start: float, end: float) -> tuple[int, int]:
+        """Hourly sample indexes covering [start, end)."""
+        i0 = math.floor((start - self.hourly_start) / self.step)
+        i1 = math.ceil((end - self.hourly_start) / self.step)
+        i0 = min(max(0, i0), self.hours)
+        return i0, max(i0, min(self.hours, i1))
+
+    def timestamps(self, i0: int, i1: int) -> range:
+        return range(self.hourly_start + i0 * self.step, self.hourly_start + i1 * self.step, self.step)
+
+    def window(self, variable: str, start: float, end: float) -> array:
+        i0, i1 = self.index_range(start, end)
+        return self.hourly[variable][i0:i1]
+
+    def window_min(self, variable: str, start: float, end: float) -> Optional[float]:
+        values = _present(self.window(variable, start, end))
+        return min(values) if values else None
+
+    def window_max(self, variable: str, start: float, end: float) -> Optional[float]:
+        values = _present(self.window(variable, start, end))
+        return max(values) if values else None
+
+    def window_sum(self, variable: str, start: float, end: float) -> Optional[float]:
+        values = _present(self.window(variable, start, end))
+        return sum(values) if values else None
+
+    def interpolate(
+        self,
+        timestamp: float,
+        variables: tuple[str, ...] = HOURLY_VARIABLES
+    ) -> Optional[dict[str, float]]:
+        """
+        Linearly interpolate every variable at `timestamp`.
+
+        The bracketing samples and weight are computed once and applied
+        across all columns. A NaN on one side falls back to the other
+        sample. Returns None outside the forecast window.
+        """
+        hours = self.hours
+        position = (timestamp - self.hourly_start) / self.step
+        if hours == 0 or position < 0 or position > hours - 1:
+            return None
+
+        i = min(int(position), max(0, hours - 2))
+        j = min(i + 1, hours - 1)
+        weight = position - i
+
+        values = {}
+        for variable in variables:
+            column = self.hourly[variable]
+            a, b = column[i], column[j]
+            if a != a:
+                a = b
+            elif b != b:
+                b = a
+            values[variable] = a + (b - a) * weight
+        return values
+
+    @classmethod
+    def from_open_meteo(cls, data: dict) -> "CellForecast":
+        """Build from a response requested with timeformat=unixtime."""
+        hourly = data["hourly"]
+        daily = data.get("daily", {})
+        hourly_times = hourly["time"]
+        daily_times = daily.get("time", [])
+
+        return cls(
+            latitude=float(data["latitude"]),
+            longitude=float(data["longitude"]),
+            utc_offset_seconds=int(data.get("utc_offset_seconds", 0)),
+            hourly_start=int(hourly_times[0]),
+            hourly={v: _to_array(hourly.get(v, [None] * len(hourly_times))) for v in HOURLY_VARIABLES},
+            daily_start=int(daily_times[0]) if daily_times else int(hourly_times[0]),
+            daily={v: _to_array(daily.get(v, [None] * len(daily_times))) for v in DAILY_VARIABLES},
+            fetched_at=time.time()
+        )
+
+
+class ForecastStore:
+    """
+    In-memory forecasts keyed by weather cell.
+
+    One upstream call per cell per forecast_ttl_seconds answers every
+    time slice or window aggregate inside the forecast window. Concurrent
+    misses for the same cell share a single upstream call. `fetch` does
+    the upstream call (weather_service.fetch_forecast in production).
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[float, float], Awaitable[CellForecast]],
+        max_cells: Optional[int] = None
+    ):
+        self._fetch = fetch
+        self.max_cells = max_cells or get_settings().forecast_max_cells
+        self._cells: OrderedDict[tuple[int, int], CellForecast] = OrderedDict()
+        self._inflight: dict[tuple[int, int], asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._cells)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(forecast.nbytes for forecast in self._cells.values())
+
+    def _key(self, latitude: float, longitude: float) -> tuple[int, int]:
+        return cell_key(latitude, longitude, get_settings().weather_cell_deg)
+
+    def peek(self, latitude: float, longitude: float) -> Optional[CellForecast]:
+        """Cached forecast for the cell, fresh or not, without fetching."""
+        return self._cells.get(self._key(latitude, longitude))
+
+    def put(self, latitude: float, longitude: float, forecast: CellForecast) -> None:
+        key = self._key(latitude, longitude)
+        self._cells[key] = forecast
+        self._cells.move_to_end(key)
+        while len(self._cells) > self.max_cells:
+            self._cells.popitem(last=False)
+
+    def is_fresh(self, forecast: CellForecast, max_age: Optional[float] = None) -> bool:
+        if max_age is None:
+            max_age = get_settings().forecast_ttl_seconds
+        return time.time() - forecast.fetched_at < max_age
+
+    async def get(
+        self,
+        latitude: float,
+        longitude: float,
+        max_age: Optional[float] = None
+    ) -> CellForecast:
+        """Forecast for the cell, fetched if missing or older than max_age."""
+        key = self._key(latitude, longitude)
+
+        forecast = self._cells.get(key)
+        if forecast is not None and self.is_fresh(forecast, max_age):
+            self._cells.move_to_end(key)
+            return forecast
+
+        pending = self._inflight.get(key)
+        while pending is not None:
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                # The leader was cancelled, not us: fetch (or join) again
+                if not pending.cancelled() or asyncio.current_task().cancelling():
+                    raise
+            pending = self._inflight.get(key)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            forecast = await self._fetch(latitude, longitude)
+            self.put(latitude, longitude, forecast)
+            future.set_result(forecast)
+            return forecast
+        except Exception as e:
+            future.set_exception(e)
+            # Waiters get the exception; make sure it is not reported as unretrieved
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+            if not future.done():
+                # Cancelled mid-fetch: release the waiters instead of leaving
+                # them on a future nobody will ever resolve
+                future.cancel()
+
+
+def hourly_window(forecast: CellForecast, start: float, end: float) -> list[HourlyForecast]:
+    """Hourly samples in [start, end) as response models."""
+    i0, i1 = forecast.index_range(start, end)
+    columns = [forecast.hourly[v][i0:i1] for v in HOURLY_VARIABLES]
+
+    return [
+        HourlyForecast(
+            time=_utc(ts),
+            temperature=_value(temperature),
+            precipitation=_value(precipitation),
+            precipitation_probability=_value(probability),
+            humidity=_value(humidity),
+            wind_speed=_value(wind_speed),
+            uv_index=_value(uv_index)
+        )
+        for ts, temperature, precipitation, probability, humidity, wind_speed, uv_index
+        in zip(forecast.timestamps(i0, i1), *columns)
+    ]
+
+
+def summarize_window(forecast: CellForecast, start: float, end: float) -> ForecastSummary:
+    """Window aggregates computed straight from the columns."""
+    precipitation_sum = forecast.window_sum("precipitation", start, end)
+
+    def rounded(v: Optional[float]) -> Optional[float]:
+        return None if v is None else round(v, 2)
+
+    return ForecastSummary(
+        start=_utc(start),
+        end=_utc(end),
+        temperature_min=rounded(forecast.window_min("temperature_2m", start, end)),
+        temperature_max=rounded(forecast.window_max("temperature_2m", start, end)),
+        precipitation_sum=rounded(precipitation_sum),
+        precipitation_probability_max=rounded(forecast.window_max("precipitation_probability", start, end)),
+        wind_speed_max=rounded(forecast.window_max("wind_speed_10m", start, end)),
+        uv_index_max=rounded(forecast.window_max("uv_index", start, end)),
+        will_rain=bool(precipitation_sum and precipitation_sum > 0)
+    )
+
+
+def daily_outlook(forecast: CellForecast, days: int) -> list[DailyForecast]:
+    """First `days` days of the daily columns."""
+    columns = [forecast.daily[v][:days] for v in DAILY_VARIABLES]
+    count = len(columns[0])
+
+    return [
+        DailyForecast(
+            date=_utc(forecast.daily_start + i * DAY),
+            temperature_max=_value(t_max),
+            temperature_min=_value(t_min),
+            precipitation_sum=_value(precipitation),
+            precipitation_probability_max=_value(probability),
+            wind_speed_max=_value(wind_speed),
+            uv_index_max=_value(uv_index)
+        )
+        for i, (t_max, t_min, precipitation, probability, wind_speed, uv_index)
+        in zip(range(count), zip(*columns))
+    ]
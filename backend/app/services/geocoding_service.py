@@ -1,19 +1,125 @@
 import httpx
 import logging
+from dataclasses import replace
 from typing import Optional
+from app.models.internal import LocationRecord
 from app.models.schemas import Coordinates , LocationOption
 from app.config import get_settings
+from app.services.admission_service import NOMINATIM, admission
+from app.services.cache_service import geocode_cache
+from app.services.http_client import get_client
+from app.services.suggest_service import suggest_index, SEARCH_RESULT_WEIGHT
+from app.services.tracing_service import set_attributes, traced
+from app.utils.coordinates import parse_coordinates
+from app.utils.geo import SpatialGrid, haversine_km
+from app.utils.json_stream import JsonStream, JsonStreamError
+from app.utils.relevance import compile_query
 
 
 # Module logger
 logger = logging.getLogger(__name__)
 
+# Results closer than this are treated as the same place
+SIMILARITY_THRESHOLD_KM = 5.0
+
+# Parts of each Nominatim result the pipeline reads; the rest is skipped
+# while the response streams in
+RESULT_FIELDS = ("lat", "lon", "display_name", "type", "importance", "osm_type")
+ADDRESS_FIELDS = (
+    "city", "town", "village", "hamlet", "neighbourhood", "suburb",
+    "county", "state", "country", "country_code"
+)
+
 
 class GeocodingError(Exception):
     """Raised when geocoding fails."""
     pass
 
 
+async def read_search_results(chunks) -> list[dict]:
+    """Decode a Nominatim /search body, keeping only the fields we use."""
+    stream = JsonStream(chunks)
+    results = []
+    async for _ in stream.items(decode=False):
+        results.append(await stream.pick(RESULT_FIELDS, {"address": ADDRESS_FIELDS}))
+    await stream.end()
+    return results
+
+
+async def _search_nominatim(params: dict, description: str) -> list[dict]:
+    settings = get_settings()
+    
+    try:
+        async with admission.upstream(NOMINATIM), get_client().stream(
+            "GET",
+            f"{settings.nominatim_base_url}/search",
+            params={**params, "format": "json", "addressdetails": 1},
+            headers={
+                "User-Agent": "WeatherAgentApp/1.0"
+            },
+            timeout=10.0
+        ) as response:
+            response.raise_for_status()
+            return await read_search_results(response.aiter_bytes())
+        
+    except httpx.TimeoutException:
+        raise GeocodingError(f"Geocoding service timed out for {description}")
+    except httpx.HTTPError as e:
+        raise GeocodingError(f"Geocoding API error: {str(e)}")
+    except JsonStreamError as e:
+        raise GeocodingError(f"Invalid response from geocoding service: {e}")
+
+
+def geocode_cache_key(kind: str, query: str, limit: int) -> str:
+    """Cache key for a Nominatim lookup; queries differing only in case or spacing share it."""
+    return f"{kind}:{limit}:{' '.join(query.lower().split())}"
+
+
+def reverse_cache_key(latitude: float, longitude: float) -> str:
+    """Reverse geocoding cache key; points within ~10 m share it."""
+    return geocode_cache_key("reverse", f"{latitude:.4f},{longitude:.4f}", 1)
+
+
+def coordinate_label(latitude: float, longitude: float) -> str:
+    return f"Location ({latitude:.2f}, {longitude:.2f})"
+
+
+async def _coordinate_name(latitude: float, longitude: float) -> str:
+    """Display name for a coordinate literal, per geocode_coordinate_naming."""
+    naming = get_settings().geocode_coordinate_naming
+    name = None
+    
+    if naming == "reverse":
+        name = await reverse_geocode(latitude, longitude)
+    elif naming == "cache":
+        name = await geocode_cache.get(reverse_cache_key(latitude, longitude))
+    
+    return name or coordinate_label(latitude, longitude)
+
+
+async def resolve_coordinates(text: Optional[str]) -> Optional[Coordinates]:
+    """
+    Coordinates for a coordinate literal (decimal, DMS, hemisphere
+    letters, geo: URI, plus code) without calling Nominatim; None when
+    `text` is not one.
+    """
+    point = parse_coordinates(text)
+    if point is None:
+        return None
+    
+    latitude, longitude = point
+    logger.info(f"Coordinate literal '{text}' → ({latitude}, {longitude})")
+    
+    # Range-checked by the parser
+    return Coordinates.model_construct(
+        latitude=latitude,
+        longitude=longitude,
+        location_name=await _coordinate_name(latitude, longitude),
+        confidence="high"
+    )
+
+
+@traced("geocode")
 async def geocode(location: Optional[str]) -> Coordinates:
   
     settings = get_settings()
@@ -27,30 +133,22 @@ async def geocode(location: Optional[str]) -> Coordinates:
             confidence="high"
         )
     
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(
-                f"{settings.nominatim_base_url}/search",
-                params={
-                    "q": location,           
-                    "format": "json",        
-                    "limit": 1,             
-                    "addressdetails": 1,
-                    "accept-language": "en"      
-                },
-                headers={
-                    "User-Agent": "WeatherAgentApp/1.0"  
-                },
-                timeout=10.0
-            )
-            response.raise_for_status()
-            
-        except httpx.TimeoutException:
-            raise GeocodingError(f"Geocoding service timed out for location: {location}")
-        except httpx.HTTPError as e:
-            raise GeocodingError(f"Geocoding API error: {str(e)}")
+    # Coordinates typed or sent directly never reach the geocoder
+    coords = await resolve_coordinates(location)
+    if coords is not None:
+        return coords
     
-    data = response.json()
+    cache_key = geocode_cache_key("geocode", location, 1)
+    data = await geocode_cache.get(cache_key)
+    set_attributes({"geocode.cache_hit": data is not None})
+    
+    if data is None:
+        data = await _search_nominatim(
+            {"q": location, "limit": 1, "accept-language": "en"},
+            f"location: {location}"
+        )
+        if data:
+            await geocode_cache.set(cache_key, data)
     
     if not data or len(data) == 0:
         raise GeocodingError(f"Location not found: {location}")
@@ -60,19 +158,36 @@ async def geocode(location: Optional[str]) -> Coordinates:
     # Determine confidence based on result type
     confidence = _determine_confidence(result)
     
-    return Coordinates(
+    # Parsed from Nominatim's own numbers: no need to validate again
+    coords = Coordinates.model_construct(
         latitude=float(result["lat"]),
         longitude=float(result["lon"]),
         location_name=result.get("display_name", location),
         confidence=confidence
     )
+    
+    # Remember it for type-ahead suggestions
+    suggest_index.record(
+        _extract_short_name(result),
+        coords.location_name,
+        coords.latitude,
+        coords.longitude
+    )
+    
+    return coords
 
 # Reverse Geocoding Function
+@traced("geocode.reverse")
 async def reverse_geocode(
     latitude: float,
     longitude: float,
-    session: httpx.AsyncClient  
+    session: Optional[httpx.AsyncClient] = None
 ) -> Optional[str]:
+    cache_key = reverse_cache_key(latitude, longitude)
+    cached = await geocode_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
     url = "https://nominatim.openstreetmap.org/reverse"
     
     params = {
@@ -87,7 +202,9 @@ async def reverse_geocode(
     }
     
     try:
-        response = await session.get(url, params=params, headers=headers)
+        # A rejection degrades to the "Location (lat, lon)" label like any failure
+        async with admission.upstream(NOMINATIM):
+            response = await (session or get_client()).get(url, params=params, headers=headers)
         
         if response.status_code != 200:
             logger.error(f"Reverse geocoding failed: {response.status_code}")
@@ -113,13 +230,18 @@ async def reverse_geocode(
         if "country" in address:
             parts.append(address["country"])
         
-        return ", ".join(parts) if parts else data.get("display_name", "Unknown Location")
+        name = ", ".join(parts) if parts else data.get("display_name", "Unknown Location")
             
     except Exception as e:
         logger.error(f"Reverse geocoding error: {e}")
         return None
+    
+    # Also names coordinate literals later (see _coordinate_name)
+    await geocode_cache.set(cache_key, name)
+    return name
 
 # Disambiguation Function 
+@traced("geocode.search")
 async def search_locations(
     query: str, 
     limit: int = 5,
@@ -127,105 +249,128 @@ async def search_locations(
 ) -> list[LocationOption]:
     """Search for multiple location matches (for disambiguation)."""
     
-    from app.models.schemas import LocationOption
-    
     settings = get_settings()
     
     if not query or query.strip() == "":
         return []
     
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(
-                f"{settings.nominatim_base_url}/search",
-                params={
-                    "q": query,
-                    "format": "json",
-                    "limit": max(limit, 10),
-                    "addressdetails": 1
-                },
-                headers={
-                    "User-Agent": "WeatherAgentApp/1.0"
-                },
-                timeout=10.0
-            )
-            response.raise_for_status()
-            
-        except httpx.TimeoutException:
-            raise GeocodingError(f"Geocoding service timed out for query: {query}")
-        except httpx.HTTPError as e:
-            raise GeocodingError(f"Geocoding API error: {str(e)}")
+    coords = await resolve_coordinates(query)
+    if coords is not None:
+        return [LocationOption.model_construct(
+            latitude=coords.latitude,
+            longitude=coords.longitude,
+            location_name=coords.location_name,
+            short_name=coords.location_name,
+            confidence="high",
+            location_type="coordinates"
+        )]
+    
+    search_limit = max(limit, settings.geocoding_search_limit)
+    cache_key = geocode_cache_key("search", query, search_limit)
+    data = await geocode_cache.get(cache_key)
+    
+    if data is None:
+        data = await _search_nominatim(
+            {"q": query, "limit": search_limit},
+            f"query: {query}"
+        )
+        # Like geocode(): an empty answer may be transient, so it is not cached
+        if data:
+            await geocode_cache.set(cache_key, data)
+    
+    results = _process_search_results(data, query, limit, filter_by_confidence)
+    
+    # Offered matches become type-ahead suggestions too
+    for option in results:
+        suggest_index.record(
+            option.short_name,
+            option.location_name,
+            option.latitude,
+            option.longitude,
+            weight=SEARCH_RESULT_WEIGHT
+        )
     
-    data = response.json()
+    return [option.to_model() for option in results]
+
+
+def _process_search_results(
+    data: list[dict],
+    query: str,
+    limit: int = 5,
+    filter_by_confidence: bool = True
+) -> list[LocationRecord]:
+    """Turn raw Nominatim results into ranked, deduplicated options.
     
+    Kept separate from the HTTP call so the pipeline can be benchmarked
+    against recorded fixtures (see benchmarks/bench_geocoding.py).
+    """
     if not data:
         return []
     
-    # Transform ALL results into LocationOption objects
-    all_options = []
-    for result in data:
-        short_name = _extract_short_name(result)
-        confidence = _determine_confidence(result)
-        
-        option = LocationOption(
-            latitude=float(result["lat"]),
-            longitude=float(result["lon"]),
-            location_name=result.get("display_name", query),
-            short_name=short_name,
-            confidence=confidence,
-            location_type=result.get("type", "unknown")
-        )
-        all_options.append(option)
+    # Transform ALL results into lightweight records
+    all_options = [_build_option(result, query) for result in data]
     
     relevant = _filter_relevant_results(all_options, query)
     
     deduplicated = _deduplicate_locations(relevant)
     
     if filter_by_confidence:
-        filtered = _apply_confidence_filter(deduplicated, limit)
-        return filtered
+        results = _apply_confidence_filter(deduplicated, limit)
     else:
-        return deduplicated[:limit]
+        results = deduplicated[:limit]
+    
+    return results
+
+def _build_option(result: dict, query: str) -> LocationRecord:
+    """One Nominatim result as a LocationRecord."""
+    return LocationRecord(
+        latitude=float(result["lat"]),
+        longitude=float(result["lon"]),
+        location_name=result.get("display_name", query),
+        short_name=_extract_short_name(result),
+        confidence=_determine_confidence(result),
+        location_type=result.get("type", "unknown")
+    )
 
 def _filter_relevant_results(
-    options: list[LocationOption],
+    options: list[LocationRecord],
     original_query: str
-) -> list[LocationOption]:
-   
+) -> list[LocationRecord]:
+    """
+    Drop results that do not match the query and rank the rest by
+    relevance score (best first). Ties keep Nominatim's importance order.
+    """
     if not options or not original_query:
         return options
     
-    query_lower = original_query.lower().strip()
-    query_words = set(query_lower.split())
+    matcher = compile_query(original_query)
+    debug = logger.isEnabledFor(logging.DEBUG)
     
-    filtered = []
+    scored = []
     
     for option in options:
-        # Extract searchable text from location
-        searchable_text = f"{option.short_name} {option.location_name}".lower()
-        location_words = set(searchable_text.split())
-        
-        has_match = bool(query_words & location_words)
+        score = matcher.score(option.short_name, option.location_name)
         
-        is_substring = query_lower in searchable_text
-        
-        if has_match or is_substring:
-            filtered.append(option)
-            logger.debug(f"Relevant: {option.short_name} (matches query '{original_query}')")
-        else:
+        if score > 0:
+            scored.append((score, option))
+            if debug:
+                logger.debug(f"Relevant ({score:.2f}): {option.short_name} (matches query '{original_query}')")
+        elif debug:
             logger.debug(f"Filtered out: {option.short_name} (doesn't match query '{original_query}')")
     
+    scored.sort(key=lambda item: item[0], reverse=True)
+    
     logger.info(
-        f"Relevance filter: {len(options)} results → {len(filtered)} relevant "
-        f"(removed {len(options) - len(filtered)} irrelevant)"
+        f"Relevance filter: {len(options)} results → {len(scored)} relevant "
+        f"(removed {len(options) - len(scored)} irrelevant)"
     )
     
-    return filtered
+    return [option for _, option in scored]
 
 def _apply_confidence_filter(
-    options: list[LocationOption], 
+    options: list[LocationRecord], 
     limit: int
-) -> list[LocationOption]:
+) -> list[LocationRecord]:
     
     if not options:
         return []
@@ -264,29 +409,35 @@ def _apply_confidence_filter(
         )
         return result
 
-def _deduplicate_locations(options: list[LocationOption]) -> list[LocationOption]:
+def _deduplicate_locations(options: list[LocationRecord]) -> list[LocationRecord]:
 
     if len(options) <= 1:
         return options
     
-    # Group locations by proximity
+    # Group locations by proximity. Each option joins the earliest group
+    # that already holds a similar location; a spatial grid sized to the
+    # similarity threshold means only neighbouring cells are compared.
     groups = []
+    grid = SpatialGrid(SIMILARITY_THRESHOLD_KM)
     
     for option in options:
-        added_to_group = False
+        group_index = None
         
-        for group in groups:
-            for existing in group:
-                if _are_locations_similar(option, existing):
-                    group.append(option)
-                    added_to_group = True
-                    break
-            
-            if added_to_group:
-                break
+        for index, existing in grid.nearby(
+            option.latitude, option.longitude, SIMILARITY_THRESHOLD_KM
+        ):
+            if group_index is not None and index >= group_index:
+                continue
+            if _are_locations_similar(option, existing):
+                group_index = index
         
-        if not added_to_group:
+        if group_index is None:
+            group_index = len(groups)
             groups.append([option])
+        else:
+            groups[group_index].append(option)
+        
+        grid.add(option.latitude, option.longitude, (group_index, option))
     
     deduplicated = []
     for group in groups:
@@ -301,20 +452,18 @@ def _deduplicate_locations(options: list[LocationOption]) -> list[LocationOption
     return deduplicated
 
 
-def _are_locations_similar(loc1: LocationOption, loc2: LocationOption) -> bool:
+def _are_locations_similar(loc1: LocationRecord, loc2: LocationRecord) -> bool:
     """
     Check if two locations refer to approximately the same place.
     """
-    lat_diff = abs(loc1.latitude - loc2.latitude)
-    lon_diff = abs(loc1.longitude - loc2.longitude)
-    
-    distance_km = ((lat_diff * 111) ** 2 + (lon_diff * 85) ** 2) ** 0.5
-    
-    SIMILARITY_THRESHOLD_KM = 5.0  # 5km radius
+    distance_km = haversine_km(
+        loc1.latitude, loc1.longitude,
+        loc2.latitude, loc2.longitude
+    )
     
     is_similar = distance_km < SIMILARITY_THRESHOLD_KM
     
-    if is_similar:
+    if is_similar and logger.isEnabledFor(logging.DEBUG):
         logger.debug(
             f"Similar locations detected ({distance_km:.2f}km apart): "
             f"{loc1.short_name} vs {loc2.short_name}"
@@ -323,7 +472,7 @@ def _are_locations_similar(loc1: LocationOption, loc2: LocationOption) -> bool:
     return is_similar
 
 
-def _select_best_from_group(group: list[LocationOption]) -> LocationOption:
+def _select_best_from_group(group: list[LocationRecord]) -> LocationRecord:
     """
     Select the best representative from a group of duplicate locations.
     """
@@ -363,16 +512,8 @@ def _select_best_from_group(group: list[LocationOption]) -> LocationOption:
     
     if len(group) >= 2:
         if best_option.confidence == "medium":
-            # Create new option with boosted confidence
-            from app.models.schemas import LocationOption
-            best_option = LocationOption(
-                latitude=best_option.latitude,
-                longitude=best_option.longitude,
-                location_name=best_option.location_name,
-                short_name=best_option.short_name,
-                confidence="high", 
-                location_type=best_option.location_type
-            )
+            # Copy with boosted confidence (group members stay untouched)
+            best_option = replace(best_option, confidence="high")
             logger.info(
                 f"Confidence boosted to HIGH for {best_option.short_name} "
                 f"(multiple results agree)"
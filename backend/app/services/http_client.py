@@ -0,0 +1,49 @@
+import asyncio
+import logging
+from typing import Optional
+
+import httpx
+
+from app.config import get_settings
+from app.services.cassette_service import wrap_transport
+from app.services.tracing_service import TracingTransport
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Shared upstream client for Nominatim and Open-Meteo.
+
+    Keeps connections alive between requests instead of paying a TCP/TLS
+    handshake per call. Pooled connections belong to one event loop, so a
+    new client is created if the running loop changes (e.g. between test
+    runs). Requests carry the caller's trace context (TracingTransport)
+    and can be recorded or replayed (http_cassette_mode).
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        settings = get_settings()
+        transport = httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(
+                max_connections=settings.http_max_connections,
+                max_keepalive_connections=settings.http_max_keepalive_connections,
+                keepalive_expiry=settings.http_keepalive_seconds
+            )
+        )
+        _client = httpx.AsyncClient(transport=TracingTransport(wrap_transport(transport)), timeout=15.0)
+        _client_loop = loop
+    return _client
+
+
+async def close_client() -> None:
+    global _client, _client_loop
+    if _client is not None:
+        await _client.aclose()
+    _client = None
+    _client_loop = None
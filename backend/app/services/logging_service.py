@@ -2,13 +2,40 @@ import json
 import logging
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, List
-from app.models.schemas import UserPreference, LocationLog, FashionFeedback
+from typing import Dict, Any, List, Sequence
+from app.models.schemas import UserPreference, LocationLog, FashionFeedback, LoggedEvent
+from app.config import get_settings
+from app.services.suggest_service import suggest_index, place_name, HISTORY_WEIGHT
+from app.services.profile_service import location_profiles
+from app.services.prefetch_service import demand_forecast
+from app.services.fashion_service import fashion_service
+from app.services.feedback_service import feedback_aggregator
+from app.services.tracing_service import traced
 
 logger = logging.getLogger(__name__)
 
-DATA_DIR = Path("data/logs")
-DATA_DIR.mkdir(parents=True, exist_ok=True)
+# Created on the first write, not at import
+DATA_DIR = Path(get_settings().log_dir)
+
+# Log file name prefix per event kind: <prefix>_<user_id>.jsonl
+LOG_PREFIXES = {
+    "preference": "preferences",
+    "location": "locations",
+    "fashion_feedback": "fashion"
+}
+
+
+@traced("log.write")
+def _append_line(file_path: Path, line: str) -> None:
+    """Append JSONL line(s), creating the log directory if needed."""
+    try:
+        f = open(file_path, "a")
+    except FileNotFoundError:
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        f = open(file_path, "a")
+    with f:
+        f.write(line)
+
 
 class LoggingService:
     """Service for logging user interactions for future RAG/ML."""
@@ -19,8 +46,7 @@ class LoggingService:
         try:
             file_path = DATA_DIR / f"preferences_{preference.user_id}.jsonl"
             
-            with open(file_path, "a") as f:
-                f.write(json.dumps(preference.dict(), default=str) + "\n")
+            _append_line(file_path, json.dumps(preference.dict(), default=str) + "\n")
             
             logger.info(f"✅ Logged preference: {preference.preference_type} = {preference.value}")
         except Exception as e:
@@ -33,12 +59,29 @@ class LoggingService:
         try:
             file_path = DATA_DIR / f"locations_{log.user_id}.jsonl"
             
-            with open(file_path, "a") as f:
-                f.write(json.dumps(log.dict(), default=str) + "\n")
+            _append_line(file_path, json.dumps(log.dict(), default=str) + "\n")
             
             logger.info(f"✅ Logged location: {log.location_name} at {log.time_of_day}")
         except Exception as e:
             logger.error(f"❌ Failed to log location: {e}")
+        
+        LoggingService._observe_location(log)
+    
+    
+    @staticmethod
+    def _observe_location(log: LocationLog) -> None:
+        """Feed a location visit to the in-memory profiles and indexes."""
+        location_profiles.observe(log)
+        demand_forecast.observe(log)
+        short_name = place_name(log.location_name)
+        if short_name is not None:
+            suggest_index.record(
+                short_name,
+                log.location_name,
+                log.latitude,
+                log.longitude,
+                weight=HISTORY_WEIGHT
+            )
     
     
     @staticmethod
@@ -47,12 +90,58 @@ class LoggingService:
         try:
             file_path = DATA_DIR / f"fashion_{feedback.user_id}.jsonl"
             
-            with open(file_path, "a") as f:
-                f.write(json.dumps(feedback.dict(), default=str) + "\n")
+            _append_line(file_path, json.dumps(feedback.dict(), default=str) + "\n")
             
             logger.info(f"✅ Logged fashion feedback: {feedback.feedback}")
         except Exception as e:
             logger.error(f"❌ Failed to log feedback: {e}")
+        
+        LoggingService._observe_feedback(feedback)
+    
+    
+    @staticmethod
+    def _observe_feedback(feedback: FashionFeedback) -> None:
+        """Update the running feedback counters used for personalized tips."""
+        feedback_aggregator.observe(
+            feedback.user_id,
+            feedback.tips_shown,
+            fashion_service.weather_bucket(feedback.weather_conditions),
+            feedback.feedback
+        )
+    
+    
+    @staticmethod
+    async def log_batch(events: Sequence[LoggedEvent]) -> Dict[str, Any]:
+        """
+        Log a batch of mixed events. Events are grouped by kind and user,
+        and each group is written with one append to the same file (and
+        in the same line format) as the single-event methods.
+        
+        Returns counts written per kind and the number of appends.
+        """
+        groups: Dict[tuple, List[str]] = {}
+        for event in events:
+            line = json.dumps(event.model_dump(exclude={"kind"}), default=str) + "\n"
+            groups.setdefault((event.kind, event.user_id), []).append(line)
+        
+        counts = {kind: 0 for kind in LOG_PREFIXES}
+        appends = 0
+        for (kind, user_id), lines in groups.items():
+            try:
+                _append_line(DATA_DIR / f"{LOG_PREFIXES[kind]}_{user_id}.jsonl", "".join(lines))
+                counts[kind] += len(lines)
+                appends += 1
+            except Exception as e:
+                logger.error(f"❌ Failed to log {len(lines)} {kind} event(s) for {user_id}: {e}")
+        
+        for event in events:
+            if event.kind == "location":
+                LoggingService._observe_location(event)
+            elif event.kind == "fashion_feedback":
+                LoggingService._observe_feedback(event)
+        
+        logger.info(f"✅ Logged batch of {sum(counts.values())} event(s) in {appends} append(s)")
+        return {"counts": counts, "appends": appends}
     
     
     @staticmethod
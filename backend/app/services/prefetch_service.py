@@ -0,0 +1,213 @@
+import asyncio
+import heapq
+import json
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+from app.config import get_settings
+from app.models.schemas import LocationLog
+from app.services.cache_service import weather_cache
+from app.services.weather_service import fetch_current_weather, weather_cache_key
+from app.utils.geo import cell_key
+
+logger = logging.getLogger(__name__)
+
+# Demand slots: 24 weekday hours followed by 24 weekend hours
+SLOTS = 48
+
+
+def demand_slot(is_weekend: bool, hour: int) -> int:
+    return (24 if is_weekend else 0) + hour
+
+
+def prefetch_target_hour(now: datetime) -> datetime:
+    """Start of the hour prefetch warms: the one `prefetch_lead_minutes` ahead."""
+    lead = timedelta(minutes=get_settings().prefetch_lead_minutes)
+    return (now + lead).replace(minute=0, second=0, microsecond=0)
+
+
+@dataclass
+class DemandCell:
+    """Historical weather checks for one weather cell, by slot."""
+    latitude: float
+    longitude: float
+    location_name: str
+    counts: list[float]
+
+
+class DemandForecast:
+    """
+    Aggregates location logs into expected demand per weather cell and
+    hour of the week (weekday/weekend x 24 hours).
+
+    Cells use the same grid as the weather cache, so warming a cell warms
+    exactly the entry user requests will look up.
+    """
+
+    def __init__(self):
+        self._cells: dict[tuple[int, int], DemandCell] = {}
+        # History is loaded in a worker thread while requests observe
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._cells)
+
+    def observe(self, log: LocationLog) -> None:
+        key = cell_key(log.latitude, log.longitude, get_settings().weather_cell_deg)
+        with self._lock:
+            cell = self._cells.get(key)
+            if cell is None:
+                cell = self._cells[key] = DemandCell(
+                    log.latitude, log.longitude, log.location_name, [0.0] * SLOTS
+                )
+            cell.counts[demand_slot(log.is_weekend, log.hour)] += 1
+
+    def _merge(self, other: "DemandForecast") -> None:
+        """Add another forecast's counts to this one."""
+        with self._lock:
+            for key, cell in other._cells.items():
+                current = self._cells.get(key)
+                if current is None:
+                    self._cells[key] = cell
+                else:
+                    current.counts = [a + b for a, b in zip(current.counts, cell.counts)]
+
+    def load_history(self, log_dir: Path) -> int:
+        """
+        Add demand from every locations_*.jsonl file. Files are read into
+        a separate forecast and merged in one step, so this can run in a
+        worker thread.
+        """
+        history = DemandForecast()
+        count = 0
+        for file_path in sorted(Path(log_dir).glob("locations_*.jsonl")):
+            skipped = 0
+            try:
+                with open(file_path, "r") as f:
+                    for line in f:
+                        try:
+                            history.observe(LocationLog(**json.loads(line)))
+                            count += 1
+                        except (ValueError, TypeError):
+                            skipped += 1
+            except OSError as e:
+                logger.error(f"❌ Failed to read location history {file_path}: {e}")
+            if skipped:
+                logger.warning(f"Skipped {skipped} bad line(s) in {file_path}")
+        self._merge(history)
+        return count
+
+    def top_cells(self, when: datetime, limit: int) -> list[DemandCell]:
+        """Cells with the most expected demand in the hour containing `when`."""
+        slot = demand_slot(when.weekday() >= 5, when.hour)
+        with self._lock:
+            candidates = (cell for cell in self._cells.values() if cell.counts[slot] > 0)
+            return heapq.nlargest(limit, candidates, key=lambda cell: cell.counts[slot])
+
+
+class PrefetchScheduler:
+    """
+    Background task that warms the weather cache shortly before demand.
+
+    Every interval it looks `lead` minutes ahead and refreshes the
+    busiest cells for that hour whose cache entry would expire before
+    the next cycle. Entries keep the normal weather TTL, so cells stay
+    warm by being re-fetched while their hour is in demand. Upstream
+    calls are capped per hour (per worker process) and run with bounded
+    concurrency.
+    """
+
+    def __init__(
+        self,
+        forecast: DemandForecast,
+        fetch: Optional[Callable[..., Awaitable[object]]] = None
+    ):
+        self.forecast = forecast
+        self._fetch = fetch or fetch_current_weather
+        self._task: Optional[asyncio.Task] = None
+        self._budget_hour: Optional[datetime] = None
+        self._calls_this_hour = 0
+
+    async def run_once(self, now: Optional[datetime] = None) -> int:
+        """Warm the cache for the upcoming hour. Returns upstream calls made."""
+        settings = get_settings()
+
+        now = now or datetime.now()
+        target_hour = prefetch_target_hour(now)
+
+        current_hour = now.replace(minute=0, second=0, microsecond=0)
+        if current_hour != self._budget_hour:
+            self._budget_hour = current_hour
+            self._calls_this_hour = 0
+
+        budget = settings.prefetch_max_calls_per_hour - self._calls_this_hour
+        if budget <= 0:
+            return 0
+
+        # Refresh entries that would lapse before the next cycle
+        refresh_within = settings.prefetch_interval_seconds
+        cells = []
+        for cell in self.forecast.top_cells(target_hour, settings.prefetch_top_cells):
+            if len(cells) == budget:
+                break
+            remaining = await weather_cache.remaining_ttl_async(
+                weather_cache_key(cell.latitude, cell.longitude)
+            )
+            if remaining < refresh_within:
+                cells.append(cell)
+
+        semaphore = asyncio.Semaphore(settings.prefetch_concurrency)
+
+        async def warm(cell: DemandCell) -> bool:
+            async with semaphore:
+                try:
+                    await self._fetch(cell.latitude, cell.longitude, refresh=True)
+                    return True
+                except Exception as e:
+                    logger.warning(f"Prefetch failed for {cell.location_name}: {e}")
+                    return False
+
+        results = await asyncio.gather(*(warm(cell) for cell in cells))
+
+        self._calls_this_hour += len(cells)
+
+        if cells:
+            logger.info(
+                f"Prefetch: warmed {sum(results)}/{len(cells)} cell(s) "
+                f"for {target_hour:%a %H:00}"
+            )
+        return len(cells)
+
+    async def _run(self, after: Optional[Callable[[], Awaitable[object]]]) -> None:
+        if after is not None:
+            await after()
+        interval = get_settings().prefetch_interval_seconds
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"❌ Prefetch cycle failed: {e}", exc_info=True)
+            await asyncio.sleep(interval)
+
+    def start(self, after: Optional[Callable[[], Awaitable[object]]] = None) -> None:
+        """Run cycles in the background, once `after()` (e.g. warm-up) returns."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(after))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Singleton instances
+demand_forecast = DemandForecast()
+prefetch_scheduler = PrefetchScheduler(demand_forecast)
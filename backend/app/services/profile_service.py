@@ -0,0 +1,204 @@
+import asyncio
+import json
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from app.config import get_settings
+from app.models.schemas import LocationLog
+from app.utils.geo import cell_key
+
+logger = logging.getLogger(__name__)
+
+# Bucket holding every visit regardless of time of day
+ALL_DAY = "all"
+
+# Rescale scores before 2 ** exponent loses precision
+_MAX_EXPONENT = 64.0
+
+
+@dataclass
+class CellScore:
+    """Decayed visit score for one location cell."""
+    score: float
+    latitude: float
+    longitude: float
+    location_name: str
+    last_seen: datetime
+
+
+class _Bucket:
+    """Cell scores for one time-of-day bucket, with a running argmax."""
+
+    __slots__ = ("cells", "best", "total")
+
+    def __init__(self):
+        self.cells: dict[tuple[int, int], CellScore] = {}
+        self.best: Optional[CellScore] = None
+        self.total = 0.0
+
+    def add(self, key, weight: float, log: LocationLog) -> None:
+        cell = self.cells.get(key)
+        if cell is None:
+            cell = CellScore(0.0, log.latitude, log.longitude, log.location_name, log.timestamp)
+            self.cells[key] = cell
+
+        cell.score += weight
+        cell.latitude = log.latitude
+        cell.longitude = log.longitude
+        cell.location_name = log.location_name
+        cell.last_seen = log.timestamp
+        self.total += weight
+
+        # Scores only grow, so the argmax can be maintained incrementally
+        if self.best is None or cell.score > self.best.score:
+            self.best = cell
+
+    def rescale(self, factor: float) -> None:
+        for cell in self.cells.values():
+            cell.score *= factor
+        self.total *= factor
+
+
+class LocationProfile:
+    """
+    Frequency-and-recency profile of where one user checks the weather.
+
+    Uses forward exponential decay: a visit at time t adds
+    2 ** ((t - landmark) / half_life) to its cell, so newer visits count
+    more without ever re-decaying stored scores. Relative order between
+    cells is the same as with classic decay, which keeps the best cell
+    per bucket an O(1) lookup.
+    """
+
+    def __init__(self, half_life_seconds: float, cell_deg: float):
+        self.half_life = half_life_seconds
+        self.cell_deg = cell_deg
+        self.landmark: Optional[float] = None
+        self.buckets: dict[str, _Bucket] = {}
+        self.visits = 0
+
+    def observe(self, log: LocationLog) -> None:
+        t = log.timestamp.timestamp()
+        if self.landmark is None:
+            self.landmark = t
+
+        exponent = (t - self.landmark) / self.half_life
+        if exponent > _MAX_EXPONENT:
+            # Move the landmark forward and shrink every stored score
+            factor = 2.0 ** -exponent
+            for bucket in self.buckets.values():
+                bucket.rescale(factor)
+            self.landmark = t
+            exponent = 0.0
+
+        weight = 2.0 ** exponent
+        key = cell_key(log.latitude, log.longitude, self.cell_deg)
+
+        for name in (ALL_DAY, log.time_of_day):
+            bucket = self.buckets.get(name)
+            if bucket is None:
+                bucket = self.buckets[name] = _Bucket()
+            bucket.add(key, weight, log)
+
+        self.visits += 1
+
+    def predict(self, time_of_day: Optional[str] = None) -> tuple[Optional[CellScore], float, str]:
+        """
+        Most likely location for a time-of-day bucket, falling back to the
+        all-day bucket. Returns (cell, share of bucket score, bucket used).
+        """
+        for name in (time_of_day, ALL_DAY):
+            bucket = self.buckets.get(name) if name else None
+            if bucket and bucket.best:
+                return bucket.best, bucket.best.score / bucket.total, name
+        return None, 0.0, ALL_DAY
+
+
+class LocationProfileStore:
+    """
+    Bounded LRU of per-user profiles.
+
+    Profiles are loaded lazily from the user's location log the first time
+    they are needed (in a worker thread via predict_async), then kept
+    current by observe() on every log_location.
+    """
+
+    def __init__(self):
+        self._profiles: OrderedDict[str, LocationProfile] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._profiles)
+
+    def _new_profile(self) -> LocationProfile:
+        settings = get_settings()
+        return LocationProfile(
+            half_life_seconds=settings.location_profile_half_life_days * 86400,
+            cell_deg=settings.location_cell_deg
+        )
+
+    def _load(self, user_id: str) -> LocationProfile:
+        profile = self._new_profile()
+        file_path = Path(get_settings().log_dir) / f"locations_{user_id}.jsonl"
+
+        if file_path.exists():
+            skipped = 0
+            try:
+                with open(file_path, "r") as f:
+                    for line in f:
+                        try:
+                            profile.observe(LocationLog(**json.loads(line)))
+                        except (ValueError, TypeError):
+                            skipped += 1
+            except OSError as e:
+                logger.error(f"❌ Failed to load location profile for {user_id}: {e}")
+            if skipped:
+                logger.warning(f"Skipped {skipped} bad line(s) in {file_path}")
+
+        return profile
+
+    def _resident(self, user_id: str) -> Optional[LocationProfile]:
+        profile = self._profiles.get(user_id)
+        if profile is not None:
+            self._profiles.move_to_end(user_id)
+        return profile
+
+    def _add(self, user_id: str, profile: LocationProfile) -> LocationProfile:
+        self._profiles[user_id] = profile
+        if len(self._profiles) > get_settings().location_profile_max_users:
+            self._profiles.popitem(last=False)
+        return profile
+
+    def get(self, user_id: str) -> LocationProfile:
+        return self._resident(user_id) or self._add(user_id, self._load(user_id))
+
+    async def get_async(self, user_id: str) -> LocationProfile:
+        """get() with the log file read in a worker thread."""
+        profile = self._resident(user_id)
+        if profile is not None:
+            return profile
+        profile = await asyncio.to_thread(self._load, user_id)
+        # Another request may have loaded it meanwhile
+        return self._resident(user_id) or self._add(user_id, profile)
+
+    def observe(self, log: LocationLog) -> None:
+        """
+        Apply a new location log. Profiles that are not resident are left
+        alone: the log is already on disk and will be replayed on load.
+        """
+        profile = self._profiles.get(log.user_id)
+        if profile is not None:
+            profile.observe(log)
+
+    def predict(self, user_id: str, time_of_day: Optional[str] = None):
+        return self.get(user_id).predict(time_of_day)
+
+    async def predict_async(self, user_id: str, time_of_day: Optional[str] = None):
+        return (await self.get_async(user_id)).predict(time_of_day)
+
+
+# Singleton instance
+location_profiles = LocationProfileStore()
@@ -0,0 +1,232 @@
+import asyncio
+import cProfile
+import hmac
+import io
+import logging
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+from app.config import get_settings
+from app.utils.asgi import request_header
+
+logger = logging.getLogger(__name__)
+
+# Innermost frames kept per sample
+MAX_DEPTH = 128
+
+# Rows of pstats output returned for an X-Profile request
+PROFILE_ROWS = 60
+
+
+class ProfilerBusy(Exception):
+    """Raised when a profile is requested while another one is running."""
+    pass
+
+
+def admin_authorized(token: Optional[str]) -> bool:
+    """Constant-time check of an X-Admin-Token value (False when admin is disabled)."""
+    expected = get_settings().admin_token
+    return bool(expected) and token is not None and hmac.compare_digest(token.encode(), expected.encode())
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{code.co_qualname} ({code.co_filename}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """
+    Statistical profiler: a daemon thread reads sys._current_frames()
+    every interval and counts each thread's stack in collapsed form
+    ("thread;outer;...;inner"). The event loop thread shows up like any
+    other, so time spent in callbacks, in selector waits (idle) and in
+    worker threads is all visible.
+
+    Nothing is installed while no profile runs: no thread, no trace or
+    profile hooks, so leaving it compiled in costs nothing.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    @property
+    def busy(self) -> bool:
+        return self._lock.locked()
+
+    def _sample(self, stop: threading.Event, interval: float, counts: Counter) -> int:
+        me = threading.get_ident()
+        samples = 0
+        while not stop.wait(interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_DEPTH:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                counts[";".join(reversed(stack))] += 1
+            samples += 1
+        return samples
+
+    async def profile(self, seconds: float, interval: float) -> dict:
+        """Sample all threads for `seconds`; the event loop keeps serving meanwhile."""
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy("A profile is already running")
+        try:
+            counts: Counter = Counter()
+            stop = threading.Event()
+            result = {}
+
+            def run():
+                result["samples"] = self._sample(stop, interval, counts)
+
+            thread = threading.Thread(target=run, name="stack-sampler", daemon=True)
+            started = time.monotonic()
+            thread.start()
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                stop.set()
+                await asyncio.to_thread(thread.join)
+
+            logger.info(f"✅ Profiled {seconds}s: {result.get('samples', 0)} samples, {len(counts)} distinct stacks")
+            return {
+                "counts": counts,
+                "samples": result.get("samples", 0),
+                "interval": interval,
+                "seconds": time.monotonic() - started
+            }
+        finally:
+            self._lock.release()
+
+    def try_lock(self) -> bool:
+        """Reserve the profiler for one cProfile run (see ProfileMiddleware)."""
+        return self._lock.acquire(blocking=False)
+
+    def unlock(self) -> None:
+        self._lock.release()
+
+
+def collapsed(counts: Counter) -> str:
+    """Brendan Gregg's folded format, as read by flamegraph.pl and speedscope."""
+    return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+
+
+def speedscope(counts: Counter, interval: float, name: str = "weather-agent") -> dict:
+    """Speedscope "sampled" profile, one per thread."""
+    frames: list[dict] = []
+    frame_index: dict[str, int] = {}
+    per_thread: dict[str, tuple[list, list]] = {}
+
+    for stack, count in counts.items():
+        thread, *labels = stack.split(";")
+        indexes = []
+        for label in labels:
+            if label not in frame_index:
+                function, _, location = label.rpartition(" (")
+                file, _, line = location.rstrip(")").rpartition(":")
+                frame_index[label] = len(frames)
+                frames.append({"name": function, "file": file, "line": int(line) if line.isdigit() else None})
+            indexes.append(frame_index[label])
+        samples, weights = per_thread.setdefault(thread, ([], []))
+        samples.append(indexes)
+        weights.append(count * interval)
+
+    profiles = [
+        {
+            "type": "sampled",
+            "name": thread,
+            "unit": "seconds",
+            "startValue": 0,
+            "endValue": sum(weights),
+            "samples": samples,
+            "weights": weights
+        }
+        for thread, (samples, weights) in per_thread.items()
+    ]
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": name,
+        "exporter": "weather-agent stack sampler",
+        "activeProfileIndex": 0,
+        "shared": {"frames": frames},
+        "profiles": profiles
+    }
+
+
+class ProfileMiddleware:
+    """
+    Per-request cProfile: an authorized request carrying X-Profile gets
+    pstats text back instead of its normal response (the original
+    status is in X-Profile-Status). X-Profile may name the sort key,
+    e.g. "tottime"; the default is "cumulative".
+
+    cProfile sees the whole event loop thread while it runs, so other
+    requests served at the same time can appear in the stats. Only one
+    profile (sampled or cProfile) runs at once; requests without the
+    header pay one header lookup.
+    """
+
+    def __init__(self, app, sampler: Optional[StackSampler] = None):
+        self.app = app
+        self.sampler = sampler or stack_sampler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        sort = request_header(scope, b"x-profile")
+        if sort is None or not admin_authorized(request_header(scope, b"x-admin-token")):
+            await self.app(scope, receive, send)
+            return
+        if not self.sampler.try_lock():
+            logger.warning(f"X-Profile ignored for {scope['path']}: profiler busy")
+            await self.app(scope, receive, send)
+            return
+
+        response_status = {}
+
+        async def capture(message):
+            # The profile replaces the response; keep only its status
+            if message["type"] == "http.response.start":
+                response_status["status"] = message["status"]
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            try:
+                await self.app(scope, receive, capture)
+            finally:
+                profiler.disable()
+        finally:
+            self.sampler.unlock()
+
+        output = io.StringIO()
+        stats = pstats.Stats(profiler, stream=output)
+        try:
+            stats.sort_stats(sort or "cumulative")
+        except KeyError:
+            stats.sort_stats("cumulative")
+        stats.print_stats(PROFILE_ROWS)
+        body = output.getvalue().encode()
+
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/plain; charset=utf-8"),
+                (b"content-length", str(len(body)).encode()),
+                (b"x-profile-status", str(response_status.get("status", 500)).encode())
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+stack_sampler = StackSampler()
@@ -0,0 +1,365 @@
+import asyncio
+import json
+import logging
+import math
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+from urllib.parse import parse_qs
+
+from app.config import get_settings
+from app.services.admission_service import parse_limits
+from app.utils.asgi import request_header
+
+logger = logging.getLogger(__name__)
+
+# Largest request body searched for a user_id
+MAX_BODY_SCAN = 4096
+
+# (key, requests per burst, seconds between requests)
+Bucket = tuple[str, int, float]
+
+
+@dataclass
+class RateDecision:
+    """Outcome of one rate-limit check."""
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after: float
+    retry_after: float = 0.0
+
+
+def gcra(tat: Optional[float], now: float, interval: float, burst: int) -> tuple[bool, float, float]:
+    """
+    Generic cell rate algorithm: one "theoretical arrival time" per key
+    replaces a window of timestamps. Each request pushes it `interval`
+    into the future; a request is allowed while it stays within
+    `burst * interval` of now.
+
+    Returns (allowed, new tat, seconds until allowed).
+    """
+    tat = now if tat is None or tat < now else tat
+    new_tat = tat + interval
+    allow_at = new_tat - burst * interval
+    if now < allow_at:
+        return False, tat, allow_at - now
+    return True, new_tat, 0.0
+
+
+def _decisions(results, now: float) -> list[RateDecision]:
+    decisions = []
+    for (_, limit, interval), allowed, tat, wait in results:
+        # Requests still allowed right now, and when the bucket is full again
+        remaining = max(0, int((limit * interval - (tat - now)) / interval + 1e-9))
+        decisions.append(RateDecision(allowed, limit, remaining, max(0.0, tat - now), wait))
+    return decisions
+
+
+class MemoryRateStore:
+    """
+    Per-process GCRA state: one float per active key. Keys whose tat has
+    passed are indistinguishable from new keys and are swept periodically.
+    """
+
+    # Checks are fast enough to run on the event loop
+    blocking = False
+
+    def __init__(self, sweep_seconds: float = 60.0):
+        self.sweep_seconds = sweep_seconds
+        self._tat: dict[str, float] = {}
+        self._last_sweep = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._tat)
+
+    def check(self, buckets: list[Bucket], now: float) -> list[RateDecision]:
+        """Check every bucket; a request counts against them only if all allow it."""
+        results = [(bucket, *gcra(self._tat.get(bucket[0]), now, bucket[2], bucket[1])) for bucket in buckets]
+        if all(allowed for _, allowed, _, _ in results):
+            for (key, _, _), _, tat, _ in results:
+                self._tat[key] = tat
+        if time.monotonic() - self._last_sweep >= self.sweep_seconds:
+            self.sweep(now)
+        return _decisions(results, now)
+
+    def sweep(self, now: float) -> int:
+        idle = [key for key, tat in self._tat.items() if tat <= now]
+        for key in idle:
+            del self._tat[key]
+        self._last_sweep = time.monotonic()
+        if idle:
+            logger.debug(f"Rate limiter: swept {len(idle)} idle key(s), {len(self._tat)} active")
+        return len(idle)
+
+    def clear(self) -> None:
+        self._tat.clear()
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteRateStore:
+    """
+    GCRA state in a local SQLite file, shared by every worker process on
+    the host (same idea as cache_service.SQLiteCache). Each check is one
+    short write transaction, run off the event loop with a short busy
+    timeout. When the database is locked or failing, checks fail open:
+    the error is logged and the request is not limited.
+    """
+
+    # Delete idle keys every N checks
+    SWEEP_EVERY = 1024
+
+    blocking = True
+
+    def __init__(self, path: str, timeout: float = 0.1):
+        self.path = Path(path)
+        self.timeout = timeout
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._checks = 0
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # Opened lazily: connections must not be inherited across a fork
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS rate_limit (key TEXT PRIMARY KEY, tat REAL NOT NULL)")
+            self._conn = conn
+        return self._conn
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM rate_limit").fetchone()[0]
+
+    def _transaction(self, buckets: list[Bucket], now: float) -> list:
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            results = []
+            for bucket in buckets:
+                row = conn.execute("SELECT tat FROM rate_limit WHERE key = ?", (bucket[0],)).fetchone()
+                results.append((bucket, *gcra(row[0] if row else None, now, bucket[2], bucket[1])))
+            if all(allowed for _, allowed, _, _ in results):
+                conn.executemany(
+                    "INSERT OR REPLACE INTO rate_limit (key, tat) VALUES (?, ?)",
+                    [(key, tat) for (key, _, _), _, tat, _ in results]
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return results
+
+    def check(self, buckets: list[Bucket], now: float) -> Optional[list[RateDecision]]:
+        """Same as MemoryRateStore.check, in one write transaction. None if the database failed."""
+        try:
+            with self._lock:
+                results = self._transaction(buckets, now)
+                self._checks += 1
+                if self._checks % self.SWEEP_EVERY == 0:
+                    self.conn.execute("DELETE FROM rate_limit WHERE tat <= ?", (now,))
+        except sqlite3.Error as e:
+            logger.warning(f"Rate limit store unavailable, allowing request: {e}")
+            return None
+        return _decisions(results, now)
+
+    def sweep(self, now: float) -> int:
+        with self._lock:
+            return self.conn.execute("DELETE FROM rate_limit WHERE tat <= ?", (now,)).rowcount
+
+    def clear(self) -> None:
+        with self._lock:
+            self.conn.execute("DELETE FROM rate_limit")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def make_rate_store():
+    settings = get_settings()
+    if settings.rate_limit_backend == "sqlite":
+        return SQLiteRateStore(settings.rate_limit_sqlite_path, settings.rate_limit_sqlite_timeout_seconds)
+    return MemoryRateStore(settings.rate_limit_sweep_seconds)
+
+
+class RateLimiter:
+    """
+    Per-user and per-IP request rates for the routes listed in
+    rate_limit_routes ("path=requests per minute;..."). A request must
+    pass both its user bucket and its (larger) IP bucket, so rotating
+    anonymous user ids does not get around the limit.
+    """
+
+    def __init__(self, store=None):
+        self._store = store
+
+    @property
+    def store(self):
+        if self._store is None:
+            self._store = make_rate_store()
+        return self._store
+
+    def route_limit(self, path: str) -> Optional[int]:
+        return parse_limits(get_settings().rate_limit_routes).get(path)
+
+    def check(self, path: str, user_id: Optional[str], client_ip: Optional[str], now: Optional[float] = None) -> Optional[RateDecision]:
+        """Most restrictive decision for the request, or None if the route is unlimited."""
+        limit = self.route_limit(path)
+        if limit is None:
+            return None
+
+        settings = get_settings()
+        now = time.time() if now is None else now
+        buckets = []
+        if user_id:
+            buckets.append((f"user:{user_id}:{path}", limit, 60.0 / limit))
+        if client_ip:
+            ip_limit = math.ceil(limit * settings.rate_limit_ip_multiplier)
+            buckets.append((f"ip:{client_ip}:{path}", ip_limit, 60.0 / ip_limit))
+        if not buckets:
+            return None
+
+        decisions = self.store.check(buckets, now)
+        if decisions is None:
+            return None
+
+        rejected = [d for d in decisions if not d.allowed]
+        if rejected:
+            return max(rejected, key=lambda d: d.retry_after)
+        return min(decisions, key=lambda d: d.remaining)
+
+    async def check_async(self, path: str, user_id: Optional[str], client_ip: Optional[str]) -> Optional[RateDecision]:
+        """check() from the event loop; stores that touch disk run in a worker thread."""
+        if self.store.blocking:
+            return await asyncio.to_thread(self.check, path, user_id, client_ip)
+        return self.check(path, user_id, client_ip)
+
+    def close(self) -> None:
+        if self._store is not None:
+            self._store.close()
+
+
+def rate_limit_headers(decision: RateDecision) -> list[tuple[bytes, bytes]]:
+    """RateLimit-* headers (IETF draft), plus Retry-After when rejected."""
+    headers = [
+        (b"ratelimit-limit", str(decision.limit).encode()),
+        (b"ratelimit-remaining", str(decision.remaining).encode()),
+        (b"ratelimit-reset", str(math.ceil(decision.reset_after)).encode())
+    ]
+    if not decision.allowed:
+        headers.append((b"retry-after", str(max(1, math.ceil(decision.retry_after))).encode()))
+    return headers
+
+
+def _user_from_body(body: bytes) -> Optional[str]:
+    try:
+        data = json.loads(body)
+    except (ValueError, UnicodeDecodeError):
+        return None
+    user_id = data.get("user_id") if isinstance(data, dict) else None
+    return user_id if isinstance(user_id, str) else None
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware enforcing RateLimiter on HTTP requests.
+
+    The user id comes from the X-User-Id header, then a user_id query
+    parameter, then a user_id field of a small JSON body (the body is
+    replayed to the app unchanged).
+    """
+
+    def __init__(self, app, limiter: Optional[RateLimiter] = None):
+        self.app = app
+        self.limiter = limiter or rate_limiter
+
+    def _client_ip(self, scope) -> Optional[str]:
+        if get_settings().rate_limit_trust_forwarded:
+            forwarded = request_header(scope, b"x-forwarded-for")
+            if forwarded:
+                return forwarded.split(",")[0].strip()
+        client = scope.get("client")
+        return client[0] if client else None
+
+    async def __call__(self, scope, receive, send):
+        settings = get_settings()
+        if (
+            scope["type"] != "http"
+            or not settings.rate_limit_enabled
+            or scope["method"] == "OPTIONS"
+            or self.limiter.route_limit(scope["path"]) is None
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        user_id = request_header(scope, b"x-user-id")
+        if not user_id:
+            user_id = (parse_qs(scope.get("query_string", b"").decode("latin-1")).get("user_id") or [None])[0]
+        if not user_id and scope["method"] in ("POST", "PUT"):
+            receive, user_id = await self._scan_body(receive)
+
+        decision = await self.limiter.check_async(scope["path"], user_id, self._client_ip(scope))
+        if decision is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = rate_limit_headers(decision)
+        if not decision.allowed:
+            logger.warning(
+                f"Rate limited {scope['path']} for user={user_id} ip={self._client_ip(scope)}"
+            )
+            body = json.dumps({"detail": "Too many requests, please slow down."}).encode()
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    *headers
+                ]
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []), *headers]}
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+    async def _scan_body(self, receive):
+        """Read a small body for its user_id; returns a receive that replays it."""
+        messages = []
+        body = b""
+        while True:
+            message = await receive()
+            messages.append(message)
+            if message["type"] != "http.request":
+                break
+            body += message.get("body", b"")
+            if not message.get("more_body") or len(body) > MAX_BODY_SCAN:
+                break
+
+        user_id = _user_from_body(body) if len(body) <= MAX_BODY_SCAN else None
+
+        async def replay():
+            if messages:
+                return messages.pop(0)
+            return await receive()
+
+        return replay, user_id
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,165 @@
+import asyncio
+import logging
+from typing import Any, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+
+class RedisError(Exception):
+    """Raised when the Redis server is unreachable or replies with an error."""
+    pass
+
+
+def encode_command(*args) -> bytes:
+    """RESP array of bulk strings."""
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if isinstance(arg, str):
+            arg = arg.encode()
+        elif not isinstance(arg, bytes):
+            arg = str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(parts)
+
+
+async def read_reply(reader: asyncio.StreamReader) -> Any:
+    """Parse one RESP2 reply. Error replies raise RedisError."""
+    line = await reader.readline()
+    if not line:
+        raise RedisError("Connection closed by server")
+
+    prefix, body = line[:1], line[1:-2]
+    if prefix == b"+":
+        return body.decode()
+    if prefix == b"-":
+        raise RedisError(body.decode())
+    if prefix == b":":
+        return int(body)
+    if prefix == b"$":
+        length = int(body)
+        if length < 0:
+            return None
+        data = await reader.readexactly(length + 2)
+        return data[:-2]
+    if prefix == b"*":
+        count = int(body)
+        if count < 0:
+            return None
+        return [await read_reply(reader) for _ in range(count)]
+    raise RedisError(f"Unexpected reply: {line!r}")
+
+
+class _Connection:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    async def send(self, *args) -> Any:
+        self.writer.write(encode_command(*args))
+        await self.writer.drain()
+        return await read_reply(self.reader)
+
+    async def close(self) -> None:
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except Exception:
+            pass
+
+
+class RedisClient:
+    """
+    Minimal asyncio Redis client over a small connection pool.
+
+    Only what the cache tier needs (GET/SET/DEL/PTTL/EVAL). Connections
+    are opened lazily, up to max_connections, and each runs one command at
+    a time. A connection is dropped whenever a command does not finish
+    cleanly (timeout, cancellation, I/O error), since its stream may hold
+    a partial reply.
+    """
+
+    def __init__(self, url: str, timeout: float = 0.5, max_connections: int = 8):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._idle: list[_Connection] = []
+        self._slots = asyncio.Semaphore(max_connections)
+
+    async def _connect(self) -> _Connection:
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        connection = _Connection(reader, writer)
+        try:
+            if self.password:
+                await connection.send("AUTH", self.password)
+            if self.db:
+                await connection.send("SELECT", self.db)
+        except BaseException:
+            await connection.close()
+            raise
+        return connection
+
+    async def execute(self, *args) -> Any:
+        async with self._slots:
+            try:
+                connection = self._idle.pop() if self._idle else None
+                if connection is None:
+                    connection = await asyncio.wait_for(self._connect(), self.timeout)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+                raise RedisError(f"Redis {self.host}:{self.port} unavailable: {e!r}")
+
+            try:
+                reply = await asyncio.wait_for(connection.send(*args), self.timeout)
+            except RedisError as e:
+                # An error reply leaves the stream in sync; a closed one does not
+                if str(e).startswith("Connection closed"):
+                    await connection.close()
+                else:
+                    self._idle.append(connection)
+                raise
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+                await connection.close()
+                raise RedisError(f"Redis {self.host}:{self.port} unavailable: {e!r}")
+            except BaseException:
+                # Cancelled mid-command: the reply may still be on its way
+                connection.writer.close()
+                raise
+
+            self._idle.append(connection)
+            return reply
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.execute("GET", key)
+
+    async def set(
+        self,
+        key: str,
+        value: bytes,
+        ttl: Optional[float] = None,
+        nx: bool = False
+    ) -> bool:
+        args = ["SET", key, value]
+        if ttl is not None:
+            args += ["PX", max(1, int(ttl * 1000))]
+        if nx:
+            args.append("NX")
+        return await self.execute(*args) == "OK"
+
+    async def delete(self, key: str) -> int:
+        return await self.execute("DEL", key)
+
+    async def pttl(self, key: str) -> int:
+        """Milliseconds to expiry; -2 if missing, -1 if no expiry."""
+        return await self.execute("PTTL", key)
+
+    async def eval(self, script: str, keys: list, args: list) -> Any:
+        return await self.execute("EVAL", script, len(keys), *keys, *args)
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for connection in idle:
+            await connection.close()
@@ -0,0 +1,221 @@
+import asyncio
+import logging
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+
+from app.config import get_settings
+from app.models.internal import WeatherRecord
+
+logger = logging.getLogger(__name__)
+
+# WeatherRecord fields sampled at every tile node
+TILE_FIELDS = ("temperature", "precipitation", "wind_speed", "humidity", "uv_index")
+
+# Fetches current conditions for many points in one upstream call
+BatchFetch = Callable[[list[tuple[float, float]]], Awaitable[list[WeatherRecord]]]
+
+
+@dataclass
+class Region:
+    """Bounding box served from a grid of tiles instead of per-point calls."""
+    name: str
+    south: float
+    west: float
+    north: float
+    east: float
+
+    def contains(self, latitude: float, longitude: float) -> bool:
+        return self.south <= latitude <= self.north and self.west <= longitude <= self.east
+
+
+@dataclass
+class TileSample:
+    """Current conditions at one tile node."""
+    values: tuple[float, ...]
+    timestamp: object
+    fetched_at: float = field(default_factory=time.time)
+
+
+def parse_regions(spec: str) -> list[Region]:
+    """
+    Parse "name:south,west,north,east;name:..." into regions.
+    Malformed entries are logged and skipped.
+    """
+    regions = []
+    for entry in filter(None, (part.strip() for part in spec.split(";"))):
+        try:
+            name, bounds = entry.split(":", 1)
+            south, west, north, east = (float(v) for v in bounds.split(","))
+        except ValueError:
+            logger.error(f"❌ Invalid weather region '{entry}'")
+            continue
+        if south > north or west > east:
+            logger.error(f"❌ Invalid weather region '{entry}': empty bounds")
+            continue
+        regions.append(Region(name.strip(), south, west, north, east))
+    return regions
+
+
+class RegionGrid:
+    """
+    Current conditions for configured regions, sampled on a regular grid.
+
+    Tile nodes sit on multiples of `tile_deg` (roughly the forecast model
+    resolution) and every node of a region is refreshed with batched
+    multi-location calls. A point inside a region is answered from the
+    four surrounding nodes by bilinear interpolation, or from the nearest
+    node when some corners are missing, so every user in a metro area
+    shares the same handful of upstream calls.
+    """
+
+    def __init__(self, fetch: BatchFetch, tile_deg: Optional[float] = None):
+        self._fetch = fetch
+        self.tile_deg = tile_deg or get_settings().region_tile_deg
+        self.regions: list[Region] = []
+        self._tiles: dict[tuple[int, int], TileSample] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._tiles)
+
+    def add_region(self, region: Region) -> None:
+        self.regions.append(region)
+
+    def load_regions(self, spec: str) -> int:
+        """Replace the regions with those parsed from a weather_regions spec."""
+        self.regions = parse_regions(spec)
+        return len(self.regions)
+
+    def region_for(self, latitude: float, longitude: float) -> Optional[Region]:
+        for region in self.regions:
+            if region.contains(latitude, longitude):
+                return region
+        return None
+
+    def nodes(self, region: Region) -> list[tuple[int, int]]:
+        """Grid nodes bracketing every point of the region."""
+        rows = range(math.floor(region.south / self.tile_deg), math.ceil(region.north / self.tile_deg) + 1)
+        cols = range(math.floor(region.west / self.tile_deg), math.ceil(region.east / self.tile_deg) + 1)
+        return [(row, col) for row in rows for col in cols]
+
+    def node_point(self, node: tuple[int, int]) -> tuple[float, float]:
+        return node[0] * self.tile_deg, node[1] * self.tile_deg
+
+    def _fresh(self, node: tuple[int, int], now: float, max_age: float) -> Optional[TileSample]:
+        sample = self._tiles.get(node)
+        if sample is None or now - sample.fetched_at > max_age:
+            return None
+        return sample
+
+    def lookup(self, latitude: float, longitude: float) -> Optional[WeatherRecord]:
+        """Interpolated conditions for a covered point, or None."""
+        if self.region_for(latitude, longitude) is None:
+            return None
+
+        now = time.time()
+        max_age = get_settings().region_max_age_seconds
+
+        y = latitude / self.tile_deg
+        x = longitude / self.tile_deg
+        row, col = math.floor(y), math.floor(x)
+        dy, dx = y - row, x - col
+
+        corners = [
+            (self._fresh((row, col), now, max_age), (1 - dy) * (1 - dx)),
+            (self._fresh((row, col + 1), now, max_age), (1 - dy) * dx),
+            (self._fresh((row + 1, col), now, max_age), dy * (1 - dx)),
+            (self._fresh((row + 1, col + 1), now, max_age), dy * dx),
+        ]
+        present = [(sample, weight) for sample, weight in corners if sample is not None]
+        if not present:
+            self.misses += 1
+            return None
+
+        if len(present) == 4:
+            values = [
+                sum(sample.values[i] * weight for sample, weight in present)
+                for i in range(len(TILE_FIELDS))
+            ]
+        else:
+            # Nearest available node: largest bilinear weight
+            values = list(max(present, key=lambda item: item[1])[0].values)
+
+        self.hits += 1
+        return WeatherRecord(
+            timestamp=min(sample.timestamp for sample, _ in present),
+            **{name: round(value, 2) for name, value in zip(TILE_FIELDS, values)}
+        )
+
+    async def refresh(self, region: Region) -> int:
+        """Fetch every node of a region. Returns the number of nodes updated."""
+        settings = get_settings()
+        nodes = self.nodes(region)
+        batch_size = settings.region_batch_size
+        batches = [nodes[i:i + batch_size] for i in range(0, len(nodes), batch_size)]
+        semaphore = asyncio.Semaphore(settings.prefetch_concurrency)
+
+        async def fetch_batch(batch: list[tuple[int, int]]) -> int:
+            async with semaphore:
+                try:
+                    results = await self._fetch([self.node_point(node) for node in batch])
+                except Exception as e:
+                    logger.warning(f"Region {region.name}: batch of {len(batch)} tiles failed: {e}")
+                    return 0
+
+            fetched_at = time.time()
+            for node, weather in zip(batch, results):
+                self._tiles[node] = TileSample(
+                    values=tuple(getattr(weather, name) for name in TILE_FIELDS),
+                    timestamp=weather.timestamp,
+                    fetched_at=fetched_at
+                )
+            return len(results)
+
+        updated = sum(await asyncio.gather(*(fetch_batch(batch) for batch in batches)))
+        logger.info(
+            f"Region {region.name}: refreshed {updated}/{len(nodes)} tiles "
+            f"in {len(batches)} call(s)"
+        )
+        return updated
+
+    async def refresh_all(self) -> int:
+        updated = 0
+        for region in self.regions:
+            updated += await self.refresh(region)
+        return updated
+
+    async def _run(self) -> None:
+        interval = get_settings().region_refresh_seconds
+        while True:
+            try:
+                await self.refresh_all()
+            except Exception as e:
+                logger.error(f"❌ Region refresh failed: {e}", exc_info=True)
+            await asyncio.sleep(interval)
+
+    def start(self) -> None:
+        if self.regions and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "regions": len(self.regions),
+            "tiles": len(self._tiles),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
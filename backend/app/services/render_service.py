@@ -0,0 +1,65 @@
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Hashable
+
+from pydantic_core import to_json
+
+from app.models.internal import WeatherRecord
+from app.models.schemas import Coordinates
+
+
+class FragmentCache:
+    """Bounded LRU of already-serialized JSON fragments."""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._data: OrderedDict[Hashable, bytes] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, build: Callable[[], bytes]) -> bytes:
+        fragment = self._data.get(key)
+        if fragment is not None:
+            self._data.move_to_end(key)
+            self.hits += 1
+            return fragment
+
+        self.misses += 1
+        fragment = self._data[key] = build()
+        if len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+        return fragment
+
+
+# Location blocks, per resolved place
+location_fragments = FragmentCache()
+
+
+def location_fragment(location: Coordinates) -> bytes:
+    key = (location.latitude, location.longitude, location.location_name, location.confidence)
+    return location_fragments.get(key, lambda: location.model_dump_json().encode())
+
+
+def render_weather_response(
+    query: str,
+    location: Coordinates,
+    weather: WeatherRecord,
+    suggestions_json: bytes,
+    timestamp: datetime
+) -> bytes:
+    """
+    WeatherResponse body stitched from cached fragments. Same JSON as
+    serializing the model; only the query, conditions and timestamp are
+    encoded per request.
+    """
+    return b"".join((
+        b'{"query":', to_json(query),
+        b',"location":', location_fragment(location),
+        b',"current_weather":', to_json(weather),
+        b',"suggestions":', suggestions_json,
+        b',"timestamp":', to_json(timestamp),
+        b'}'
+    ))
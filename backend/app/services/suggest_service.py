@@ -0,0 +1,268 @@
+import heapq
+import json
+import logging
+import re
+import threading
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from app.utils.relevance import normalize
+from app.utils.snapshot import SnapshotWriter, read_snapshot
+
+logger = logging.getLogger(__name__)
+
+# Separates the searchable suffix from the entry key inside index keys.
+# "\x00" never survives normalize(), so it cannot collide with a prefix.
+_SEP = "\x00"
+
+# Popularity added per event
+RESOLVED_WEIGHT = 1.0        # geocode() resolved the location
+SEARCH_RESULT_WEIGHT = 0.1   # location was offered by search_locations()
+HISTORY_WEIGHT = 1.0         # location appears in a LocationLog
+
+SNAPSHOT_VERSION = 1
+
+# Names geocoding_service.coordinate_label() gives bare coordinates
+_COORDINATE_LABEL = re.compile(r"^Location \(-?[\d.]+, -?[\d.]+\)$")
+
+
+@dataclass
+class SuggestEntry:
+    """A previously resolved location that can be suggested."""
+    short_name: str
+    location_name: str
+    latitude: float
+    longitude: float
+    popularity: float = 0.0
+
+
+def _index_keys(phrase: str) -> list[str]:
+    """One key per word start, so "york" finds "new york ny"."""
+    words = phrase.split()
+    return [" ".join(words[i:]) + _SEP + phrase for i in range(len(words))]
+
+
+def place_name(location_name: str) -> Optional[str]:
+    """
+    Short name of a logged display name: the place and its country
+    ("Paris, Île-de-France, France" → "Paris, France"). None for a
+    "Location (lat, lon)" label, which is not worth suggesting.
+    """
+    if _COORDINATE_LABEL.match(location_name.strip()):
+        return None
+    parts = [part.strip() for part in location_name.split(",") if part.strip()]
+    if len(parts) > 2:
+        parts = [parts[0], parts[-1]]
+    return ", ".join(parts) or None
+
+
+class PrefixIndex:
+    """
+    In-memory type-ahead index of locations we have already resolved.
+
+    Keys are kept in a sorted list, so a prefix lookup is a bisect plus a
+    short scan. Entries are ranked by global popularity. Results for hot
+    prefixes are memoized until an update touches a location they match.
+    Periodic snapshots are written in a worker thread, and load() may run
+    in one while requests keep recording.
+    """
+
+    def __init__(self, snapshot_every: int = 100, cache_size: int = 1024):
+        self._entries: dict[str, SuggestEntry] = {}
+        self._keys: list[str] = []
+        # prefix -> {limit: results}
+        self._cache: OrderedDict[str, dict[int, list[SuggestEntry]]] = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+        self._snapshots = SnapshotWriter("suggest index", self._snapshot, snapshot_every)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def record(
+        self,
+        short_name: str,
+        location_name: str,
+        latitude: float,
+        longitude: float,
+        weight: float = RESOLVED_WEIGHT
+    ) -> None:
+        """Add a location or bump its popularity."""
+        phrase, _ = normalize(short_name)
+        if not phrase:
+            return
+
+        with self._lock:
+            entry = self._entries.get(phrase)
+            if entry is None:
+                self._entries[phrase] = SuggestEntry(
+                    short_name=short_name,
+                    location_name=location_name,
+                    latitude=latitude,
+                    longitude=longitude,
+                    popularity=weight
+                )
+                for key in _index_keys(phrase):
+                    insort(self._keys, key)
+            else:
+                entry.popularity += weight
+
+            self._invalidate(phrase)
+
+        self._snapshots.changed()
+
+    def _invalidate(self, phrase: str) -> None:
+        """Forget memoized results for every prefix that matches `phrase`."""
+        if not self._cache:
+            return
+        for key in _index_keys(phrase):
+            suffix = key[:key.index(_SEP)]
+            for end in range(1, len(suffix) + 1):
+                self._cache.pop(suffix[:end], None)
+
+    def suggest(self, prefix: str, limit: int = 5) -> list[SuggestEntry]:
+        """Most popular entries with a word starting with `prefix`."""
+        phrase, _ = normalize(prefix)
+        if not phrase or limit <= 0:
+            return []
+
+        with self._lock:
+            return self._suggest(phrase, limit)
+
+    def _suggest(self, phrase: str, limit: int) -> list[SuggestEntry]:
+        by_limit = self._cache.get(phrase)
+        if by_limit is not None:
+            self._cache.move_to_end(phrase)
+            cached = by_limit.get(limit)
+            if cached is not None:
+                return cached
+
+        keys = self._keys
+        matches = set()
+        for i in range(bisect_left(keys, phrase), len(keys)):
+            key = keys[i]
+            if not key.startswith(phrase):
+                break
+            matches.add(key[key.index(_SEP) + 1:])
+
+        results = heapq.nlargest(
+            limit,
+            (self._entries[k] for k in matches),
+            key=lambda entry: entry.popularity
+        )
+
+        if by_limit is None:
+            by_limit = self._cache[phrase] = {}
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        by_limit[limit] = results
+
+        return results
+
+    def load_history(self, log_dir: Path) -> int:
+        """Seed popularity from LocationLog files (locations_*.jsonl); bad lines are skipped."""
+        count = 0
+        for file_path in sorted(Path(log_dir).glob("locations_*.jsonl")):
+            skipped = 0
+            try:
+                with open(file_path, "r") as f:
+                    for line in f:
+                        try:
+                            log = json.loads(line)
+                            short_name = place_name(log["location_name"])
+                            if short_name is None:
+                                continue
+                            self.record(
+                                short_name,
+                                log["location_name"],
+                                float(log["latitude"]),
+                                float(log["longitude"]),
+                                weight=HISTORY_WEIGHT
+                            )
+                            count += 1
+                        except (ValueError, KeyError, TypeError, AttributeError):
+                            skipped += 1
+            except OSError as e:
+                logger.error(f"❌ Failed to read location history {file_path}: {e}")
+            if skipped:
+                logger.warning(f"Skipped {skipped} bad line(s) in {file_path}")
+        return count
+
+    def _snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "version": SNAPSHOT_VERSION,
+                "entries": [
+                    [e.short_name, e.location_name, e.latitude, e.longitude, e.popularity]
+                    for e in self._entries.values()
+                ]
+            }
+
+    def save_snapshot(self, path: Path) -> None:
+        """Atomically write the index to disk."""
+        self._snapshots.save(path)
+
+    def _merge(self, entries: dict[str, SuggestEntry]) -> None:
+        """Add loaded entries to the index; popularity adds up for known locations."""
+        with self._lock:
+            new_keys = []
+            for phrase, entry in entries.items():
+                current = self._entries.get(phrase)
+                if current is None:
+                    self._entries[phrase] = entry
+                    new_keys.extend(_index_keys(phrase))
+                else:
+                    current.popularity += entry.popularity
+            self._keys = sorted(self._keys + new_keys)
+            self._cache.clear()
+
+    def load_snapshot(self, path: Path) -> bool:
+        """Add a snapshot to the index. Returns False if unusable."""
+        snapshot = read_snapshot(path, SNAPSHOT_VERSION)
+        if snapshot is None:
+            return False
+
+        entries = {}
+        for short_name, location_name, latitude, longitude, popularity in snapshot["entries"]:
+            phrase, _ = normalize(short_name)
+            if not phrase:
+                continue
+            entries[phrase] = SuggestEntry(short_name, location_name, latitude, longitude, popularity)
+
+        self._merge(entries)
+        return True
+
+    def load(self, snapshot_path: Path, history_dir: Path) -> None:
+        """
+        Startup: load the snapshot, or rebuild from location history when
+        there is none, on top of anything recorded before loading
+        finished. Later updates are snapshotted to the same path.
+        """
+        snapshot_path = Path(snapshot_path)
+
+        if self.load_snapshot(snapshot_path):
+            self._snapshots.path = snapshot_path
+            logger.info(f"✅ Loaded suggest index snapshot ({len(self)} locations)")
+            return
+
+        # Read on the side, then added in one step under the lock
+        history = PrefixIndex()
+        count = history.load_history(history_dir)
+        self._merge(history._entries)
+        self.save_snapshot(snapshot_path)
+        self._snapshots.path = snapshot_path
+        logger.info(
+            f"✅ Built suggest index from {count} location log(s) "
+            f"({len(self)} locations)"
+        )
+
+    def close(self) -> None:
+        """Flush pending updates to the snapshot."""
+        self._snapshots.close()
+
+
+# Singleton instance
+suggest_index = PrefixIndex()
@@ -0,0 +1,461 @@
+import asyncio
+import functools
+import inspect
+import logging
+import os
+import random
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+import httpx
+
+from app.config import get_settings
+from app.utils.asgi import request_header
+
+logger = logging.getLogger(__name__)
+
+# OTLP SpanKind values
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+KIND_CLIENT = 3
+
+# OTLP status codes
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+# Spans exported per OTLP request
+EXPORT_BATCH_SIZE = 512
+
+
+@dataclass(eq=False)
+class Span:
+    """One timed operation, in the shape OTLP expects (ids are lowercase hex)."""
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    kind: int = KIND_INTERNAL
+    start_ns: int = 0
+    end_ns: int = 0
+    attributes: dict[str, Any] = field(default_factory=dict)
+    status: int = STATUS_UNSET
+    status_message: str = ""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_error(self, error: BaseException) -> None:
+        self.status = STATUS_ERROR
+        self.status_message = f"{type(error).__name__}: {error}"
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+
+class _Unsampled:
+    """Context marker for a trace that was not sampled: children cost nothing."""
+    pass
+
+
+UNSAMPLED = _Unsampled()
+
+_current: ContextVar[Any] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    span = _current.get()
+    return span if isinstance(span, Span) else None
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[tuple[str, str, bool]]:
+    """W3C traceparent -> (trace id, parent span id, sampled), None if malformed."""
+    if not header:
+        return None
+    parts = header.strip().split("-")
+    if len(parts) < 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        flags = int(parts[3][:2], 16)
+        int(parts[1], 16)
+        int(parts[2], 16)
+    except ValueError:
+        return None
+    if parts[1] == "0" * 32 or parts[2] == "0" * 16:
+        return None
+    return parts[1], parts[2], bool(flags & 1)
+
+
+class RatioSampler:
+    """
+    Parent-based trace-id ratio sampling (as in OpenTelemetry): a root
+    span is kept when the low 64 bits of its trace id fall under
+    ratio * 2^64, so every service makes the same call for a trace, and
+    children follow their parent's decision.
+    """
+
+    def __init__(self, ratio: float):
+        self.ratio = min(max(ratio, 0.0), 1.0)
+        self._bound = int(self.ratio * (1 << 64))
+
+    def should_sample(self, trace_id: str) -> bool:
+        return int(trace_id[16:], 16) < self._bound
+
+
+class InMemoryExporter:
+    """Keeps finished spans in a list (tests, debugging)."""
+
+    batched = False
+
+    def __init__(self):
+        self.spans: list[Span] = []
+
+    def export(self, spans: list[Span]) -> None:
+        self.spans.extend(spans)
+
+    def clear(self) -> None:
+        self.spans.clear()
+
+    def by_name(self, name: str) -> list[Span]:
+        return [span for span in self.spans if span.name == name]
+
+    async def shutdown(self) -> None:
+        pass
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def otlp_payload(spans: list[Span], service_name: str) -> dict:
+    """OTLP/HTTP JSON body (ExportTraceServiceRequest) for a batch of spans."""
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]},
+            "scopeSpans": [{
+                "scope": {"name": "weather-agent"},
+                "spans": [
+                    {
+                        "traceId": span.trace_id,
+                        "spanId": span.span_id,
+                        "parentSpanId": span.parent_id or "",
+                        "name": span.name,
+                        "kind": span.kind,
+                        "startTimeUnixNano": str(span.start_ns),
+                        "endTimeUnixNano": str(span.end_ns),
+                        "attributes": [
+                            {"key": key, "value": _otlp_value(value)}
+                            for key, value in span.attributes.items()
+                        ],
+                        "status": {"code": span.status, "message": span.status_message}
+                    }
+                    for span in spans
+                ]
+            }]
+        }]
+    }
+
+
+class OTLPExporter:
+    """
+    Posts batches to an OTLP/HTTP collector (JSON encoding, e.g. the
+    OpenTelemetry Collector or Jaeger on :4318). Uses its own client so
+    exports never queue behind upstream calls or get traced themselves.
+    """
+
+    batched = True
+
+    def __init__(self, endpoint: str, service_name: str, timeout: float = 5.0):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.service_name = service_name
+        self._client = httpx.AsyncClient(timeout=timeout)
+
+    async def export(self, spans: list[Span]) -> None:
+        response = await self._client.post(self.url, json=otlp_payload(spans, self.service_name))
+        response.raise_for_status()
+
+    async def shutdown(self) -> None:
+        await self._client.aclose()
+
+
+def make_exporter():
+    settings = get_settings()
+    if settings.tracing_exporter == "otlp":
+        return OTLPExporter(settings.tracing_otlp_endpoint, settings.tracing_service_name)
+    if settings.tracing_exporter == "memory":
+        return InMemoryExporter()
+    return None
+
+
+class Tracer:
+    """
+    Creates spans, decides sampling and hands finished spans to the
+    exporter. Batched exporters (OTLP) get spans from a bounded queue
+    flushed in the background; when the queue is full, spans are dropped
+    and counted rather than slowing requests down.
+
+    With no exporter configured, start_span() only reads one attribute.
+    """
+
+    def __init__(self):
+        self.exporter = None
+        self.sampler = RatioSampler(0.0)
+        self.enabled = False
+        self.dropped = 0
+        self._queue: deque[Span] = deque()
+        self._max_queue = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def configure(self, exporter=None, ratio: Optional[float] = None) -> None:
+        settings = get_settings()
+        self.exporter = exporter if exporter is not None else make_exporter()
+        self.sampler = RatioSampler(settings.tracing_sample_ratio if ratio is None else ratio)
+        self.enabled = self.exporter is not None and self.sampler.ratio > 0
+        self._max_queue = settings.tracing_max_queue
+
+    @contextmanager
+    def start_span(
+        self,
+        name: str,
+        kind: int = KIND_INTERNAL,
+        attributes: Optional[dict] = None,
+        traceparent: Optional[str] = None
+    ):
+        """
+        Span around a block, child of the current one (or of an incoming
+        traceparent). Yields None when the trace is not recorded.
+        """
+        if not self.enabled:
+            yield None
+            return
+
+        parent = _current.get()
+        if parent is UNSAMPLED:
+            yield None
+            return
+
+        if isinstance(parent, Span):
+            trace_id, parent_id = parent.trace_id, parent.span_id
+        else:
+            remote = parse_traceparent(traceparent)
+            if remote is not None:
+                trace_id, parent_id, sampled = remote
+            else:
+                trace_id, parent_id = f"{random.getrandbits(128):032x}", None
+                sampled = self.sampler.should_sample(trace_id)
+            if not sampled:
+                token = _current.set(UNSAMPLED)
+                try:
+                    yield None
+                finally:
+                    _current.reset(token)
+                return
+
+        span = Span(
+            name=name,
+            trace_id=trace_id,
+            span_id=f"{random.getrandbits(64):016x}",
+            parent_id=parent_id,
+            kind=kind,
+            start_ns=time.time_ns(),
+            attributes=dict(attributes) if attributes else {}
+        )
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            _current.reset(token)
+            span.end_ns = time.time_ns()
+            self._finish(span)
+
+    def _finish(self, span: Span) -> None:
+        if not self.exporter.batched:
+            self.exporter.export([span])
+        elif len(self._queue) < self._max_queue:
+            self._queue.append(span)
+        else:
+            self.dropped += 1
+
+    async def flush(self) -> int:
+        """Export queued spans; returns how many were sent."""
+        sent = 0
+        while self._queue and self.exporter is not None and self.exporter.batched:
+            batch = [self._queue.popleft() for _ in range(min(EXPORT_BATCH_SIZE, len(self._queue)))]
+            try:
+                await self.exporter.export(batch)
+                sent += len(batch)
+            except Exception as e:
+                self.dropped += len(batch)
+                logger.warning(f"Trace export failed, dropped {len(batch)} span(s): {e}")
+                break
+        return sent
+
+    async def _export_loop(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            await self.flush()
+
+    def start(self) -> None:
+        """Configure from settings and start the background exporter (app lifespan)."""
+        self.configure()
+        if self.enabled:
+            settings = get_settings()
+            logger.info(
+                f"✅ Tracing to {settings.tracing_exporter} "
+                f"(sampling {self.sampler.ratio:.0%}, pid {os.getpid()})"
+            )
+            if self.exporter.batched and (self._task is None or self._task.done()):
+                self._task = asyncio.create_task(self._export_loop(settings.tracing_export_interval_seconds))
+
+    async def shutdown(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.exporter is not None:
+            await self.flush()
+            await self.exporter.shutdown()
+        self.exporter = None
+        self.enabled = False
+
+
+def traced(name: str, kind: int = KIND_INTERNAL):
+    """Decorator: run the function (sync or async) inside a span."""
+    def decorate(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not tracer.enabled:
+                    return await func(*args, **kwargs)
+                with tracer.start_span(name, kind):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with tracer.start_span(name, kind):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def set_attributes(attributes: dict) -> None:
+    """Add attributes to the current span, if the trace is recorded."""
+    span = current_span()
+    if span is not None:
+        span.attributes.update(attributes)
+
+
+class TracingTransport(httpx.AsyncBaseTransport):
+    """
+    httpx transport wrapper: a client span per upstream request (until
+    the response headers arrive) and a W3C traceparent header, so the
+    upstream call joins the caller's trace.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if not tracer.enabled:
+            return await self._transport.handle_async_request(request)
+        with tracer.start_span(
+            f"{request.method} {request.url.host}",
+            KIND_CLIENT,
+            {"http.request.method": request.method, "server.address": request.url.host, "url.path": request.url.path}
+        ) as span:
+            if span is not None:
+                request.headers["traceparent"] = span.traceparent
+            response = await self._transport.handle_async_request(request)
+            if span is not None:
+                span.set_attribute("http.response.status_code", response.status_code)
+                if response.status_code >= 400:
+                    span.status = STATUS_ERROR
+            return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware: a server span per HTTP request named after the
+    route handler, continuing an incoming traceparent. The trace id is
+    returned in a traceresponse header for correlation with logs.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        with tracer.start_span(
+            f"{scope['method']} {scope['path']}",
+            KIND_SERVER,
+            {"http.request.method": scope["method"], "url.path": scope["path"]},
+            traceparent=request_header(scope, b"traceparent")
+        ) as span:
+            if span is None:
+                await self.app(scope, receive, send)
+                return
+
+            async def send_with_trace(message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.response.status_code", message["status"])
+                    if message["status"] >= 500:
+                        span.status = STATUS_ERROR
+                    message = {
+                        **message,
+                        "headers": [*message.get("headers", []), (b"traceresponse", span.traceparent.encode())]
+                    }
+                await send(message)
+
+            await self.app(scope, receive, send_with_trace)
+
+            endpoint = scope.get("endpoint")
+            if endpoint is not None:
+                span.name = f"{scope['method']} {endpoint.__name__}"
+                span.set_attribute("code.function", endpoint.__name__)
+
+
+class TraceContextFilter(logging.Filter):
+    """
+    Adds trace_id / span_id to log records, and `trace` as a ready-made
+    " [trace_id=... span_id=...]" suffix (empty outside a recorded span).
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        span = current_span()
+        record.trace_id = span.trace_id if span else ""
+        record.span_id = span.span_id if span else ""
+        record.trace = f" [trace_id={span.trace_id} span_id={span.span_id}]" if span else ""
+        return True
+
+
+tracer = Tracer()
@@ -0,0 +1,177 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+from app.config import get_settings
+from app.services.cache_service import geocode_cache, weather_cache
+from app.services.fashion_service import fashion_service
+from app.services.feedback_service import feedback_aggregator
+from app.services.http_client import get_client
+from app.services.logging_service import DATA_DIR
+from app.services.prefetch_service import demand_forecast, prefetch_target_hour
+from app.services.suggest_service import suggest_index
+from app.services.weather_service import fetch_current_weather
+
+logger = logging.getLogger(__name__)
+
+
+def cache_snapshot_path(namespace: str) -> Path:
+    return Path(get_settings().cache_snapshot_dir) / f"{namespace}.json"
+
+
+class Readiness:
+    """
+    Liveness vs readiness. The process is live as soon as it serves
+    requests; it is ready once warm-up has finished (or given up), so a
+    load balancer only sends traffic to warm instances.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.steps: dict[str, dict] = {}
+
+    def report(self) -> dict:
+        duration = None
+        if self.started_at is not None:
+            duration = round((self.finished_at or time.monotonic()) - self.started_at, 3)
+        return {"ready": self.ready, "seconds": duration, "steps": self.steps}
+
+
+class Warmup:
+    """
+    Startup steps run before the instance reports ready:
+
+    1. create the shared upstream connection pool
+    2. restore weather / geocode cache snapshots saved at the last shutdown
+    3. load the autocomplete index and the location history behind demand
+    4. fetch current weather for the default location and the busiest
+       cells for the hour the prefetch scheduler targets (cells restored
+       from the snapshot are skipped)
+
+    A failing step is logged and skipped; the instance still becomes
+    ready, just colder. The whole phase is capped by warmup_timeout_seconds.
+    """
+
+    def __init__(
+        self,
+        readiness: Readiness,
+        fetch: Callable[..., Awaitable[object]] = fetch_current_weather
+    ):
+        self.readiness = readiness
+        self._fetch = fetch
+        self._task: Optional[asyncio.Task] = None
+
+    async def _step(self, name: str, action: Callable[[], Awaitable[object]]) -> None:
+        started = time.monotonic()
+        try:
+            result = await action()
+            self.readiness.steps[name] = {"ok": True, "result": result}
+        except Exception as e:
+            logger.error(f"❌ Warm-up step '{name}' failed: {e}")
+            self.readiness.steps[name] = {"ok": False, "error": str(e)}
+        self.readiness.steps[name]["seconds"] = round(time.monotonic() - started, 3)
+
+    async def _open_pools(self) -> str:
+        get_client()
+        return "open"
+
+    # Files are read in worker threads: the process is already serving
+    async def _load_caches(self) -> dict:
+        return {
+            "weather": await weather_cache.load_snapshot_async(cache_snapshot_path("weather")),
+            "geocode": await geocode_cache.load_snapshot_async(cache_snapshot_path("geocode"))
+        }
+
+    async def _load_indexes(self) -> dict:
+        settings = get_settings()
+        await asyncio.to_thread(suggest_index.load, settings.suggest_index_path, DATA_DIR)
+        await asyncio.to_thread(
+            feedback_aggregator.load, settings.fashion_feedback_path, DATA_DIR, fashion_service.weather_bucket
+        )
+        history = 0
+        if settings.prefetch_enabled:
+            history = await asyncio.to_thread(demand_forecast.load_history, DATA_DIR)
+        return {"suggest": len(suggest_index), "feedback": feedback_aggregator.events, "history": history}
+
+    async def _prefetch(self) -> dict:
+        settings = get_settings()
+        points = [(settings.default_location_lat, settings.default_location_lon)]
+        points += [
+            (cell.latitude, cell.longitude)
+            for cell in demand_forecast.top_cells(
+                prefetch_target_hour(datetime.now()), settings.warmup_prefetch_cells
+            )
+        ]
+        semaphore = asyncio.Semaphore(settings.prefetch_concurrency)
+
+        async def warm(latitude: float, longitude: float) -> bool:
+            async with semaphore:
+                try:
+                    # Cache-first: cells restored from the snapshot cost nothing
+                    await self._fetch(latitude, longitude)
+                    return True
+                except Exception as e:
+                    logger.warning(f"Warm-up fetch failed for ({latitude}, {longitude}): {e}")
+                    return False
+
+        results = await asyncio.gather(*(warm(lat, lon) for lat, lon in points))
+        return {"cells": len(points), "warmed": sum(results)}
+
+    async def run(self) -> dict:
+        settings = get_settings()
+        self.readiness.started_at = time.monotonic()
+
+        async def steps() -> None:
+            await self._step("connection_pool", self._open_pools)
+            await self._step("cache_snapshots", self._load_caches)
+            await self._step("indexes", self._load_indexes)
+            await self._step("prefetch", self._prefetch)
+
+        try:
+            await asyncio.wait_for(steps(), timeout=settings.warmup_timeout_seconds)
+        except asyncio.TimeoutError:
+            logger.warning(f"Warm-up did not finish in {settings.warmup_timeout_seconds}s; serving anyway")
+
+        self.readiness.finished_at = time.monotonic()
+        self.readiness.ready = True
+        logger.info(f"✅ Warm-up finished in {self.readiness.report()['seconds']}s: ready")
+        return self.readiness.report()
+
+    def start(self) -> None:
+        """Warm up in the background; the process is live meanwhile."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def wait(self) -> None:
+        """Return once the current warm-up has finished or been cancelled."""
+        if self._task is not None:
+            await asyncio.wait([self._task])
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+
+def save_cache_snapshots() -> None:
+    """Shutdown: persist in-memory caches for the next warm-up."""
+    for namespace, cache in (("weather", weather_cache), ("geocode", geocode_cache)):
+        try:
+            count = cache.save_snapshot(cache_snapshot_path(namespace))
+            if count:
+                logger.info(f"✅ Saved {count} {namespace} cache entries")
+        except OSError as e:
+            logger.error(f"❌ Failed to save {namespace} cache snapshot: {e}")
+
+
+readiness = Readiness()
+warmup = Warmup(readiness)
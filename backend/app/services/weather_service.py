@@ -1,8 +1,35 @@
 import httpx
-from datetime import datetime
-from typing import Optional
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Optional, Union
+from app.models.internal import WeatherRecord
 from app.models.schemas import CurrentWeather, WeatherSuggestion, WeatherResponse, Coordinates
 from app.config import get_settings
+from app.services.admission_service import OPEN_METEO, admission
+from app.services.cache_service import weather_cache
+from app.services.forecast_service import (
+    CellForecast, DAILY_VARIABLES, ForecastStore, HOURLY_VARIABLES
+)
+from app.services.http_client import get_client
+from app.services.region_service import RegionGrid
+from app.services.render_service import render_weather_response
+from app.services.tracing_service import set_attributes, traced
+from app.utils.geo import cell_key
+from app.utils.json_stream import JsonStream, JsonStreamError
+
+logger = logging.getLogger(__name__)
+
+# Rules read attributes only, so they accept the record or the API model
+AnyWeather = Union[WeatherRecord, CurrentWeather]
+
+# Weather parameters requested from Open-Meteo's `current` block
+CURRENT_VARIABLES = (
+    "temperature_2m",
+    "precipitation",
+    "relative_humidity_2m",
+    "uv_index"
+)
 
 
 class WeatherAPIError(Exception):
@@ -10,49 +37,132 @@ class WeatherAPIError(Exception):
     pass
 
 
-async def fetch_current_weather(latitude: float, longitude: float) -> CurrentWeather:
+def weather_cache_key(latitude: float, longitude: float) -> str:
+    """Cache key of the weather cell holding a point."""
+    row, col = cell_key(latitude, longitude, get_settings().weather_cell_deg)
+    return f"current:{row}:{col}"
+
+
+@traced("weather.fetch")
+async def fetch_current_weather(
+    latitude: float,
+    longitude: float,
+    refresh: bool = False
+) -> WeatherRecord:
+    """
+    Current conditions for a point, served from the weather cell cache
+    when possible. refresh=True skips the cache lookup (used by prefetch).
+
+    Points inside a configured region are answered from its tile grid.
+    In "derived" mode a cache miss is answered from the cell's hourly
+    forecast, so one forecast call covers many hours of current lookups.
+    """
+    settings = get_settings()
+    cache_key = weather_cache_key(latitude, longitude)
+    set_attributes({"weather.cell": cache_key, "weather.refresh": refresh})
+    
+    async def load() -> WeatherRecord:
+        weather = None
+        if settings.weather_current_mode == "derived":
+            weather = await derive_current_weather(latitude, longitude)
+        if weather is None:
+            weather = await _fetch_live_weather(latitude, longitude)
+        return weather
+    
+    if refresh:
+        weather = await load()
+        await weather_cache.set(cache_key, weather)
+        return weather
+    
+    # Regional grid tiles are refreshed in the background
+    if settings.region_grid_enabled:
+        weather = region_grid.lookup(latitude, longitude)
+        if weather is not None:
+            return weather
+    
+    # With a shared L2 tier, only one node fetches a missing cell
+    return await weather_cache.get_or_set(cache_key, load)
+
+
+async def _fetch_live_weather(latitude: float, longitude: float) -> WeatherRecord:
+    """Current conditions straight from Open-Meteo's `current` block."""
+    data = await _request_current(str(latitude), str(longitude))
+    return _parse_current(data)
+
+
+async def fetch_current_weather_batch(points: list[tuple[float, float]]) -> list[WeatherRecord]:
+    """
+    Current conditions for many points in one Open-Meteo call (the API
+    accepts comma-separated coordinate lists). Results keep input order.
+    """
+    if not points:
+        return []
+    
+    data = await _request_current(
+        ",".join(str(lat) for lat, _ in points),
+        ",".join(str(lon) for _, lon in points)
+    )
+    # A single location comes back as an object, several as a list
+    items = data if isinstance(data, list) else [data]
+    if len(items) != len(points):
+        raise WeatherAPIError(
+            f"Invalid response from weather API: expected {len(points)} locations, got {len(items)}"
+        )
+    return [_parse_current(item) for item in items]
+
 
+async def _request_current(latitude: str, longitude: str):
+    """One location -> dict, several -> list of dicts (only the fields we read)."""
     settings = get_settings()
     
-    # Define which weather parameters we want from the API
-    current_params = [
-        "temperature_2m",          
-        "precipitation",           
-        "relative_humidity_2m",   
-        "uv_index"                 
-    ]
-    
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(
-                f"{settings.open_meteo_base_url}/forecast",
-                params={
-                    "latitude": latitude,
-                    "longitude": longitude,
-                    "current": ",".join(current_params), 
-                    "temperature_unit": "celsius",        # Use metric
-                    "wind_speed_unit": "kmh",
-                    "precipitation_unit": "mm"
-                },
-                timeout=15.0  
-            )
+    try:
+        async with admission.upstream(OPEN_METEO), get_client().stream(
+            "GET",
+            f"{settings.open_meteo_base_url}/forecast",
+            params={
+                "latitude": latitude,
+                "longitude": longitude,
+                "current": ",".join(CURRENT_VARIABLES), 
+                "temperature_unit": "celsius",        # Use metric
+                "wind_speed_unit": "kmh",
+                "precipitation_unit": "mm"
+            },
+            timeout=15.0  
+        ) as response:
             response.raise_for_status()
-            
-        except httpx.TimeoutException:
-            raise WeatherAPIError(f"Weather API timed out for coordinates ({latitude}, {longitude})")
-        except httpx.HTTPError as e:
-            raise WeatherAPIError(f"Weather API error: {str(e)}")
+            return await read_current_payload(response.aiter_bytes())
+        
+    except httpx.TimeoutException:
+        raise WeatherAPIError(f"Weather API timed out for coordinates ({latitude}, {longitude})")
+    except httpx.HTTPError as e:
+        raise WeatherAPIError(f"Weather API error: {str(e)}")
+    except JsonStreamError as e:
+        raise WeatherAPIError(f"Invalid response from weather API: {e}")
+
+
+async def read_current_payload(chunks):
+    """Decode an Open-Meteo `current` response, single or multi-location."""
+    stream = JsonStream(chunks)
+    current_fields = ("time", "wind_speed_10m") + CURRENT_VARIABLES
     
-    # Parse API response
-    data = response.json()
+    async def location() -> dict:
+        return await stream.pick(("latitude", "longitude"), {"current": current_fields})
     
+    if await stream.peek() == "[":
+        data = [await location() async for _ in stream.items(decode=False)]
+    else:
+        data = await location()
+    await stream.end()
+    return data
+
+
+def _parse_current(data: dict) -> WeatherRecord:
     if "current" not in data:
         raise WeatherAPIError("Invalid response from weather API: missing 'current' data")
     
     current = data["current"]
     
-
-    return CurrentWeather(
+    return WeatherRecord(
         timestamp=datetime.fromisoformat(current["time"]),
         temperature=float(current.get("temperature_2m", 0.0)),
         precipitation=float(current.get("precipitation", 0.0)),
@@ -62,7 +172,172 @@ async def fetch_current_weather(latitude: float, longitude: float) -> CurrentWea
     )
 
 
-def generate_suggestions(weather: CurrentWeather) -> list[WeatherSuggestion]:
+@traced("weather.forecast")
+async def fetch_forecast(latitude: float, longitude: float) -> CellForecast:
+    """Fetch hourly + daily forecast for a point from Open-Meteo."""
+    settings = get_settings()
+
+    try:
+        async with admission.upstream(OPEN_METEO), get_client().stream(
+            "GET",
+            f"{settings.open_meteo_base_url}/forecast",
+            params={
+                "latitude": latitude,
+                "longitude": longitude,
+                "hourly": ",".join(HOURLY_VARIABLES),
+                "daily": ",".join(DAILY_VARIABLES),
+                "forecast_days": settings.forecast_days,
+                "timezone": "auto",
+                "timeformat": "unixtime",
+                "temperature_unit": "celsius",
+                "wind_speed_unit": "kmh",
+                "precipitation_unit": "mm"
+            },
+            timeout=15.0
+        ) as response:
+            response.raise_for_status()
+            data = await read_forecast_payload(response.aiter_bytes())
+
+    except httpx.TimeoutException:
+        raise WeatherAPIError(f"Forecast API timed out for coordinates ({latitude}, {longitude})")
+    except httpx.HTTPError as e:
+        raise WeatherAPIError(f"Forecast API error: {str(e)}")
+    except JsonStreamError as e:
+        raise WeatherAPIError(f"Invalid response from weather API: {e}")
+
+    if not data.get("hourly", {}).get("time"):
+        raise WeatherAPIError("Invalid response from weather API: missing 'hourly' data")
+
+    return CellForecast.from_open_meteo(data)
+
+
+async def read_forecast_payload(chunks) -> dict:
+    """
+    Decode an Open-Meteo forecast body (timeformat=unixtime). Hourly and
+    daily series go straight into array buffers: float64 for timestamps,
+    float32 for values.
+    """
+    stream = JsonStream(chunks)
+    data = {}
+    async for key in stream.keys():
+        if key in ("hourly", "daily"):
+            columns = data[key] = {}
+            async for name in stream.keys():
+                if await stream.peek() == "[":
+                    columns[name] = await stream.numbers("d" if name == "time" else "f")
+                else:
+                    await stream.skip()
+        elif key in ("latitude", "longitude", "utc_offset_seconds"):
+            data[key] = await stream.value()
+        else:
+            await stream.skip()
+    await stream.end()
+    return data
+
+
+def weather_from_forecast(forecast: CellForecast, timestamp: float) -> Optional[WeatherRecord]:
+    """Current conditions interpolated from the hourly columns, if covered."""
+    values = forecast.interpolate(timestamp)
+    if values is None:
+        return None
+
+    def value(variable: str) -> float:
+        v = values[variable]
+        return 0.0 if v != v else round(v, 2)  # NaN on both sides
+
+    return WeatherRecord(
+        # Naive UTC, matching what the live endpoint returns
+        timestamp=datetime.fromtimestamp(timestamp, tz=timezone.utc).replace(tzinfo=None, microsecond=0),
+        temperature=value("temperature_2m"),
+        precipitation=value("precipitation"),
+        wind_speed=value("wind_speed_10m"),
+        humidity=value("relative_humidity_2m"),
+        uv_index=value("uv_index"),
+        derived=True
+    )
+
+
+async def derive_current_weather(
+    latitude: float,
+    longitude: float,
+    now: Optional[float] = None
+) -> Optional[WeatherRecord]:
+    """
+    Current conditions from the cell's hourly forecast. The forecast is
+    refetched only once it is older than weather_derived_forecast_max_age_seconds.
+    Returns None when no usable forecast is available.
+    """
+    max_age = get_settings().weather_derived_forecast_max_age_seconds
+    try:
+        forecast = await forecast_store.get(latitude, longitude, max_age=max_age)
+    except WeatherAPIError as e:
+        logger.warning(f"Derived weather unavailable for ({latitude}, {longitude}): {e}")
+        return None
+
+    return weather_from_forecast(forecast, time.time() if now is None else now)
+
+
+def suggestion_signature(weather: AnyWeather) -> int:
+    """
+    Pack the threshold bucket of every rule input into one int. Weather
+    with the same signature triggers exactly the same suggestions.
+    """
+    t = weather.temperature
+    if t < 0:
+        temperature_band = 0
+    elif t < 10:
+        temperature_band = 1
+    elif t > 35:
+        temperature_band = 2
+    elif t > 30:
+        temperature_band = 3
+    elif 15 <= t <= 25:
+        temperature_band = 4
+    else:
+        temperature_band = 5
+    
+    wind_tier = 2 if weather.wind_speed > 50 else 1 if weather.wind_speed > 30 else 0
+    
+    p = weather.precipitation
+    precip_tier = 3 if p > 10 else 2 if p > 2 else 1 if p > 0 else 0
+    
+    muggy = weather.humidity > 80 and t > 25
+    high_uv = weather.uv_index >= 8
+    
+    return (((temperature_band * 3 + wind_tier) * 4 + precip_tier) * 2 + muggy) * 2 + high_uv
+
+
+# Suggestions per signature (at most 6 * 3 * 4 * 2 * 2 entries)
+_suggestion_memo: dict[int, tuple[WeatherSuggestion, ...]] = {}
+
+
+# Serialized suggestion lists per signature
+_suggestion_json_memo: dict[int, bytes] = {}
+
+
+@traced("suggestions.generate")
+def generate_suggestions(weather: AnyWeather) -> list[WeatherSuggestion]:
+    """Rule-based suggestions, built once per signature and then reused."""
+    signature = suggestion_signature(weather)
+    suggestions = _suggestion_memo.get(signature)
+    if suggestions is None:
+        suggestions = _suggestion_memo[signature] = tuple(_evaluate_suggestions(weather))
+    return list(suggestions)
+
+
+@traced("suggestions.serialize")
+def suggestions_json(weather: AnyWeather) -> bytes:
+    """generate_suggestions(weather) as a JSON array, serialized once per signature."""
+    signature = suggestion_signature(weather)
+    fragment = _suggestion_json_memo.get(signature)
+    if fragment is None:
+        suggestions = generate_suggestions(weather)
+        fragment = b"[" + b",".join(s.model_dump_json().encode() for s in suggestions) + b"]"
+        _suggestion_json_memo[signature] = fragment
+    return fragment
+
+
+def _evaluate_suggestions(weather: AnyWeather) -> list[WeatherSuggestion]:
    
     suggestions = []
     
@@ -182,12 +457,39 @@ async def get_weather_with_suggestions(
     
     suggestions = generate_suggestions(weather)
     
-    return WeatherResponse(
+    # Every part is already a validated model
+    return WeatherResponse.model_construct(
         query=location.location_name,  
         location=location,              
-        current_weather=weather,        
+        current_weather=weather.to_model(),        
         suggestions=suggestions,
         timestamp=datetime.now()        
     )
 
 
+async def get_weather_response_body(
+    latitude: float,
+    longitude: float,
+    location: Coordinates
+) -> tuple[bytes, WeatherRecord]:
+    """
+    Serialized WeatherResponse for the point, assembled from cached JSON
+    fragments. Returns the body and the conditions it was built from.
+    """
+    weather = await fetch_current_weather(latitude, longitude)
+    
+    body = render_weather_response(
+        query=location.location_name,
+        location=location,
+        weather=weather,
+        suggestions_json=suggestions_json(weather),
+        timestamp=datetime.now()
+    )
+    return body, weather
+
+
+# Singleton instances
+forecast_store = ForecastStore(fetch_forecast)
+
+# Regions are parsed from settings when the grid starts (app lifespan)
+region_grid = RegionGrid(fetch_current_weather_batch)
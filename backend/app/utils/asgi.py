@@ -0,0 +1,10 @@
+"""Helpers for raw ASGI middlewares."""
+from typing import Optional
+
+
+def request_header(scope, name: bytes) -> Optional[str]:
+    """First value of a request header; `name` is lowercase bytes."""
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
@@ -0,0 +1,176 @@
+"""
+Coordinate literals typed or sent in place of a place name.
+
+parse_coordinates() recognizes the usual ways of writing a point and
+returns (latitude, longitude) in decimal degrees, or None when the text
+is not a coordinate literal (so it should go to the geocoder):
+
+    40.7128, -74.0060            decimal pair
+    40.7128 N 74.0060 W          hemisphere letters (either side, any order)
+    40°42'46"N 74°0'22"W         degrees / minutes / seconds
+    geo:40.7128,-74.0060;u=35    RFC 5870 geo URI
+    87G7PX7V+4H                  full Open Location Code (plus code)
+
+Short plus codes ("PX7V+4H New York") need a reference locality and
+are left to the geocoder.
+"""
+import re
+from functools import lru_cache
+from typing import Optional
+
+# Degrees, optionally followed by minutes and seconds. The hemisphere
+# letter goes in front ({pre}) or behind ({post}); the two styles are
+# separate patterns so "N40 W74" and "40N 74W" each split unambiguously.
+# Numbers never start or end inside a longer run of digits.
+_COMPONENT = r"""
+    {pre}\s*
+    (?<![\d.])(?P<{p}deg>[-+]?\d{{1,3}}(?:\.\d+)?)(?![\d.])\s*(?P<{p}mark>[°º˚]|deg\b|d\b)?\s*
+    (?:
+        (?<![\d.])(?P<{p}min>\d{{1,2}}(?:\.\d+)?)\s*['′’]\s*
+        (?:(?<![\d.])(?P<{p}sec>\d{{1,2}}(?:\.\d+)?)\s*(?:["″”]|'')\s*)?
+    )?
+    {post}
+"""
+
+
+def _pair_pattern(prefix: bool) -> re.Pattern:
+    def component(p: str) -> str:
+        hemisphere = f"(?P<{p}hemi>[NSEW](?![A-Z]))?"
+        return _COMPONENT.format(
+            p=p,
+            pre=hemisphere if prefix else "",
+            post="" if prefix else hemisphere
+        )
+
+    # The two sides are separated by "," / ";" or at least some whitespace,
+    # so "42N" or "10001 N" can never be read as two numbers
+    return re.compile(
+        r"^\s*\(?\s*" + component("a")
+        + r"(?:\s*(?P<sep>[,;])\s*|\s+)" + component("b")
+        + r"\s*\)?\s*$",
+        re.IGNORECASE | re.VERBOSE
+    )
+
+
+@lru_cache(maxsize=None)
+def _pair_patterns() -> tuple[re.Pattern, ...]:
+    # Compiled on first use: the verbose patterns are the slowest part of
+    # importing this module
+    return _pair_pattern(prefix=False), _pair_pattern(prefix=True)
+
+_GEO_URI = re.compile(
+    r"^\s*geo:(?P<lat>[-+]?\d+(?:\.\d+)?),(?P<lon>[-+]?\d+(?:\.\d+)?)(?:,[-+]?\d+(?:\.\d+)?)?(?:;[^?\s]*)?\s*$",
+    re.IGNORECASE
+)
+
+# Open Location Code
+_OLC_ALPHABET = "23456789CFGHJMPQRVWX"
+_OLC_FULL = re.compile(
+    r"^\s*(?P<code>[23456789CFGHJMPQRVWX]{2}(?:[23456789CFGHJMPQRVWX]{6}|[23456789CFGHJMPQRVWX]{4}00|[23456789CFGHJMPQRVWX]{2}0000|000000)"
+    r"\+(?:[23456789CFGHJMPQRVWX]{2,})?)\s*$",
+    re.IGNORECASE
+)
+_OLC_PAIR_RESOLUTIONS = (20.0, 1.0, 0.05, 0.0025, 0.000125)
+_OLC_GRID_ROWS = 5
+_OLC_GRID_COLUMNS = 4
+
+
+def _component(match: re.Match, p: str) -> Optional[tuple[float, Optional[str], bool]]:
+    """(signed degrees, hemisphere letter, explicit DMS notation) for one side."""
+    hemisphere = (match[p + "hemi"] or "").upper() or None
+
+    degrees = match[p + "deg"]
+    minutes, seconds = match[p + "min"], match[p + "sec"]
+    value = abs(float(degrees))
+    if minutes is not None:
+        if "." in degrees or float(minutes) >= 60 or (seconds is not None and float(seconds) >= 60):
+            return None
+        value += float(minutes) / 60 + float(seconds or 0) / 3600
+
+    negative = degrees.startswith("-") or hemisphere in ("S", "W")
+    if hemisphere and degrees[0] in "+-":
+        # "-40 N" is contradictory
+        return None
+    explicit = bool(match[p + "mark"] or minutes is not None)
+    return (-value if negative else value), hemisphere, explicit
+
+
+def _parse_pair(text: str) -> Optional[tuple[float, float]]:
+    for pattern in _pair_patterns():
+        match = pattern.match(text)
+        if match is not None:
+            break
+    else:
+        return None
+
+    first, second = _component(match, "a"), _component(match, "b")
+    if first is None or second is None:
+        return None
+    (a, a_hemisphere, a_explicit), (b, b_hemisphere, b_explicit) = first, second
+
+    if not (a_hemisphere or b_hemisphere or a_explicit or b_explicit or match["sep"]):
+        # Two bare numbers separated by a space only count when both are
+        # decimals ("40.7 -74.0"), so "10 20" still goes to the geocoder
+        if "." not in match["adeg"] or "." not in match["bdeg"]:
+            return None
+
+    if a_hemisphere in ("E", "W") or b_hemisphere in ("N", "S"):
+        if a_hemisphere in ("N", "S") or b_hemisphere in ("E", "W"):
+            return None
+        a, b = b, a
+    return a, b
+
+
+def _parse_geo_uri(text: str) -> Optional[tuple[float, float]]:
+    match = _GEO_URI.match(text)
+    if match is None:
+        return None
+    return float(match["lat"]), float(match["lon"])
+
+
+def decode_plus_code(code: str) -> Optional[tuple[float, float]]:
+    """Centre of a full Open Location Code, or None if it is not one."""
+    match = _OLC_FULL.match(code)
+    if match is None:
+        return None
+    digits = match["code"].upper().replace("+", "").rstrip("0")
+    if len(digits) % 2 and len(digits) < 10:
+        return None
+
+    values = [_OLC_ALPHABET.index(c) for c in digits]
+    if values[0] >= 9 or values[1] >= 18:
+        return None
+
+    south, west = -90.0, -180.0
+    lat_size = lng_size = 0.0
+    for i in range(0, min(len(values), 10), 2):
+        lat_size = lng_size = _OLC_PAIR_RESOLUTIONS[i // 2]
+        south += values[i] * lat_size
+        west += values[i + 1] * lng_size
+    for value in values[10:]:
+        lat_size /= _OLC_GRID_ROWS
+        lng_size /= _OLC_GRID_COLUMNS
+        south += (value // _OLC_GRID_COLUMNS) * lat_size
+        west += (value % _OLC_GRID_COLUMNS) * lng_size
+
+    latitude = min(90.0, south + lat_size / 2)
+    longitude = west + lng_size / 2
+    return round(latitude, 7), round(longitude, 7)
+
+
+def parse_coordinates(text: Optional[str]) -> Optional[tuple[float, float]]:
+    """
+    (latitude, longitude) if `text` is a coordinate literal in range,
+    otherwise None.
+    """
+    if not text or len(text) > 100:
+        return None
+
+    point = _parse_geo_uri(text) or decode_plus_code(text) or _parse_pair(text)
+    if point is None:
+        return None
+
+    latitude, longitude = point
+    if not (-90.0 <= latitude <= 90.0 and -180.0 <= longitude <= 180.0):
+        return None
+    return latitude, longitude
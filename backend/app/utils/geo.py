@@ -0,0 +1,103 @@
+"""Geographic helpers: great-circle distance and a lat/lon bucket grid."""
+import math
+from typing import Any, Iterator
+
+# Mean Earth radius (IUGG)
+EARTH_RADIUS_KM = 6371.0088
+
+# Length of one degree of latitude on the mean sphere
+KM_PER_DEGREE_LAT = math.pi * EARTH_RADIUS_KM / 180.0
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in kilometres."""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+
+    a = (
+        math.sin(d_phi / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class SpatialGrid:
+    """
+    Buckets points into square lat/lon cells so that everything within
+    `radius_km` of a point can be found by checking only nearby cells.
+
+    Cells are `cell_km` tall. Their width in degrees is the same as their
+    height, so near the poles a query spans more columns; the column span
+    is derived from the haversine formula so no neighbour is ever missed.
+    Callers still filter candidates by exact distance.
+    """
+
+    def __init__(self, cell_km: float):
+        self.cell_km = cell_km
+        self.cell_deg = cell_km / KM_PER_DEGREE_LAT
+        self._columns = math.ceil(360.0 / self.cell_deg)
+        self._cells: dict[tuple[int, int], list[tuple[float, float, Any]]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(points) for points in self._cells.values())
+
+    def _cell(self, latitude: float, longitude: float) -> tuple[int, int]:
+        row = math.floor((latitude + 90.0) / self.cell_deg)
+        col = math.floor((longitude + 180.0) / self.cell_deg) % self._columns
+        return row, col
+
+    def add(self, latitude: float, longitude: float, item: Any) -> None:
+        key = self._cell(latitude, longitude)
+        self._cells.setdefault(key, []).append((latitude, longitude, item))
+
+    def _column_span(self, latitude: float, radius_km: float) -> int:
+        """Number of columns either side that can hold points within radius_km."""
+        radius_deg = radius_km / KM_PER_DEGREE_LAT
+        edge_lat = min(90.0, abs(latitude) + radius_deg)
+        cos_edge = math.cos(math.radians(edge_lat))
+
+        # hav(d) >= cos(phi1) * cos(phi2) * hav(d_lambda), with both
+        # latitudes bounded by edge_lat.
+        hav_radius = math.sin(radius_km / EARTH_RADIUS_KM / 2) ** 2
+        if cos_edge <= 0:
+            return self._columns
+        ratio = math.sqrt(hav_radius) / cos_edge
+        if ratio >= 1.0:
+            return self._columns
+
+        lon_span_deg = math.degrees(2 * math.asin(ratio))
+        return math.ceil(lon_span_deg / self.cell_deg)
+
+    def nearby(self, latitude: float, longitude: float, radius_km: float) -> Iterator[Any]:
+        """Yield items in cells that may lie within radius_km of the point."""
+        row, col = self._cell(latitude, longitude)
+        row_span = math.ceil(radius_km / self.cell_km)
+        col_span = self._column_span(latitude, radius_km)
+
+        if 2 * col_span + 1 >= self._columns:
+            # Polar query: every column is a neighbour
+            for (cell_row, _), points in self._cells.items():
+                if abs(cell_row - row) <= row_span:
+                    for _, _, item in points:
+                        yield item
+            return
+
+        for d_row in range(-row_span, row_span + 1):
+            for d_col in range(-col_span, col_span + 1):
+                points = self._cells.get((row + d_row, (col + d_col) % self._columns))
+                if points:
+                    for _, _, item in points:
+                        yield item
+
+
+def cell_key(latitude: float, longitude: float, cell_deg: float) -> tuple[int, int]:
+    """Integer (row, col) of the cell_deg-sized grid cell holding a point."""
+    return math.floor(latitude / cell_deg), math.floor(longitude / cell_deg)
+
+
+def cell_center(key: tuple[int, int], cell_deg: float) -> tuple[float, float]:
+    """Latitude/longitude of the centre of a cell returned by cell_key."""
+    row, col = key
+    return (row + 0.5) * cell_deg, (col + 0.5) * cell_deg
@@ -0,0 +1,194 @@
+"""
+Incremental JSON decoding from an async byte stream.
+
+Upstream payloads are consumed as they arrive instead of being buffered
+and json.loads'ed whole: arrays are walked element by element, objects
+key by key, and numeric arrays are decoded straight into array buffers.
+Callers keep only the parts they need, so peak memory is bounded by the
+largest single element rather than by the whole body.
+
+Complete values are decoded with json's own raw_decode, so string
+escapes and number formats behave exactly as with json.loads.
+"""
+import codecs
+import json
+import math
+import re
+from array import array
+from typing import Any, AsyncIterator, Iterable, Optional
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_DECODER = json.JSONDecoder()
+
+# Characters that can continue a number split across chunks
+_NUMBER_CHARS = frozenset("0123456789.eE+-")
+
+# Drop consumed text once this much has accumulated
+_COMPACT_AT = 64 * 1024
+
+
+class JsonStreamError(ValueError):
+    """Raised when the stream is not valid JSON or ends early."""
+    pass
+
+
+class JsonStream:
+    """Cursor over JSON text arriving as async byte chunks."""
+
+    def __init__(self, chunks: AsyncIterator[bytes]):
+        self._chunks = chunks.__aiter__()
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    async def _fill(self) -> bool:
+        """Append the next chunk. Returns False at end of stream."""
+        if self._eof:
+            return False
+        if self._pos > _COMPACT_AT:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+        try:
+            chunk = await self._chunks.__anext__()
+            self._buffer += self._decoder.decode(chunk)
+        except StopAsyncIteration:
+            self._buffer += self._decoder.decode(b"", final=True)
+            self._eof = True
+        return True
+
+    def _truncated(self, end: int) -> bool:
+        """Whether a number ending at `end` may continue in the next chunk."""
+        if self._eof:
+            return False
+        return end == len(self._buffer) or self._buffer[end] in _NUMBER_CHARS
+
+    async def peek(self) -> str:
+        """Next non-whitespace character ("" at end of stream)."""
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not await self._fill():
+                return ""
+
+    async def _expect(self, char: str) -> None:
+        found = await self.peek()
+        if found != char:
+            raise JsonStreamError(f"Expected {char!r} at offset {self._pos}, found {found!r}")
+        self._pos += 1
+
+    async def value(self) -> Any:
+        """Decode the next complete value."""
+        await self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError as e:
+                if await self._fill():
+                    continue
+                raise JsonStreamError(f"Invalid JSON: {e}") from None
+            if isinstance(value, (int, float)) and self._truncated(end) and await self._fill():
+                continue
+            self._pos = end
+            return value
+
+    async def skip(self) -> None:
+        """Consume the next value without keeping it."""
+        char = await self.peek()
+        if char == "[":
+            async for _ in self.items(decode=False):
+                await self.skip()
+        elif char == "{":
+            async for _ in self.keys():
+                await self.skip()
+        else:
+            await self.value()
+
+    async def items(self, decode: bool = True) -> AsyncIterator[Any]:
+        """
+        Iterate over the elements of the next array. With decode=False the
+        caller must consume each element itself (value, skip, keys, ...).
+        """
+        await self._expect("[")
+        if await self.peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            if decode:
+                yield await self.value()
+            else:
+                yield None
+            separator = await self.peek()
+            self._pos += 1
+            if separator == "]":
+                return
+            if separator != ",":
+                raise JsonStreamError(f"Expected ',' or ']' at offset {self._pos - 1}")
+
+    async def keys(self) -> AsyncIterator[str]:
+        """
+        Iterate over the keys of the next object. The caller must consume
+        each key's value before asking for the next key.
+        """
+        await self._expect("{")
+        if await self.peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            key = await self.value()
+            if not isinstance(key, str):
+                raise JsonStreamError(f"Object key must be a string at offset {self._pos}")
+            await self._expect(":")
+            yield key
+            separator = await self.peek()
+            self._pos += 1
+            if separator == "}":
+                return
+            if separator != ",":
+                raise JsonStreamError(f"Expected ',' or '}}' at offset {self._pos - 1}")
+
+    async def numbers(self, typecode: str = "f") -> array:
+        """
+        Decode the next array of numbers (null -> NaN) into an array
+        buffer. Number arrays cannot contain "]", so the whole array is
+        buffered and decoded in one C-level call; only one column is ever
+        held as Python floats.
+        """
+        if await self.peek() != "[":
+            raise JsonStreamError(f"Expected '[' at offset {self._pos}")
+        while self._buffer.find("]", self._pos) < 0:
+            if not await self._fill():
+                raise JsonStreamError(f"Unterminated array at offset {self._pos}")
+
+        try:
+            values, end = _DECODER.raw_decode(self._buffer, self._pos)
+            if None in values:
+                values = [math.nan if v is None else v for v in values]
+            result = array(typecode, values)
+        except (json.JSONDecodeError, TypeError) as e:
+            raise JsonStreamError(f"Expected an array of numbers at offset {self._pos}: {e}") from None
+        self._pos = end
+        return result
+
+    async def pick(self, fields: Iterable[str], nested: Optional[dict[str, Iterable[str]]] = None) -> dict:
+        """
+        Decode the next object keeping only `fields`, and for keys in
+        `nested` only their listed sub-fields. Everything else is skipped.
+        """
+        fields = set(fields)
+        nested = nested or {}
+        picked = {}
+        async for key in self.keys():
+            if key in nested and await self.peek() == "{":
+                picked[key] = await self.pick(nested[key])
+            elif key in fields:
+                picked[key] = await self.value()
+            else:
+                await self.skip()
+        return picked
+
+    async def end(self) -> None:
+        """Check that nothing but whitespace follows."""
+        if await self.peek():
+            raise JsonStreamError(f"Unexpected data at offset {self._pos}")
@@ -0,0 +1,78 @@
+"""Query normalization and graded relevance scoring for location search."""
+import re
+import unicodedata
+from functools import lru_cache
+
+_NON_WORD_RE = re.compile(r"\W+")
+
+# Weights for the components of a relevance score (they sum to 1.0)
+_WEIGHT_COVERAGE = 0.4        # share of query words found anywhere
+_WEIGHT_SHORT_COVERAGE = 0.3  # share of query words found in the short name
+_WEIGHT_PHRASE = 0.15         # whole query appears as a phrase
+_WEIGHT_PREFIX = 0.15         # short name starts with the query
+
+
+def fold(text: str) -> str:
+    """Case- and accent-insensitive form of text ("São Paulo" -> "sao paulo")."""
+    if text.isascii():
+        return text.lower()
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+@lru_cache(maxsize=4096)
+def normalize(text: str) -> tuple[str, frozenset[str]]:
+    """
+    Fold text and strip punctuation, returning (phrase, words).
+
+    Cached because Nominatim returns the same display names for popular
+    queries over and over.
+    """
+    phrase = _NON_WORD_RE.sub(" ", fold(text)).strip()
+    return phrase, frozenset(phrase.split())
+
+
+class QueryMatcher:
+    """
+    A search query normalized once and reused to score every candidate.
+
+    Scores are in [0, 1]; 0 means the candidate does not match the query
+    at all (no shared word and the query is not a substring).
+    """
+
+    __slots__ = ("query", "tokens", "phrase")
+
+    def __init__(self, query: str):
+        self.query = query
+        self.phrase, self.tokens = normalize(query)
+
+    def score(self, short_name: str, location_name: str) -> float:
+        if not self.tokens:
+            return 0.0
+
+        short_phrase, short_words = normalize(short_name)
+        location_phrase, location_words = normalize(location_name)
+
+        short_matched = self.tokens & short_words
+        matched = short_matched | (self.tokens & location_words)
+        coverage = len(matched) / len(self.tokens)
+        is_phrase = self.phrase in short_phrase or self.phrase in location_phrase
+
+        if not coverage and not is_phrase:
+            return 0.0
+
+        short_coverage = len(short_matched) / len(self.tokens)
+        is_prefix = short_phrase.startswith(self.phrase)
+
+        return (
+            _WEIGHT_COVERAGE * coverage
+            + _WEIGHT_SHORT_COVERAGE * short_coverage
+            + _WEIGHT_PHRASE * is_phrase
+            + _WEIGHT_PREFIX * is_prefix
+        )
+
+
+@lru_cache(maxsize=256)
+def compile_query(query: str) -> QueryMatcher:
+    """Cached QueryMatcher for a query string."""
+    return QueryMatcher(query)
@@ -0,0 +1,104 @@
+"""
+Periodic JSON snapshots of in-memory state (suggest index, feedback
+counters).
+
+The owner counts its changes; every `every` changes the state is
+captured on the calling thread and written to disk from a worker thread
+(inline when there is no event loop). Files are replaced atomically, and
+snapshots are numbered so a late background write never replaces a newer
+one.
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def read_snapshot(path: Path, version: int) -> Optional[dict]:
+    """A snapshot written with `version`, or None if missing or unusable."""
+    try:
+        with open(path, "r") as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(snapshot, dict) or snapshot.get("version") != version:
+        return None
+    return snapshot
+
+
+class SnapshotWriter:
+    """
+    Writes `take()` to `path` every `every` changes and on close.
+
+    `take` must return a consistent copy of the owner's state (taking the
+    owner's lock if it has one); it is always called on the caller's
+    thread, only the file write moves to a worker.
+    """
+
+    def __init__(self, name: str, take: Callable[[], dict], every: int = 100):
+        self.name = name
+        self.every = every
+        self.path: Optional[Path] = None
+        self.dirty = 0
+        self.saving: Optional[asyncio.Future] = None
+        self._take = take
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._seq = 0
+        self._written_seq = 0
+
+    def _snapshot(self) -> tuple[int, dict]:
+        with self._lock:
+            self._seq += 1
+            return self._seq, self._take()
+
+    def _write(self, path: Path, seq: int, snapshot: dict) -> None:
+        path = Path(path)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with self._write_lock:
+            if seq < self._written_seq:
+                return
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "w") as f:
+                json.dump(snapshot, f, separators=(",", ":"))
+            os.replace(tmp_path, path)
+            self._written_seq = seq
+
+    def save(self, path: Path) -> None:
+        """Atomically write a snapshot now."""
+        self._write(path, *self._snapshot())
+        self.dirty = 0
+
+    def changed(self, count: int = 1) -> None:
+        """Record changes; snapshot in the background once enough add up."""
+        self.dirty += count
+        if self.path and self.dirty >= self.every:
+            self._save_in_background()
+
+    def _save_in_background(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.save(self.path)
+            return
+        if self.saving is not None and not self.saving.done():
+            return
+
+        self.saving = loop.run_in_executor(None, self._write, self.path, *self._snapshot())
+        self.saving.add_done_callback(self._saved)
+        self.dirty = 0
+
+    def _saved(self, future: asyncio.Future) -> None:
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(f"❌ Failed to save {self.name} snapshot: {future.exception()}")
+
+    def close(self) -> None:
+        """Flush pending changes."""
+        if self.path and self.dirty:
+            self.save(self.path)
@@ -0,0 +1,15 @@
+"""Time-of-day buckets shared by location logging and personalization."""
+
+TIME_OF_DAY_BUCKETS = ("morning", "afternoon", "evening", "night")
+
+
+def time_of_day(hour: int) -> str:
+    """Bucket an hour (0-23) into morning / afternoon / evening / night."""
+    if 5 <= hour < 12:
+        return "morning"
+    elif 12 <= hour < 17:
+        return "afternoon"
+    elif 17 <= hour < 21:
+        return "evening"
+    else:
+        return "night"
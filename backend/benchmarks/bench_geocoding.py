@@ -0,0 +1,156 @@
+"""
+Micro-benchmarks for the geocoding post-processing pipeline.
+
+Times each stage that runs on every disambiguation request, plus the
+whole `search_locations` post-processing pipeline, against recorded
+Nominatim fixtures of 10, 50 and 500 candidates. No network access.
+
+Usage (from backend/):
+
+    python -m benchmarks.bench_geocoding
+    python -m benchmarks.bench_geocoding --sizes 50 500 --json out.json
+    python -m benchmarks.bench_geocoding --check benchmarks/data/geocoding_budgets.json
+
+`--update-expected` re-records the pipeline output for each fixture
+(benchmarks/data/expected_<size>.json), which test_geocoding_pipeline.py
+uses to guard optimizations against behaviour changes.
+"""
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+from typing import Callable
+
+from app.services import geocoding_service as gs
+from benchmarks.fixtures import (
+    FIXTURE_SIZES,
+    expected_path,
+    load_fixture,
+    pipeline_snapshot,
+)
+from benchmarks.harness import (
+    BenchResult,
+    bench,
+    check_budgets,
+    format_results,
+    save_results,
+)
+
+
+def _group_for_bench(options):
+    """Greedy proximity grouping used only to feed _select_best_from_group."""
+    groups = []
+    for option in options:
+        for group in groups:
+            if any(gs._are_locations_similar(option, other) for other in group):
+                group.append(option)
+                break
+        else:
+            groups.append([option])
+    return groups
+
+
+def build_stages(size: int) -> dict[str, Callable[[], object]]:
+    """Return {stage name: zero-arg callable} for one fixture size."""
+    query, results = load_fixture(size)
+
+    options = gs._process_search_results(results, query, limit=len(results),
+                                         filter_by_confidence=False)
+    all_options = [gs._build_option(r, query) for r in results]
+    relevant = gs._filter_relevant_results(all_options, query)
+    groups = [g for g in _group_for_bench(relevant) if len(g) > 1]
+    assert options, "fixture produced no options"
+
+    def extract_short_name():
+        for r in results:
+            gs._extract_short_name(r)
+
+    def determine_confidence():
+        for r in results:
+            gs._determine_confidence(r)
+
+    def filter_relevant():
+        gs._filter_relevant_results(all_options, query)
+
+    def deduplicate():
+        gs._deduplicate_locations(relevant)
+
+    def select_best():
+        for group in groups:
+            gs._select_best_from_group(group)
+
+    def pipeline():
+        gs._process_search_results(results, query, limit=5, filter_by_confidence=True)
+
+    return {
+        "extract_short_name": extract_short_name,
+        "determine_confidence": determine_confidence,
+        "filter_relevant_results": filter_relevant,
+        "deduplicate_locations": deduplicate,
+        "select_best_from_group": select_best,
+        "pipeline": pipeline,
+    }
+
+
+def run(sizes, repeat: int = 7, min_sample_time: float = 0.05,
+        track_allocations: bool = True) -> list[BenchResult]:
+    results = []
+    for size in sizes:
+        for stage, fn in build_stages(size).items():
+            results.append(bench(
+                f"geocoding/{stage}[{size}]",
+                fn,
+                repeat=repeat,
+                min_sample_time=min_sample_time,
+                track_allocations=track_allocations,
+            ))
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(FIXTURE_SIZES))
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--min-sample-time", type=float, default=0.05)
+    parser.add_argument("--no-alloc", action="store_true", help="skip tracemalloc pass")
+    parser.add_argument("--json", type=Path, help="write raw results to this file")
+    parser.add_argument("--check", type=Path, help="fail if results exceed budgets file")
+    parser.add_argument("--tolerance", type=float, default=1.0,
+                        help="multiplier applied to every budget")
+    parser.add_argument("--update-expected", action="store_true",
+                        help="re-record expected pipeline output and exit")
+    args = parser.parse_args(argv)
+
+    # The pipeline logs at INFO on every call; keep it out of the timings.
+    logging.disable(logging.INFO)
+
+    if args.update_expected:
+        for size in args.sizes:
+            with open(expected_path(size), "w") as f:
+                json.dump(pipeline_snapshot(size), f, indent=1)
+            print(f"✅ Wrote {expected_path(size)}")
+        return 0
+
+    results = run(args.sizes, args.repeat, args.min_sample_time, not args.no_alloc)
+    print(format_results(results))
+
+    if args.json:
+        save_results(results, args.json)
+        print(f"\n📝 Results written to {args.json}")
+
+    if args.check:
+        violations = check_budgets(results, args.check, args.tolerance)
+        if violations:
+            print("\n❌ Budget violations:")
+            for v in violations:
+                print(f"   {v}")
+            return 1
+        print("\n✅ All benchmarks within budget")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+"""
+Micro-benchmarks for per-request service hot paths.
+
+Timing comparisons that do not belong in the unit suite (they fail
+intermittently on a loaded runner) live here instead. Besides absolute
+budgets, `--check` enforces the minimum speedup of each fast path over
+the path it replaced (SPEEDUPS). No network access.
+
+Usage (from backend/):
+
+    python -m benchmarks.bench_services
+    python -m benchmarks.bench_services --json out.json
+    python -m benchmarks.bench_services --check benchmarks/data/services_budgets.json
+"""
+import argparse
+import itertools
+import json
+import logging
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+from fastapi.encoders import jsonable_encoder
+
+from app.models.schemas import Coordinates, CurrentWeather, WeatherResponse
+from app.services import weather_service
+from app.services.render_service import render_weather_response
+from app.services.suggest_service import PrefixIndex
+from benchmarks.harness import (
+    BenchResult,
+    bench,
+    check_budgets,
+    format_results,
+    save_results,
+)
+
+WEATHER = CurrentWeather(
+    timestamp=datetime(2025, 11, 17, 8, 0),
+    temperature=31.5,
+    precipitation=3.2,
+    wind_speed=35.0,
+    humidity=85.0,
+    uv_index=9.0
+)
+
+LOCATION = Coordinates(
+    latitude=48.8566,
+    longitude=2.3522,
+    location_name="Paris, Île-de-France, France",
+    confidence="high"
+)
+
+# (fast benchmark, benchmark it replaced, minimum median speedup)
+SPEEDUPS = [
+    ("render/fragments", "render/model_path", 3.0),
+    ("rules/suggestions_memo", "rules/suggestions_direct", 1.0),
+]
+
+
+def build_render() -> dict[str, Callable[[], object]]:
+    """WeatherResponse body: pydantic model + jsonable_encoder vs fragments."""
+    timestamp = datetime.now()
+
+    def model_path():
+        response = WeatherResponse(
+            query=LOCATION.location_name,
+            location=LOCATION,
+            current_weather=WEATHER,
+            suggestions=weather_service.generate_suggestions(WEATHER),
+            timestamp=timestamp
+        )
+        json.dumps(jsonable_encoder(response), ensure_ascii=False, separators=(",", ":")).encode()
+
+    def fragments():
+        render_weather_response(
+            LOCATION.location_name, LOCATION, WEATHER, weather_service.suggestions_json(WEATHER), timestamp
+        )
+
+    return {"render/model_path": model_path, "render/fragments": fragments}
+
+
+def build_rules() -> dict[str, Callable[[], object]]:
+    """Weather suggestions: every rule evaluated vs the signature memo."""
+    weather = WEATHER.model_copy(update={"temperature": 22.0})
+
+    def direct():
+        weather_service._evaluate_suggestions(weather)
+
+    def memo():
+        weather_service.generate_suggestions(weather)
+
+    return {"rules/suggestions_direct": direct, "rules/suggestions_memo": memo}
+
+
+def build_suggest() -> dict[str, Callable[[], object]]:
+    """Uncached type-ahead lookups over 20k locations."""
+    # No memo, so every call walks the sorted keys
+    index = PrefixIndex(cache_size=0)
+    for i in range(20000):
+        index.record(f"Town {i:05d}, Somewhere", f"Town {i:05d}", 10.0, 10.0, weight=i % 7)
+    prefixes = itertools.cycle([f"town {i:03d}" for i in range(1000)])
+
+    def suggest():
+        index.suggest(next(prefixes))
+
+    return {"suggest/uncached[20k]": suggest}
+
+
+BUILDERS = [build_render, build_rules, build_suggest]
+
+
+def run(repeat: int = 7, min_sample_time: float = 0.05,
+        track_allocations: bool = True) -> list[BenchResult]:
+    results = []
+    for build in BUILDERS:
+        for name, fn in build().items():
+            results.append(bench(
+                name,
+                fn,
+                repeat=repeat,
+                min_sample_time=min_sample_time,
+                track_allocations=track_allocations,
+            ))
+    return results
+
+
+def check_speedups(results: list[BenchResult], tolerance: float = 1.0) -> list[str]:
+    """Violations of SPEEDUPS; `tolerance` relaxes every required ratio."""
+    medians = {r.name: r.median_us for r in results}
+    violations = []
+    for fast, slow, minimum in SPEEDUPS:
+        if fast not in medians or slow not in medians:
+            continue
+        speedup = medians[slow] / medians[fast]
+        if speedup < minimum / tolerance:
+            violations.append(f"{fast}: {speedup:.1f}x faster than {slow}, expected {minimum / tolerance:.1f}x")
+    return violations
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--min-sample-time", type=float, default=0.05)
+    parser.add_argument("--no-alloc", action="store_true", help="skip tracemalloc pass")
+    parser.add_argument("--json", type=Path, help="write raw results to this file")
+    parser.add_argument("--check", type=Path,
+                        help="fail if results exceed budgets file or miss a speedup")
+    parser.add_argument("--tolerance", type=float, default=1.0,
+                        help="multiplier applied to every budget")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.INFO)
+
+    results = run(args.repeat, args.min_sample_time, not args.no_alloc)
+    print(format_results(results))
+
+    if args.json:
+        save_results(results, args.json)
+        print(f"\n📝 Results written to {args.json}")
+
+    if args.check:
+        violations = check_budgets(results, args.check, args.tolerance)
+        violations += check_speedups(results, args.tolerance)
+        if violations:
+            print("\n❌ Budget violations:")
+            for v in violations:
+                print(f"   {v}")
+            return 1
+        print("\n✅ All benchmarks within budget")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
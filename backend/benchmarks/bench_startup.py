@@ -0,0 +1,159 @@
+"""
+Cold-start benchmark: how long `import app.main` takes, and where.
+
+Each sample runs a fresh interpreter with `python -X importtime` and
+parses its report, so nothing is cached in-process between samples
+(bytecode caches are used, as in a deployed container). Reported:
+
+    startup/process                 interpreter start + import, wall clock
+    startup/import app.main         cumulative import time of app.main
+    startup/import app.* (self)     time spent in our own module bodies
+
+The import also runs in an empty working directory, and any file or
+directory it creates there is reported: importing the app must not
+touch the filesystem (that belongs in the app lifespan).
+
+Usage (from backend/):
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --top 25 --json out.json
+    python -m benchmarks.bench_startup --check benchmarks/data/startup_budgets.json
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from benchmarks.harness import BenchResult, check_budgets, format_results, save_results
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+APP_MODULE = "app.main"
+
+
+@dataclass
+class ImportSample:
+    wall_us: float
+    # module -> (self µs, cumulative µs)
+    modules: dict[str, tuple[int, int]]
+    created: list[str]
+
+
+def parse_importtime(report: str) -> dict[str, tuple[int, int]]:
+    """`-X importtime` stderr -> {module: (self µs, cumulative µs)}."""
+    modules = {}
+    for line in report.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, self_us, cumulative_us, name = (part.strip() for part in line.replace("import time:", "|", 1).split("|"))
+        modules[name] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def sample_import(module: str = APP_MODULE) -> ImportSample:
+    """Import `module` in a fresh interpreter inside an empty directory."""
+    env = {**os.environ, "PYTHONPATH": str(BACKEND_DIR)}
+    with tempfile.TemporaryDirectory() as cwd:
+        start = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=cwd,
+            env=env,
+            capture_output=True,
+            text=True
+        )
+        wall_us = (time.perf_counter() - start) * 1e6
+        created = sorted(str(p.relative_to(cwd)) for p in Path(cwd).rglob("*"))
+
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    return ImportSample(wall_us, parse_importtime(proc.stderr), created)
+
+
+def _result(name: str, values: list[float]) -> BenchResult:
+    return BenchResult(
+        name=name,
+        loops=1,
+        repeat=len(values),
+        min_us=min(values),
+        median_us=statistics.median(values),
+        mean_us=statistics.fmean(values),
+        stdev_us=statistics.stdev(values) if len(values) > 1 else 0.0,
+        peak_alloc_bytes=0,
+        alloc_blocks=0,
+    )
+
+
+def summarize(samples: list[ImportSample], module: str = APP_MODULE) -> list[BenchResult]:
+    return [
+        _result("startup/process", [s.wall_us for s in samples]),
+        _result(f"startup/import {module}", [s.modules[module][1] for s in samples]),
+        _result("startup/import app.* (self)", [
+            sum(self_us for name, (self_us, _) in s.modules.items() if name == "app" or name.startswith("app."))
+            for s in samples
+        ]),
+    ]
+
+
+def top_modules(samples: list[ImportSample], top: int) -> str:
+    """Modules with the largest median self time across samples."""
+    names = set().union(*(s.modules for s in samples))
+    medians = {
+        name: statistics.median(s.modules.get(name, (0, 0))[0] for s in samples)
+        for name in names
+    }
+    ranked = sorted(medians.items(), key=lambda item: item[1], reverse=True)[:top]
+    lines = [f"{'module (self time)':<56} {'median':>12}", "-" * 69]
+    lines += [f"{name:<56} {us / 1000:>10.1f}ms" for name, us in ranked]
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="slowest modules to list")
+    parser.add_argument("--json", type=Path, help="write raw results to this file")
+    parser.add_argument("--check", type=Path,
+                        help="fail if results exceed budgets file or the import writes files")
+    parser.add_argument("--tolerance", type=float, default=1.0,
+                        help="multiplier applied to every budget")
+    args = parser.parse_args(argv)
+
+    sample_import()  # populate bytecode caches
+    samples = [sample_import() for _ in range(args.repeat)]
+    results = summarize(samples)
+
+    print(format_results(results))
+    print()
+    print(top_modules(samples, args.top))
+
+    created = samples[-1].created
+    if created:
+        print(f"\n⚠️  Importing {APP_MODULE} created: {', '.join(created)}")
+
+    if args.json:
+        save_results(results, args.json)
+        print(f"\n📝 Results written to {args.json}")
+
+    if args.check:
+        violations = check_budgets(results, args.check, args.tolerance)
+        if created:
+            violations.append(f"import side effects: {', '.join(created)}")
+        if violations:
+            print("\n❌ Budget violations:")
+            for v in violations:
+                print(f"   {v}")
+            return 1
+        print("\n✅ Startup within budget")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
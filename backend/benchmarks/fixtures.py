@@ -0,0 +1,198 @@
+"""Nominatim search fixtures for the geocoding benchmarks.
+
+The fixtures under benchmarks/data/ mirror the shape of a real
+`/search?format=json&addressdetails=1` response: string lat/lon, an
+`address` block, `importance`, `type`/`osm_type`, and clusters of
+near-duplicate records (node + relation + boundary for the same town),
+which is what makes deduplication expensive in practice.
+
+They are generated deterministically so they can be re-created and
+diffed. Re-generate with:
+
+    python -m benchmarks.fixtures
+"""
+import json
+import random
+from pathlib import Path
+
+DATA_DIR = Path(__file__).parent / "data"
+
+FIXTURE_SIZES = (10, 50, 500)
+
+# (query, seed) per fixture size
+FIXTURE_QUERIES = {
+    10: ("Brooklyn", 10),
+    50: ("Springfield", 50),
+    500: ("Springfield", 500),
+}
+
+US_STATES = [
+    "Alabama", "California", "Colorado", "Florida", "Georgia", "Illinois",
+    "Kentucky", "Louisiana", "Maine", "Massachusetts", "Michigan",
+    "Minnesota", "Missouri", "Nebraska", "New York", "Ohio", "Oregon",
+    "Pennsylvania", "Tennessee", "Texas", "Vermont", "Virginia",
+]
+
+COUNTRIES = [
+    ("United Kingdom", 51.5, -1.0),
+    ("Australia", -33.0, 147.0),
+    ("Canada", 45.5, -75.0),
+    ("New Zealand", -43.0, 172.0),
+    ("South Africa", -29.0, 25.0),
+    ("Ireland", 53.0, -8.0),
+    ("Norway", 63.0, 10.0),
+]
+
+PLACE_TYPES = [
+    # (type, class, osm_type, importance range)
+    ("city", "place", "node", (0.45, 0.75)),
+    ("town", "place", "node", (0.35, 0.55)),
+    ("village", "place", "node", (0.25, 0.45)),
+    ("administrative", "boundary", "relation", (0.30, 0.60)),
+    ("suburb", "place", "node", (0.20, 0.40)),
+    ("neighbourhood", "place", "node", (0.15, 0.30)),
+    ("residential", "highway", "way", (0.10, 0.25)),
+    ("county", "boundary", "relation", (0.30, 0.50)),
+]
+
+# Results Nominatim returns for fuzzy matches that do not contain the
+# query at all (these exercise the relevance filter).
+UNRELATED_NAMES = [
+    "Greenfield", "Springvale", "Fairfield", "Bloomfield", "Westfield",
+    "Brookline", "Brookfield", "Kingsbridge", "Spring Valley", "Field",
+]
+
+
+def _record(rng, place_id, name, lat, lon, state, country, place):
+    place_type, place_class, osm_type, (imp_lo, imp_hi) = place
+    address = {place_type if place_type in ("city", "town", "village") else "city": name}
+    if place_type in ("suburb", "neighbourhood"):
+        address = {place_type: name, "city": rng.choice(["Kings County", "Metro"])}
+    if place_type == "county":
+        address = {"county": f"{name} County"}
+    if state:
+        address["state"] = state
+    address["country"] = country
+    address["country_code"] = "us" if country == "United States" else country[:2].lower()
+
+    parts = [name]
+    if "county" in address and place_type != "county":
+        parts.append(address["county"])
+    if state:
+        parts.append(state)
+    parts.append(country)
+
+    return {
+        "place_id": place_id,
+        "licence": "Data © OpenStreetMap contributors, ODbL 1.0. http://osm.org/copyright",
+        "osm_type": osm_type,
+        "osm_id": 100000 + place_id,
+        "lat": f"{lat:.7f}",
+        "lon": f"{lon:.7f}",
+        "class": place_class,
+        "type": place_type,
+        "place_rank": rng.choice([12, 16, 18, 20]),
+        "importance": round(rng.uniform(imp_lo, imp_hi), 6),
+        "addresstype": place_type,
+        "name": name,
+        "display_name": ", ".join(parts),
+        "address": address,
+        "boundingbox": [
+            f"{lat - 0.05:.7f}", f"{lat + 0.05:.7f}",
+            f"{lon - 0.05:.7f}", f"{lon + 0.05:.7f}",
+        ],
+    }
+
+
+def generate_nominatim_results(size: int, query: str, seed: int) -> list[dict]:
+    """Build `size` Nominatim-shaped records for `query`."""
+    rng = random.Random(seed)
+    results = []
+    place_id = 1
+
+    while len(results) < size:
+        roll = rng.random()
+
+        if roll < 0.12:
+            # Fuzzy match that does not contain the query
+            name = rng.choice(UNRELATED_NAMES)
+        else:
+            name = query
+
+        if rng.random() < 0.7:
+            state = rng.choice(US_STATES)
+            country = "United States"
+            center_lat = rng.uniform(26.0, 47.0)
+            center_lon = rng.uniform(-122.0, -70.0)
+        else:
+            country, base_lat, base_lon = rng.choice(COUNTRIES)
+            state = None
+            center_lat = base_lat + rng.uniform(-4.0, 4.0)
+            center_lon = base_lon + rng.uniform(-6.0, 6.0)
+
+        # A cluster of 1-4 records for the same place, within ~1 km
+        cluster_size = rng.choice([1, 1, 2, 2, 3, 4])
+        for _ in range(cluster_size):
+            if len(results) >= size:
+                break
+            lat = center_lat + rng.uniform(-0.008, 0.008)
+            lon = center_lon + rng.uniform(-0.008, 0.008)
+            place = rng.choice(PLACE_TYPES)
+            results.append(
+                _record(rng, place_id, name, lat, lon, state, country, place)
+            )
+            place_id += 1
+
+    return results
+
+
+def fixture_path(size: int) -> Path:
+    return DATA_DIR / f"nominatim_{size}.json"
+
+
+def expected_path(size: int) -> Path:
+    return DATA_DIR / f"expected_{size}.json"
+
+
+def load_fixture(size: int) -> tuple[str, list[dict]]:
+    """Load a recorded fixture. Returns (query, results)."""
+    with open(fixture_path(size), "r") as f:
+        fixture = json.load(f)
+    return fixture["query"], fixture["results"]
+
+
+def pipeline_snapshot(size: int) -> dict[str, list[dict]]:
+    """Run the post-processing pipeline on a fixture and return plain dicts."""
+    from dataclasses import asdict
+
+    from app.services.geocoding_service import _process_search_results
+
+    query, results = load_fixture(size)
+    return {
+        "deduplicated": [
+            asdict(option)
+            for option in _process_search_results(
+                results, query, limit=len(results), filter_by_confidence=False
+            )
+        ],
+        "filtered": [
+            asdict(option)
+            for option in _process_search_results(
+                results, query, limit=5, filter_by_confidence=True
+            )
+        ],
+    }
+
+
+def write_fixtures() -> None:
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    for size in FIXTURE_SIZES:
+        query, seed = FIXTURE_QUERIES[size]
+        results = generate_nominatim_results(size, query, seed)
+        with open(fixture_path(size), "w") as f:
+            json.dump({"query": query, "results": results}, f, separators=(",", ":"))
+        print(f"✅ Wrote {fixture_path(size)} ({len(results)} results)")
+
+
+if __name__ == "__main__":
+    write_fixtures()
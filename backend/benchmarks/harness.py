@@ -0,0 +1,152 @@
+"""Minimal pyperf-style timing harness.
+
+Each benchmark is calibrated so one sample takes at least
+`min_sample_time`, then `repeat` samples are timed with
+`time.perf_counter`. A separate run under `tracemalloc` records peak
+traced memory and allocated blocks for a single call, so allocation
+tracking never skews the timings.
+"""
+import gc
+import json
+import statistics
+import time
+import tracemalloc
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+
+@dataclass
+class BenchResult:
+    name: str
+    loops: int
+    repeat: int
+    min_us: float
+    median_us: float
+    mean_us: float
+    stdev_us: float
+    peak_alloc_bytes: int
+    alloc_blocks: int
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def _calibrate(fn: Callable[[], Any], min_sample_time: float) -> int:
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_sample_time or loops >= 1_000_000:
+            return loops
+        loops *= 2 if elapsed == 0 else max(2, int(min_sample_time / elapsed) + 1)
+
+
+def _measure_allocations(fn: Callable[[], Any]) -> tuple[int, int]:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        result = fn()
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    blocks = sum(
+        stat.count_diff for stat in after.compare_to(before, "filename")
+        if stat.count_diff > 0
+    )
+    del result
+    return peak, blocks
+
+
+def bench(
+    name: str,
+    fn: Callable[[], Any],
+    repeat: int = 7,
+    min_sample_time: float = 0.05,
+    track_allocations: bool = True,
+) -> BenchResult:
+    """Time `fn` and (optionally) record its allocations."""
+    fn()  # warmup
+    loops = _calibrate(fn, min_sample_time)
+
+    samples = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(loops):
+                fn()
+            samples.append((time.perf_counter() - start) / loops * 1e6)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    peak, blocks = _measure_allocations(fn) if track_allocations else (0, 0)
+
+    return BenchResult(
+        name=name,
+        loops=loops,
+        repeat=repeat,
+        min_us=min(samples),
+        median_us=statistics.median(samples),
+        mean_us=statistics.fmean(samples),
+        stdev_us=statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        peak_alloc_bytes=peak,
+        alloc_blocks=blocks,
+    )
+
+
+def format_results(results: list[BenchResult]) -> str:
+    header = f"{'benchmark':<44} {'median':>12} {'min':>12} {'± stdev':>10} {'peak alloc':>12}"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(
+            f"{r.name:<44} {r.median_us:>10.1f}µs {r.min_us:>10.1f}µs "
+            f"{r.stdev_us:>9.1f} {r.peak_alloc_bytes / 1024:>10.1f}KB"
+        )
+    return "\n".join(lines)
+
+
+def save_results(results: list[BenchResult], path: Path) -> None:
+    with open(path, "w") as f:
+        json.dump([r.to_dict() for r in results], f, indent=2)
+
+
+def check_budgets(
+    results: list[BenchResult],
+    budgets_path: Path,
+    tolerance: float = 1.0,
+) -> list[str]:
+    """
+    Compare results against a budgets file of the form
+    {"<benchmark name>": {"median_us": ..., "peak_alloc_bytes": ...}}.
+
+    Returns a list of human-readable violations (empty when all pass).
+    `tolerance` scales every budget, e.g. 1.5 allows 50% headroom on
+    slower machines.
+    """
+    with open(budgets_path, "r") as f:
+        budgets = json.load(f)
+
+    violations = []
+    for r in results:
+        budget: Optional[dict] = budgets.get(r.name)
+        if not budget:
+            continue
+        limit = budget.get("median_us")
+        if limit is not None and r.median_us > limit * tolerance:
+            violations.append(
+                f"{r.name}: median {r.median_us:.1f}µs > budget {limit * tolerance:.1f}µs"
+            )
+        limit = budget.get("peak_alloc_bytes")
+        if limit is not None and r.peak_alloc_bytes > limit * tolerance:
+            violations.append(
+                f"{r.name}: peak alloc {r.peak_alloc_bytes}B > budget {int(limit * tolerance)}B"
+            )
+    return violations
@@ -0,0 +1,180 @@
+"""Test admission control: concurrency limits, queue budgets, cache bypass (no network)."""
+import asyncio
+import json
+import time
+
+import httpx
+
+from app.config import get_settings
+from app.main import app
+from app.services import weather_service
+from app.services.admission_service import (
+    AdmissionRejected, Gate, RouteAdmission, _request, admission
+)
+from app.services.cache_service import weather_cache
+
+
+def test_gate_queues_then_rejects():
+    print("🧪 Testing gate queueing and rejection\n")
+
+    async def run():
+        gate = Gate("test", limit=1, max_waiting=1)
+        await gate.acquire(timeout=1.0)
+
+        # A waiter gets the slot handed over on release
+        waiter = asyncio.create_task(gate.acquire(timeout=1.0))
+        await asyncio.sleep(0)
+        assert gate.waiting == 1
+
+        # The queue is full: rejected without waiting
+        started = time.monotonic()
+        try:
+            await gate.acquire(timeout=1.0)
+            raise AssertionError("expected AdmissionRejected")
+        except AdmissionRejected as e:
+            assert e.retry_after >= 1
+        assert time.monotonic() - started < 0.05
+
+        gate.release()
+        await waiter
+        assert gate.in_flight == 1 and gate.waiting == 0
+
+        # Budget runs out while waiting
+        try:
+            await gate.acquire(timeout=0.05)
+            raise AssertionError("expected AdmissionRejected")
+        except AdmissionRejected:
+            pass
+        assert gate.waiting == 0
+
+        gate.release()
+        assert gate.in_flight == 0
+        print(f"Gate stats: {gate.stats()}")
+        assert gate.stats()["rejected"] == 2
+
+    asyncio.run(run())
+    print("✅ Gate behaves\n")
+
+
+def test_budget_counts_only_queue_time():
+    print("🧪 Testing that work time does not spend the queue budget\n")
+
+    settings = get_settings()
+    original = (settings.admission_upstream_limits, settings.admission_queue_timeout_seconds)
+
+    async def run():
+        request = RouteAdmission(scope={"path": "/test"}, budget=0.1)
+        _request.set(request)
+
+        # A slow first upstream call, longer than the whole budget
+        async with admission.upstream("open_meteo"):
+            await asyncio.sleep(0.15)
+
+        # The second call still gets to queue behind another holder
+        gate = admission.upstream_gate("open_meteo")
+        await gate.acquire(timeout=1.0)
+        asyncio.get_running_loop().call_later(0.02, gate.release)
+        async with admission.upstream("open_meteo"):
+            pass
+
+        print(f"Queued {request.waited * 1000:.0f} ms of a {request.budget * 1000:.0f} ms budget")
+        assert 0.01 < request.waited < 0.1
+        request.gate.release()
+
+    try:
+        settings.admission_upstream_limits = "open_meteo=1"
+        settings.admission_queue_timeout_seconds = 0.1
+        admission.reset()
+        asyncio.run(run())
+    finally:
+        settings.admission_upstream_limits, settings.admission_queue_timeout_seconds = original
+        admission.reset()
+
+    print("✅ Only queue time is budgeted\n")
+
+
+def _current_payload(request: httpx.Request) -> dict:
+    return {
+        "latitude": float(request.url.params["latitude"]),
+        "longitude": float(request.url.params["longitude"]),
+        "current": {
+            "time": "2025-11-17T08:00",
+            "temperature_2m": 12.0,
+            "precipitation": 0.0,
+            "relative_humidity_2m": 60,
+            "wind_speed_10m": 8.0,
+            "uv_index": 2.0
+        }
+    }
+
+
+def test_overload_sheds_with_retry_after():
+    print("🧪 Testing load shedding on /api/weather/current\n")
+
+    settings = get_settings()
+    original = (settings.admission_upstream_limits, settings.admission_queue_timeout_seconds)
+    original_get_client = weather_service.get_client
+    upstream_calls = []
+
+    async def slow_upstream(request: httpx.Request) -> httpx.Response:
+        upstream_calls.append(request.url.params["latitude"])
+        await asyncio.sleep(0.3)
+        return httpx.Response(200, content=json.dumps(_current_payload(request)).encode())
+
+    async def run():
+        upstream = httpx.AsyncClient(transport=httpx.MockTransport(slow_upstream))
+        weather_service.get_client = lambda: upstream
+
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            async def current(location):
+                return await client.post("/api/weather/current", json={"location": location})
+
+            # Warm one cell
+            response = await current("40.71, -74.00")
+            assert response.status_code == 200
+
+            # One upstream slot, 0.1 s budget: 1 of 4 cold requests gets through
+            cold = [asyncio.create_task(current(f"{40.0 + i}, -75.00")) for i in range(4)]
+            await asyncio.sleep(0.05)
+            
+            # ...while a cached request is answered without queueing
+            started = time.monotonic()
+            hot_response = await current("40.71, -74.00")
+            hot_seconds = time.monotonic() - started
+            responses = await asyncio.gather(*cold)
+
+            codes = sorted(r.status_code for r in responses)
+            print(f"Cold responses: {codes}, cached response in {hot_seconds * 1000:.0f} ms")
+            assert hot_response.status_code == 200
+            assert hot_seconds < 0.3
+            assert codes == [200, 503, 503, 503]
+            for r in responses:
+                if r.status_code == 503:
+                    assert int(r.headers["Retry-After"]) >= 1
+            
+            # Route slots are released when the response is sent
+            route = admission.stats()["routes"]["get_current_weather"]
+            assert route["in_flight"] == 0 and route["admitted"] == 5
+
+        await upstream.aclose()
+
+    try:
+        settings.admission_upstream_limits = "open_meteo=1"
+        settings.admission_queue_timeout_seconds = 0.1
+        admission.reset()
+        weather_cache.clear()
+        asyncio.run(run())
+    finally:
+        settings.admission_upstream_limits, settings.admission_queue_timeout_seconds = original
+        weather_service.get_client = original_get_client
+        admission.reset()
+        weather_cache.clear()
+
+    assert len(upstream_calls) == 2  # warm-up + the one admitted cold request
+    print("✅ Excess load shed with 503 + Retry-After\n")
+
+
+if __name__ == "__main__":
+    test_gate_queues_then_rejects()
+    test_budget_counts_only_queue_time()
+    test_overload_sheds_with_retry_after()
@@ -0,0 +1,145 @@
+"""Test record/replay of upstream traffic (no network)."""
+import asyncio
+import gzip
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from app.services import geocoding_service
+from app.services.cache_service import geocode_cache
+from app.services.cassette_service import (
+    Cassette,
+    CassetteMiss,
+    CassetteTransport,
+    request_key
+)
+
+NOMINATIM_RESULT = [{
+    "lat": "40.6501038",
+    "lon": "-73.9495823",
+    "display_name": "Brooklyn, Kings County, New York, United States",
+    "type": "administrative",
+    "importance": 0.8,
+    "osm_type": "relation",
+    "address": {"suburb": "Brooklyn", "state": "New York", "country": "United States", "country_code": "us"}
+}]
+
+
+def test_request_key_normalizes_query():
+    a = request_key("get", httpx.URL("https://example.org/search?q=Paris&limit=5"))
+    b = request_key("GET", httpx.URL("https://example.org/search?limit=5&q=Paris"))
+    assert a == b == "GET https://example.org/search?limit=5&q=Paris"
+    assert request_key("POST", httpx.URL("https://example.org/x"), b"{}") != request_key("POST", httpx.URL("https://example.org/x"), b"[]")
+
+
+def test_record_then_replay_offline():
+    print("🧪 Testing record then replay of a Nominatim search\n")
+
+    calls = []
+
+    async def live(request: httpx.Request) -> httpx.Response:
+        calls.append(str(request.url))
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json=NOMINATIM_RESULT)
+
+    async def offline(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("network unreachable", request=request)
+
+    async def geocode_with(transport):
+        client = httpx.AsyncClient(transport=transport)
+        original = geocoding_service.get_client
+        geocoding_service.get_client = lambda: client
+        geocode_cache.clear()
+        try:
+            return await geocoding_service.geocode("Brooklyn, NY")
+        finally:
+            geocoding_service.get_client = original
+            geocode_cache.clear()
+            await client.aclose()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "upstream.jsonl.gz"
+
+        recorded = asyncio.run(geocode_with(
+            CassetteTransport(httpx.MockTransport(live), Cassette(str(path)), "record")
+        ))
+        assert len(calls) == 1
+
+        with gzip.open(path, "rt") as f:
+            entries = [json.loads(line) for line in f]
+        print(f"Recorded: {entries[0]['key'][:80]}... ({path.stat().st_size} bytes on disk)")
+        assert len(entries) == 1 and entries[0]["status"] == 200
+        assert entries[0]["latency_ms"] >= 50
+
+        # Replay: same answer, the network is never touched
+        replayed = asyncio.run(geocode_with(
+            CassetteTransport(httpx.MockTransport(offline), Cassette(str(path)), "replay")
+        ))
+        assert replayed == recorded
+        assert len(calls) == 1
+
+        # Recorded latency is reproduced on request
+        started = time.perf_counter()
+        asyncio.run(geocode_with(
+            CassetteTransport(httpx.MockTransport(offline), Cassette(str(path)), "replay", latency="recorded")
+        ))
+        assert time.perf_counter() - started >= 0.05
+
+        # Anything not recorded fails like an unreachable upstream
+        async def miss():
+            client = httpx.AsyncClient(
+                transport=CassetteTransport(httpx.MockTransport(offline), Cassette(str(path)), "replay")
+            )
+            async with client:
+                await client.get("https://nominatim.openstreetmap.org/search", params={"q": "Paris"})
+
+        try:
+            asyncio.run(miss())
+            raise AssertionError("expected CassetteMiss")
+        except CassetteMiss as e:
+            assert "q=Paris" in str(e)
+
+    print("✅ Replayed offline with the recorded payload\n")
+
+
+def test_latest_recording_wins():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "c.jsonl.gz")
+        cassette = Cassette(path)
+        cassette.add("GET https://x/a", 500, {}, b"oops", 1.0)
+        cassette.add("GET https://x/a", 200, {"content-type": "application/octet-stream"}, b"\xff\x00", 2.0)
+
+        reloaded = Cassette(path)
+        assert len(reloaded) == 1
+        entry = reloaded.get("GET https://x/a")
+        assert entry["status"] == 200 and "base64" in entry
+
+
+def test_truncated_cassette_keeps_earlier_entries():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "c.jsonl.gz"
+        cassette = Cassette(str(path))
+        for i in range(3):
+            cassette.add(f"GET https://x/{i}", 200, {}, b"ok", 1.0)
+        size = path.stat().st_size
+        cassette.add("GET https://x/last", 200, {}, b"x" * 1000, 1.0)
+
+        # Crash halfway through writing the last member
+        data = path.read_bytes()
+        path.write_bytes(data[:size + (len(data) - size) // 2])
+
+        reloaded = Cassette(str(path))
+        print(f"Entries after truncation: {len(reloaded)}")
+        assert len(reloaded) == 3
+        assert reloaded.get("GET https://x/2")["status"] == 200
+        assert reloaded.get("GET https://x/last") is None
+
+
+if __name__ == "__main__":
+    test_request_key_normalizes_query()
+    test_record_then_replay_offline()
+    test_latest_recording_wins()
+    test_truncated_cassette_keeps_earlier_entries()
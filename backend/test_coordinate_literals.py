@@ -0,0 +1,126 @@
+"""Test coordinate literals resolved by geocode() without calling Nominatim."""
+import asyncio
+
+from app.config import get_settings
+from app.services import geocoding_service
+from app.services.cache_service import geocode_cache
+from app.utils.coordinates import decode_plus_code, parse_coordinates
+
+
+def _close(point, expected, tolerance=1e-4):
+    return (
+        point is not None
+        and abs(point[0] - expected[0]) < tolerance
+        and abs(point[1] - expected[1]) < tolerance
+    )
+
+
+def test_parse_formats():
+    print("🧪 Testing coordinate literal formats\n")
+
+    nyc = (40.7128, -74.0060)
+    cases = [
+        "40.7128, -74.0060",
+        "40.7128 -74.0060",
+        "(40.7128; -74.0060)",
+        "40.7128 N 74.0060 W",
+        "40.7128N, 74.0060W",
+        "74.0060 W 40.7128 N",
+        "N40.7128 W74.0060",
+        "n 40.7128 w 74.0060",
+        "40°42'46.08\"N 74°0'21.6\"W",
+        "40° 42′ 46.08″ N, 74° 0′ 21.6″ W",
+        "40.7128° -74.0060°",
+        "geo:40.7128,-74.0060",
+        "geo:40.7128,-74.0060,12;u=35",
+    ]
+    for text in cases:
+        point = parse_coordinates(text)
+        print(f"  {text!r:40} → {point}")
+        assert _close(point, nyc), text
+
+    print("\n✅ All formats parsed\n")
+
+
+def test_plus_codes():
+    print("🧪 Testing plus code decoding\n")
+
+    # Reference values from the Open Location Code test data
+    assert _close(decode_plus_code("8FVC9G8F+6X"), (47.3655625, 8.5249375), 1e-6)
+    assert _close(decode_plus_code("8fvc9g8f+6x"), (47.3655625, 8.5249375), 1e-6)
+    assert _close(decode_plus_code("87G80000+"), (40.5, -73.5), 1e-6)
+    assert _close(parse_coordinates("87G8Q257+"), (40.75875, -73.98625), 1e-6)
+
+    # Short codes need a locality; padding must be even; latitude digit in range
+    assert decode_plus_code("9G8F+6X") is None
+    assert decode_plus_code("8FVC9G80+") is None
+    assert decode_plus_code("XFVC9G8F+6X") is None
+
+    print("✅ Plus codes decoded\n")
+
+
+def test_place_names_are_not_coordinates():
+    print("🧪 Testing that place names still go to the geocoder\n")
+
+    for text in [
+        "Paris", "New York, NY", "123 Main St", "10 20", "Route 66",
+        "1600 Amphitheatre Pkwy", "95.0, 10", "40 N 74 N", "-40 N, 74 W",
+        "geo:0,0?q=Paris", "", None,
+        # Single numbers and fractions must not be split into a pair
+        "42N", "40.7128N", "75 W", "10001 N", "3/4", "12/25"
+    ]:
+        assert parse_coordinates(text) is None, text
+
+    print("✅ Place names untouched\n")
+
+
+def test_geocode_skips_nominatim():
+    print("🧪 Testing geocode() fast path\n")
+
+    settings = get_settings()
+    original_search = geocoding_service._search_nominatim
+    original_naming = settings.geocode_coordinate_naming
+
+    async def no_network(*args, **kwargs):
+        raise AssertionError("Nominatim should not be called for coordinates")
+
+    geocoding_service._search_nominatim = no_network
+    try:
+        async def scenario():
+            settings.geocode_coordinate_naming = "cache"
+
+            coords = await geocoding_service.geocode("48.8566 N 2.3522 E")
+            assert (coords.latitude, coords.longitude) == (48.8566, 2.3522)
+            assert coords.location_name == "Location (48.86, 2.35)"
+            assert coords.confidence == "high"
+
+            # A reverse geocode already in the cache names the point
+            await geocode_cache.set(
+                geocoding_service.reverse_cache_key(48.8566, 2.3522),
+                "Paris, Île-de-France, France"
+            )
+            coords = await geocoding_service.geocode("geo:48.8566,2.3522")
+            assert coords.location_name == "Paris, Île-de-France, France"
+
+            settings.geocode_coordinate_naming = "none"
+            coords = await geocoding_service.geocode("48.8566, 2.3522")
+            assert coords.location_name == "Location (48.86, 2.35)"
+
+            options = await geocoding_service.search_locations("48.8566, 2.3522")
+            assert len(options) == 1
+            assert options[0].location_type == "coordinates"
+
+        asyncio.run(scenario())
+    finally:
+        geocoding_service._search_nominatim = original_search
+        settings.geocode_coordinate_naming = original_naming
+        geocode_cache.clear()
+
+    print("✅ Coordinates resolved without the geocoder\n")
+
+
+if __name__ == "__main__":
+    test_parse_formats()
+    test_plus_codes()
+    test_place_names_are_not_coordinates()
+    test_geocode_skips_nominatim()
@@ -0,0 +1,98 @@
+"""Test bulk event ingestion (no network)."""
+import json
+import tempfile
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import logging_service as logging_module
+
+
+def _events():
+    weather = {"temperature": 12.0, "precipitation": 0.0}
+    return [
+        {"kind": "preference", "user_id": "u1", "preference_type": "temp_unit", "value": "F",
+         "timestamp": "2025-11-17T08:00:00"},
+        {"kind": "fashion_feedback", "user_id": "u1", "weather_conditions": weather,
+         "tips_shown": ["Bring a jacket"], "feedback": "helpful"},
+        {"kind": "preference", "user_id": "u1", "preference_type": "theme", "value": "dark"},
+        {"kind": "preference", "user_id": "u2", "preference_type": "temp_unit", "value": "C"},
+        {"kind": "location", "user_id": "u2", "latitude": 40.7128, "longitude": -74.006,
+         "location_name": "Batchville, NY", "time_of_day": "morning", "day_of_week": "Monday",
+         "is_weekend": False, "hour": 8, "action": "weather_check", "method": "manual_search"},
+    ]
+
+
+def test_batch_groups_appends():
+    print("🧪 Testing POST /api/events/batch\n")
+
+    original_dir = logging_module.DATA_DIR
+    client = TestClient(app)
+    with tempfile.TemporaryDirectory() as tmp:
+        logging_module.DATA_DIR = Path(tmp)
+        try:
+            # Sent the way sendBeacon does: a text/plain body
+            response = client.post(
+                "/api/events/batch",
+                content=json.dumps({"events": _events()}),
+                headers={"Content-Type": "text/plain;charset=UTF-8"}
+            )
+            print(f"Response: {response.json()}")
+            assert response.status_code == 200
+            assert response.json() == {
+                "status": "success",
+                "accepted": 5,
+                "counts": {"preference": 3, "location": 1, "fashion_feedback": 1},
+                "appends": 4
+            }
+
+            lines = (Path(tmp) / "preferences_u1.jsonl").read_text().splitlines()
+            assert [json.loads(line)["preference_type"] for line in lines] == ["temp_unit", "theme"]
+            assert "kind" not in json.loads(lines[0])
+            assert json.loads(lines[0])["timestamp"] == "2025-11-17 08:00:00"
+            assert (Path(tmp) / "fashion_u1.jsonl").exists()
+            assert (Path(tmp) / "locations_u2.jsonl").exists()
+
+            # Written like the single-event endpoint, so readers see both
+            client.post("/api/preferences", json={"user_id": "u1", "preference_type": "lang", "value": "en"})
+            assert client.get("/api/preferences/u1").json()["preferences"] == {
+                "temp_unit": "F", "theme": "dark", "lang": "en"
+            }
+        finally:
+            logging_module.DATA_DIR = original_dir
+
+    print("✅ One append per user and kind\n")
+
+
+def test_batch_validation():
+    client = TestClient(app)
+
+    response = client.post("/api/events/batch", json={"events": [{"kind": "click", "user_id": "u1"}]})
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"][:2] == ["events", 0]
+
+    # A missing field fails the whole batch, pointing at the event
+    events = _events()
+    del events[3]["value"]
+    response = client.post("/api/events/batch", json={"events": events})
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["events", 3, "preference", "value"]
+
+    assert client.post("/api/events/batch", json={"events": []}).status_code == 422
+    assert client.post("/api/events/batch", content=b"not json").status_code == 422
+
+    too_big = json.dumps({"events": _events() * 2000})
+    assert client.post("/api/events/batch", content=too_big).status_code == 413
+
+    # Chunked, without a Content-Length: counted while streaming
+    def chunks():
+        for i in range(0, len(too_big), 65536):
+            yield too_big[i:i + 65536].encode()
+
+    assert client.post("/api/events/batch", content=chunks()).status_code == 413
+
+
+if __name__ == "__main__":
+    test_batch_groups_appends()
+    test_batch_validation()
@@ -0,0 +1,164 @@
+"""Test running fashion feedback counters and personalized tips (no network)."""
+import asyncio
+import json
+import tempfile
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from app.config import get_settings
+from app.main import app
+from app.services import logging_service as logging_module
+from app.services.fashion_service import fashion_service
+from app.services.feedback_service import ALL_WEATHER, FeedbackAggregator, feedback_aggregator, tip_key
+
+# 12°C, dry, windy: rule order is
+# ["Perfect for outdoor activities", "Bring a light layer for evening", WIND_TIP, wind chill]
+WINDY = {"temperature": 12.0, "precipitation": 0.0, "wind_speed": 30.0, "uv_index": 1.0}
+
+
+def test_counters_and_ranking():
+    print("🧪 Testing feedback counters and tip ranking\n")
+
+    aggregator = FeedbackAggregator()
+    bucket = fashion_service.weather_bucket(WINDY)
+    tips = fashion_service.get_recommendations(WINDY)["tips"]
+    print(f"Rule order: {tips}")
+
+    for _ in range(3):
+        aggregator.observe("alice", [tips[0]], bucket, "not_helpful")
+    aggregator.observe("alice", [tips[2]], bucket, "helpful")
+    assert not aggregator.observe("alice", tips, bucket, "meh")
+
+    assert aggregator.counts(tips[0], bucket, "alice") == (0, 3, 0)
+    assert aggregator.counts(tips[0]) == (0, 3, 0)
+    assert aggregator.counts(tips[0], bucket, "bob") == (0, 0, 0)
+
+    # Measured values do not split a tip's counters
+    assert tip_key("💨 Windy (30.0 km/h) - secure loose items") == tip_key("💨 Windy (42 km/h) - secure loose items")
+
+    ranked = aggregator.rank(tips, "alice", bucket)
+    print(f"alice: {ranked}")
+    assert tips[0] not in ranked
+    assert ranked[0] == tips[2]
+
+    # Other users: nothing hidden, the global rate only reorders
+    ranked = aggregator.rank(tips, "bob", bucket)
+    assert sorted(ranked) == sorted(tips) and ranked[-1] == tips[0]
+
+    # Without a vote in this weather, the user's all-weather counts apply
+    other_bucket = fashion_service.weather_bucket({"temperature": 28.0})
+    assert aggregator.rank([tips[0], "Stay hydrated"], "alice", other_bucket) == ["Stay hydrated"]
+
+    # At least one tip always survives
+    assert aggregator.rank([tips[0]], "alice", bucket) == [tips[0]]
+    print("✅ Rejected tips hidden, helpful tips first\n")
+
+
+def test_snapshot_and_history():
+    with tempfile.TemporaryDirectory() as tmp:
+        log_dir = Path(tmp) / "logs"
+        log_dir.mkdir()
+        with open(log_dir / "fashion_carol.jsonl", "w") as f:
+            for feedback in ("helpful", "ignored", "not_helpful"):
+                f.write(json.dumps({
+                    "user_id": "carol",
+                    "weather_conditions": WINDY,
+                    "tips_shown": ["Layering is key"],
+                    "feedback": feedback
+                }) + "\n")
+            # A damaged line only loses itself
+            f.write('{"user_id": "carol", "feedb\n')
+            f.write(json.dumps({
+                "user_id": "carol", "weather_conditions": WINDY,
+                "tips_shown": ["Layering is key"], "feedback": "helpful"
+            }) + "\n")
+
+        snapshot = Path(tmp) / "index" / "fashion_feedback.json"
+        built = FeedbackAggregator(snapshot_every=1)
+        built.load(snapshot, log_dir, fashion_service.weather_bucket)
+        assert built.events == 4 and snapshot.exists()
+        assert built.counts("Layering is key", ALL_WEATHER, "carol") == (2, 1, 1)
+
+        built.observe("carol", ["Layering is key"], 0, "helpful")
+
+        # Events seen before loading finishes are kept, not replaced
+        loaded = FeedbackAggregator()
+        loaded.observe("dave", ["Layering is key"], 0, "not_helpful")
+        loaded.load(snapshot, Path(tmp) / "missing", fashion_service.weather_bucket)
+        assert loaded.events == 6
+        assert loaded.counts("Layering is key", ALL_WEATHER, "carol") == (3, 1, 1)
+        assert loaded.counts("Layering is key", ALL_WEATHER, "dave") == (0, 1, 0)
+        assert loaded.counts("Layering is key") == (3, 2, 1)
+
+        # Periodic snapshots from the event loop are written in a thread
+        async def updates():
+            # dave's vote is not in the snapshot yet: this makes two
+            loaded._snapshots.every = 2
+            loaded.observe("erin", ["Layering is key"], 0, "helpful")
+            assert loaded._snapshots.saving is not None
+            await loaded._snapshots.saving
+
+        asyncio.run(updates())
+        assert json.loads(snapshot.read_text())["events"] == 7
+
+
+def test_user_counters_are_bounded():
+    settings = get_settings()
+    original = settings.fashion_feedback_max_users
+    settings.fashion_feedback_max_users = 2
+    try:
+        aggregator = FeedbackAggregator()
+        for user_id in ("a", "b", "a", "c"):
+            aggregator.observe(user_id, ["Layering is key"], 0, "helpful")
+
+        # "b" was the least recently active; global counts keep its vote
+        assert len(aggregator) == 2
+        assert aggregator.counts("Layering is key", ALL_WEATHER, "b") == (0, 0, 0)
+        assert aggregator.counts("Layering is key", ALL_WEATHER, "a") == (2, 0, 0)
+        assert aggregator.counts("Layering is key") == (4, 0, 0)
+    finally:
+        settings.fashion_feedback_max_users = original
+
+
+def test_personalized_endpoint():
+    print("🧪 Testing personalized /api/fashion/recommendations\n")
+
+    client = TestClient(app)
+    original_dir = logging_module.DATA_DIR
+    feedback_aggregator.clear()
+    with tempfile.TemporaryDirectory() as tmp:
+        logging_module.DATA_DIR = Path(tmp)
+        try:
+            plain = client.post("/api/fashion/recommendations", json=WINDY).json()["recommendations"]["tips"]
+            for _ in range(3):
+                response = client.post("/api/feedback/fashion", json={
+                    "user_id": "dave",
+                    "weather_conditions": WINDY,
+                    "tips_shown": [plain[1]],
+                    "feedback": "not_helpful"
+                })
+                assert response.status_code == 200
+
+            personalized = client.post(
+                "/api/fashion/recommendations",
+                json={**WINDY, "user_id": "dave", "personalized": True}
+            ).json()["recommendations"]["tips"]
+            print(f"dave: {personalized}")
+            assert plain[1] not in personalized and len(personalized) == len(plain) - 1
+
+            # Not asked for: the rule output is unchanged
+            again = client.post("/api/fashion/recommendations", json={**WINDY, "user_id": "dave"})
+            assert again.json()["recommendations"]["tips"] == plain
+        finally:
+            logging_module.DATA_DIR = original_dir
+            feedback_aggregator.clear()
+
+    print("✅ Tips personalized from in-memory counters\n")
+
+
+if __name__ == "__main__":
+    test_counters_and_ranking()
+    test_snapshot_and_history()
+    test_user_counters_are_bounded()
+    test_personalized_endpoint()
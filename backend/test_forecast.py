@@ -0,0 +1,219 @@
+"""Test the columnar forecast store and /api/weather/forecast (no network)."""
+import asyncio
+import math
+from datetime import datetime, timezone
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import weather_service
+from app.services.forecast_service import CellForecast, ForecastStore
+
+# Monday 2025-11-17 00:00 UTC
+T0 = int(datetime(2025, 11, 17, tzinfo=timezone.utc).timestamp())
+
+
+def make_open_meteo_payload(hours=48, lat=40.71, lon=-74.01):
+    """Open-Meteo forecast response shaped like timeformat=unixtime."""
+    times = [T0 + i * 3600 for i in range(hours)]
+    return {
+        "latitude": lat,
+        "longitude": lon,
+        "utc_offset_seconds": -18000,
+        "hourly": {
+            "time": times,
+            "temperature_2m": [10 + (i % 24) * 0.5 for i in range(hours)],
+            # Rain between 13:00 and 15:59 on day one
+            "precipitation": [1.5 if 13 <= i < 16 else 0.0 for i in range(hours)],
+            "precipitation_probability": [80 if 13 <= i < 16 else 5 for i in range(hours)],
+            "relative_humidity_2m": [70] * hours,
+            "wind_speed_10m": [12.0] * (hours - 1) + [None],
+            "uv_index": [min(8, i % 24 / 2) for i in range(hours)],
+        },
+        "daily": {
+            "time": [T0, T0 + 86400],
+            "temperature_2m_max": [21.5, 21.5],
+            "temperature_2m_min": [10.0, 10.0],
+            "precipitation_sum": [4.5, 0.0],
+            "precipitation_probability_max": [80, 5],
+            "wind_speed_10m_max": [12.0, 12.0],
+            "uv_index_max": [8.0, 8.0],
+        },
+    }
+
+
+def test_cell_forecast_windows():
+    print("🧪 Testing forecast window aggregates\n")
+    
+    forecast = CellForecast.from_open_meteo(make_open_meteo_payload())
+    print(f"{forecast.hours} hours stored in {forecast.nbytes} bytes")
+    assert forecast.hours == 48
+    assert forecast.nbytes < 4096
+    
+    afternoon_start = T0 + 12 * 3600
+    afternoon_end = T0 + 18 * 3600
+    assert forecast.window_sum("precipitation", afternoon_start, afternoon_end) == 4.5
+    assert forecast.window_max("precipitation_probability", afternoon_start, afternoon_end) == 80
+    assert forecast.window_min("temperature_2m", afternoon_start, afternoon_end) == 16.0
+    
+    # Missing samples are NaN and skipped by aggregates
+    assert math.isnan(forecast.hourly["wind_speed_10m"][-1])
+    assert forecast.window_max("wind_speed_10m", T0 + 40 * 3600, T0 + 60 * 3600) == 12.0
+    
+    # Windows are clipped to the forecast
+    assert forecast.index_range(T0 - 7200, T0 + 3600) == (0, 1)
+    assert forecast.index_range(T0 + 100 * 3600, T0 + 200 * 3600) == (48, 48)
+
+
+def test_store_shares_one_upstream_call():
+    calls = []
+    
+    async def fake_fetch(latitude, longitude):
+        calls.append((latitude, longitude))
+        await asyncio.sleep(0.01)
+        return CellForecast.from_open_meteo(make_open_meteo_payload(lat=latitude, lon=longitude))
+    
+    async def run():
+        store = ForecastStore(fake_fetch)
+        results = await asyncio.gather(*(store.get(40.7128, -74.0060) for _ in range(10)))
+        assert all(r is results[0] for r in results)
+        # Same cell, slightly different point: served from memory
+        await store.get(40.7129, -74.0061)
+    
+    asyncio.run(run())
+    
+    print(f"Upstream calls for 11 requests: {len(calls)}")
+    assert len(calls) == 1
+
+
+def test_store_survives_cancelled_leader():
+    calls = []
+    
+    async def fake_fetch(latitude, longitude):
+        calls.append((latitude, longitude))
+        await asyncio.sleep(0.05)
+        return CellForecast.from_open_meteo(make_open_meteo_payload(lat=latitude, lon=longitude))
+    
+    async def run():
+        store = ForecastStore(fake_fetch)
+        leader = asyncio.create_task(store.get(40.7128, -74.0060))
+        await asyncio.sleep(0)
+        waiters = [asyncio.create_task(store.get(40.7128, -74.0060)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        
+        # The waiters do not hang: one of them takes over the fetch
+        results = await asyncio.wait_for(asyncio.gather(*waiters), timeout=1.0)
+        assert leader.cancelled()
+        assert all(r is results[0] for r in results)
+        assert not store._inflight
+    
+    asyncio.run(run())
+    
+    print(f"Upstream calls after cancelling the leader: {len(calls)}")
+    assert len(calls) == 2
+
+
+def test_forecast_endpoint():
+    print("🧪 Testing GET /api/weather/forecast\n")
+    
+    forecast = CellForecast.from_open_meteo(make_open_meteo_payload())
+    weather_service.forecast_store.put(40.7128, -74.0060, forecast)
+    forecast.fetched_at = datetime.now().timestamp()
+    
+    client = TestClient(app)
+    response = client.get("/api/weather/forecast", params={
+        "latitude": 40.7128,
+        "longitude": -74.0060,
+        "start": "2025-11-17T12:00:00Z",
+        "hours": 6,
+        "days": 2
+    })
+    data = response.json()
+    
+    print(f"Status: {response.status_code}, summary: {data.get('summary')}")
+    assert response.status_code == 200
+    assert len(data["hourly"]) == 6
+    assert data["summary"]["will_rain"] is True
+    assert data["summary"]["precipitation_sum"] == 4.5
+    assert len(data["daily"]) == 2
+    
+    response = client.get("/api/weather/forecast", params={"latitude": 40.7})
+    assert response.status_code == 400
+
+
+def test_interpolate_current_conditions():
+    forecast = CellForecast.from_open_meteo(make_open_meteo_payload())
+    
+    # 12:30 on day one: halfway between 16.0 and 16.5 degrees
+    values = forecast.interpolate(T0 + 12.5 * 3600)
+    assert abs(values["temperature_2m"] - 16.25) < 1e-6
+    assert values["relative_humidity_2m"] == 70
+    
+    # Last sample has no wind: fall back to the neighbour
+    values = forecast.interpolate(T0 + 46.5 * 3600)
+    assert values["wind_speed_10m"] == 12.0
+    
+    assert forecast.interpolate(T0 + 47 * 3600) is not None
+    assert forecast.interpolate(T0 - 1) is None
+    assert forecast.interpolate(T0 + 48 * 3600) is None
+    
+    weather = weather_service.weather_from_forecast(forecast, T0 + 13.5 * 3600)
+    print(f"Derived: {weather}")
+    assert weather.derived
+    assert weather.precipitation == 1.5
+    assert weather.timestamp == datetime(2025, 11, 17, 13, 30)
+
+
+def test_derived_mode_skips_live_call():
+    calls = []
+    
+    async def fake_fetch(latitude, longitude):
+        calls.append("forecast")
+        payload = make_open_meteo_payload(lat=latitude, lon=longitude)
+        # Shift so the forecast covers the current hour
+        start = int(datetime.now(timezone.utc).timestamp()) // 3600 * 3600 - 3600
+        payload["hourly"]["time"] = [start + i * 3600 for i in range(48)]
+        return CellForecast.from_open_meteo(payload)
+    
+    async def fake_live(latitude, longitude):
+        calls.append("live")
+        raise AssertionError("live endpoint should not be called")
+    
+    settings = weather_service.get_settings()
+    original = (
+        settings.weather_current_mode,
+        weather_service.forecast_store,
+        weather_service._fetch_live_weather
+    )
+    settings.weather_current_mode = "derived"
+    weather_service.forecast_store = ForecastStore(fake_fetch)
+    weather_service._fetch_live_weather = fake_live
+    
+    async def run():
+        first = await weather_service.fetch_current_weather(51.5, -0.12, refresh=True)
+        again = await weather_service.fetch_current_weather(51.5, -0.12, refresh=True)
+        return first, again
+    
+    try:
+        first, again = asyncio.run(run())
+    finally:
+        (
+            settings.weather_current_mode,
+            weather_service.forecast_store,
+            weather_service._fetch_live_weather
+        ) = original
+    
+    print(f"Upstream calls: {calls}")
+    assert first.derived and again.derived
+    # Second refresh reuses the cached forecast
+    assert calls == ["forecast"]
+
+
+if __name__ == "__main__":
+    test_cell_forecast_windows()
+    test_store_shares_one_upstream_call()
+    test_store_survives_cancelled_leader()
+    test_forecast_endpoint()
+    test_interpolate_current_conditions()
+    test_derived_mode_skips_live_call()
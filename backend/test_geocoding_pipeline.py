@@ -0,0 +1,146 @@
+"""Test the geocoding post-processing pipeline against recorded fixtures (no network)."""
+import asyncio
+import json
+import logging
+import random
+
+from app.services import geocoding_service
+from app.services.cache_service import geocode_cache
+from app.services.geocoding_service import SIMILARITY_THRESHOLD_KM
+from app.utils.geo import SpatialGrid, haversine_km
+from app.utils.relevance import QueryMatcher
+from benchmarks.bench_geocoding import run
+from benchmarks.fixtures import FIXTURE_SIZES, expected_path, load_fixture, pipeline_snapshot
+
+
+def test_pipeline_matches_expected():
+    print("🧪 Testing search_locations post-processing on recorded fixtures\n")
+    
+    for size in FIXTURE_SIZES:
+        with open(expected_path(size), "r") as f:
+            expected = json.load(f)
+        
+        actual = pipeline_snapshot(size)
+        
+        print(f"Fixture {size}: {len(actual['deduplicated'])} unique, "
+              f"{len(actual['filtered'])} after confidence filter")
+        assert actual == expected, f"Pipeline output changed for fixture {size}"
+    
+    print("\n✅ Pipeline output unchanged")
+
+
+def test_spatial_grid_finds_all_neighbours():
+    print("🧪 Testing spatial grid against brute-force pairwise distance\n")
+    
+    rng = random.Random(27)
+    points = []
+    # Dense clusters at the equator, mid-latitudes, near the poles and
+    # straddling the antimeridian.
+    for center_lat, center_lon in [(0, 0), (40.7, -74.0), (64.1, -21.9),
+                                   (89.95, 10.0), (-89.97, 0.0), (65.0, 179.99)]:
+        for _ in range(60):
+            points.append((
+                max(-90.0, min(90.0, center_lat + rng.uniform(-0.08, 0.08))),
+                ((center_lon + rng.uniform(-0.4, 0.4) + 180.0) % 360.0) - 180.0
+            ))
+    
+    grid = SpatialGrid(SIMILARITY_THRESHOLD_KM)
+    for index, (lat, lon) in enumerate(points):
+        grid.add(lat, lon, index)
+    
+    missed = 0
+    for lat, lon in points:
+        candidates = set(grid.nearby(lat, lon, SIMILARITY_THRESHOLD_KM))
+        for index, (other_lat, other_lon) in enumerate(points):
+            if haversine_km(lat, lon, other_lat, other_lon) < SIMILARITY_THRESHOLD_KM:
+                if index not in candidates:
+                    missed += 1
+    
+    print(f"Checked {len(points)} points, missed neighbours: {missed}")
+    assert missed == 0
+
+
+def test_haversine_is_latitude_aware():
+    # One degree of longitude shrinks with latitude
+    equator = haversine_km(0, 0, 0, 1)
+    oslo = haversine_km(60, 0, 60, 1)
+    
+    print(f"1° longitude: {equator:.1f}km at equator, {oslo:.1f}km at 60°N")
+    assert 111.0 < equator < 111.4
+    assert 55.4 < oslo < 55.8
+
+
+def test_relevance_scores_are_graded():
+    print("🧪 Testing relevance scoring\n")
+    
+    matcher = QueryMatcher("Brooklyn, NY")
+    exact = matcher.score("Brooklyn, NY", "Brooklyn, Kings County, New York, United States")
+    elsewhere = matcher.score("Brooklyn, MI", "Brooklyn, Jackson County, Michigan, United States")
+    suburb = matcher.score("Metro, NY", "Brooklyn, Metro, New York, United States")
+    unrelated = matcher.score("Brookline, MA", "Brookline, Norfolk County, Massachusetts")
+    
+    print(f"exact={exact:.2f} elsewhere={elsewhere:.2f} suburb={suburb:.2f} unrelated={unrelated:.2f}")
+    assert exact > elsewhere > 0
+    assert exact > suburb > 0
+    assert unrelated == 0
+    
+    # Accents and case are folded, punctuation ignored
+    accented = QueryMatcher("sao paulo").score("São Paulo, Brazil", "São Paulo, Brazil")
+    print(f"accent-folded match={accented:.2f}")
+    assert accented == 1.0
+    
+    # Substring of a word still matches, but weakly
+    partial = QueryMatcher("brook").score("Brooklyn, NY", "Brooklyn, New York")
+    print(f"partial word match={partial:.2f}")
+    assert 0 < partial < exact
+
+
+def test_benchmark_harness_smoke():
+    print("🧪 Smoke-testing the geocoding benchmark harness\n")
+    
+    logging.disable(logging.INFO)
+    try:
+        results = run([10], repeat=2, min_sample_time=0.001)
+    finally:
+        logging.disable(logging.NOTSET)
+    
+    names = [r.name for r in results]
+    print(f"Ran {len(results)} benchmarks: {', '.join(names)}")
+    
+    assert "geocoding/pipeline[10]" in names
+    assert all(r.median_us > 0 for r in results)
+
+
+def test_empty_search_is_not_cached():
+    _, results = load_fixture(10)
+    answers = [[], results]
+    calls = []
+
+    async def fake_search(params, description):
+        calls.append(params["q"])
+        return answers[len(calls) - 1]
+
+    original_search = geocoding_service._search_nominatim
+    geocoding_service._search_nominatim = fake_search
+    try:
+        async def scenario():
+            # A transient empty answer does not hide the place later
+            assert await geocoding_service.search_locations("Brooklyn") == []
+            assert await geocoding_service.search_locations("Brooklyn")
+            assert await geocoding_service.search_locations("Brooklyn")
+
+        asyncio.run(scenario())
+    finally:
+        geocoding_service._search_nominatim = original_search
+        geocode_cache.clear()
+
+    assert calls == ["Brooklyn", "Brooklyn"]
+
+
+if __name__ == "__main__":
+    test_pipeline_matches_expected()
+    test_spatial_grid_finds_all_neighbours()
+    test_haversine_is_latitude_aware()
+    test_relevance_scores_are_graded()
+    test_benchmark_harness_smoke()
+    test_empty_search_is_not_cached()
@@ -0,0 +1,56 @@
+"""Test the internal service records and their conversion at the API boundary."""
+from datetime import datetime
+
+from pydantic_core import to_json
+
+from app.models.internal import LocationRecord, WeatherRecord
+from app.models.schemas import CurrentWeather, LocationOption
+from app.services.cache_service import decode_value, encode_value, pack_value, unpack_value
+from app.services.geocoding_service import _process_search_results
+from benchmarks.fixtures import load_fixture
+
+
+def test_records_serialize_like_models():
+    weather = WeatherRecord(
+        timestamp=datetime(2025, 11, 17, 8, 0),
+        temperature=12.5,
+        precipitation=0.2,
+        wind_speed=14.0,
+        humidity=71.0,
+        uv_index=1.5
+    )
+    model = weather.to_model()
+    assert isinstance(model, CurrentWeather)
+    assert to_json(weather) == model.model_dump_json().encode()
+    # The conversion is what validation would have produced
+    assert CurrentWeather.model_validate(model.model_dump()) == model
+    
+    location = LocationRecord(48.8566, 2.3522, "Paris, Île-de-France, France", "Paris, France", "high", "city")
+    assert to_json(location) == location.to_model().model_dump_json().encode()
+    
+    # Cache codecs bring records back as records
+    for value in [weather, [location, location]]:
+        assert decode_value(encode_value(value)) == value
+        assert unpack_value(pack_value(value)) == value
+
+
+def test_pipeline_produces_records():
+    print("🧪 Testing record-based geocoding pipeline\n")
+    
+    query, results = load_fixture(50)
+    options = _process_search_results(results, query, limit=5, filter_by_confidence=True)
+    
+    assert options and all(isinstance(option, LocationRecord) for option in options)
+    models = [option.to_model() for option in options]
+    assert all(isinstance(model, LocationOption) for model in models)
+    print(f"{len(options)} options: {[o.short_name for o in options]}")
+    
+    # Boosting confidence copies the record instead of editing the group
+    before = [(o.short_name, o.confidence) for o in _process_search_results(results, query, limit=50, filter_by_confidence=False)]
+    after = [(o.short_name, o.confidence) for o in _process_search_results(results, query, limit=50, filter_by_confidence=False)]
+    assert before == after
+
+
+if __name__ == "__main__":
+    test_records_serialize_like_models()
+    test_pipeline_produces_records()
@@ -0,0 +1,117 @@
+"""Test incremental JSON decoding of upstream payloads (no network)."""
+import asyncio
+import json
+import math
+import tracemalloc
+
+from app.services.geocoding_service import ADDRESS_FIELDS, RESULT_FIELDS, read_search_results
+from app.services.weather_service import read_current_payload, read_forecast_payload
+from app.utils.json_stream import JsonStream, JsonStreamError
+from benchmarks.fixtures import load_fixture
+
+
+async def _chunks(body: bytes, size: int):
+    for i in range(0, len(body), size):
+        yield body[i:i + size]
+
+
+def _decode(reader, body, size):
+    return asyncio.run(reader(_chunks(body, size)))
+
+
+def _project(result):
+    picked = {k: result[k] for k in RESULT_FIELDS if k in result}
+    if "address" in result:
+        picked["address"] = {k: v for k, v in result["address"].items() if k in ADDRESS_FIELDS}
+    return picked
+
+
+def test_nominatim_results_any_chunking():
+    print("🧪 Testing streaming Nominatim decoder\n")
+    
+    _, results = load_fixture(50)
+    for result in results:
+        result["extratags"] = {"wikidata": "Q60", 'note': 'a "quoted" ünïcode \\ value'}
+        result["boundingbox"] = ["40.4", "40.9", "-74.2", "-73.7"]
+    body = json.dumps(results, ensure_ascii=False).encode()
+    expected = [_project(r) for r in results]
+    
+    # Chunk boundaries inside numbers, escapes and multi-byte characters
+    for size in (1, 3, 7, 64, 4096, len(body)):
+        assert _decode(read_search_results, body, size) == expected, size
+
+
+def test_forecast_arrays_decode_into_buffers():
+    hours = 16 * 24
+    payload = {
+        "latitude": 40.71,
+        "longitude": -74.01,
+        "generationtime_ms": 0.5,
+        "utc_offset_seconds": -18000,
+        "hourly_units": {"time": "unixtime", "temperature_2m": "°C"},
+        "hourly": {
+            "time": [1763337600 + i * 3600 for i in range(hours)],
+            "temperature_2m": [round(-3.5 + i * 0.1, 1) for i in range(hours)],
+            "uv_index": [None if i % 5 == 0 else 1e-2 * i for i in range(hours)],
+        },
+        "daily": {"time": [1763337600], "temperature_2m_max": [12.25]},
+    }
+    body = json.dumps(payload).encode()
+    
+    for size in (1, 5, 1000):
+        data = _decode(read_forecast_payload, body, size)
+        assert data["utc_offset_seconds"] == -18000
+        assert data["hourly"]["time"].typecode == "d"
+        assert list(data["hourly"]["time"]) == payload["hourly"]["time"]
+        assert data["hourly"]["temperature_2m"].typecode == "f"
+        assert all(
+            abs(a - b) < 1e-4 for a, b in zip(data["hourly"]["temperature_2m"], payload["hourly"]["temperature_2m"])
+        )
+        assert math.isnan(data["hourly"]["uv_index"][0])
+        assert "hourly_units" not in data
+    
+    # Peak memory: typed buffers vs. the whole body as Python objects
+    tracemalloc.start()
+    json.loads(body)
+    _, loads_peak = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    _decode(read_forecast_payload, body, 16 * 1024)
+    _, stream_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"Peak memory: json.loads {loads_peak / 1024:.0f} KB, streaming {stream_peak / 1024:.0f} KB")
+    assert stream_peak < loads_peak
+
+
+def test_current_payload_single_and_batch():
+    one = {"latitude": 40.7, "longitude": -74.0, "current_units": {}, "current": {
+        "time": "2025-11-17T08:00", "interval": 900, "temperature_2m": 4.5, "precipitation": 0.0,
+        "relative_humidity_2m": 80, "uv_index": 0.0}}
+    body = json.dumps(one).encode()
+    data = _decode(read_current_payload, body, 3)
+    assert data["current"]["temperature_2m"] == 4.5
+    assert "interval" not in data["current"]
+    
+    batch = _decode(read_current_payload, json.dumps([one, one]).encode(), 11)
+    assert len(batch) == 2 and batch[1] == data
+
+
+def test_invalid_payloads_raise():
+    async def read_all(body):
+        stream = JsonStream(_chunks(body, 4))
+        value = await stream.value()
+        await stream.end()
+        return value
+    
+    for body in (b'[{"lat": "1"', b'{"a": 1,}', b'[1, 2] x', b'{"a": tru}'):
+        try:
+            asyncio.run(read_all(body))
+        except JsonStreamError:
+            continue
+        raise AssertionError(f"accepted {body!r}")
+
+
+if __name__ == "__main__":
+    test_nominatim_results_any_chunking()
+    test_forecast_arrays_decode_into_buffers()
+    test_current_payload_single_and_batch()
+    test_invalid_payloads_raise()
@@ -0,0 +1,128 @@
+"""Test per-user location profiles and next-location prediction (no network)."""
+import json
+import tempfile
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+from app.config import get_settings
+from app.main import app
+from app.models.schemas import LocationLog
+from app.services.profile_service import LocationProfile, LocationProfileStore
+
+
+def _log(user_id, when, lat, lon, name, time_of_day):
+    return LocationLog(
+        user_id=user_id,
+        timestamp=when,
+        latitude=lat,
+        longitude=lon,
+        location_name=name,
+        time_of_day=time_of_day,
+        day_of_week=when.strftime("%A").lower(),
+        is_weekend=when.weekday() >= 5,
+        hour=when.hour,
+        action="weather_check",
+        method="auto_location"
+    )
+
+
+def test_profile_prefers_recent_and_bucketed_locations():
+    print("🧪 Testing decayed location scores\n")
+    
+    profile = LocationProfile(half_life_seconds=7 * 86400, cell_deg=0.01)
+    start = datetime(2025, 1, 1, 8)
+    
+    # Old habit: mornings at the old office, five weeks ago
+    for day in range(10):
+        profile.observe(_log("u", start + timedelta(days=day), 40.7500, -73.9900, "Old Office", "morning"))
+    # New habit: mornings at the new office, last few days
+    for day in range(40, 44):
+        profile.observe(_log("u", start + timedelta(days=day), 40.6800, -73.9400, "New Office", "morning"))
+    # Evenings at home
+    for day in range(40, 42):
+        profile.observe(_log("u", start + timedelta(days=day, hours=11), 40.7000, -74.0100, "Home", "evening"))
+    
+    morning, confidence, bucket = profile.predict("morning")
+    print(f"morning → {morning.location_name} ({confidence:.0%}, bucket={bucket})")
+    assert morning.location_name == "New Office"
+    
+    evening, _, _ = profile.predict("evening")
+    assert evening.location_name == "Home"
+    
+    # Unknown bucket falls back to the all-day bucket
+    night, _, bucket = profile.predict("night")
+    assert bucket == "all" and night is not None
+
+
+def test_profile_rescales_over_long_histories():
+    profile = LocationProfile(half_life_seconds=3600, cell_deg=0.01)
+    start = datetime(2020, 1, 1)
+    for day in range(0, 400, 5):
+        profile.observe(_log("u", start + timedelta(days=day), 10.0, 10.0, "A", "morning"))
+    profile.observe(_log("u", start + timedelta(days=401), 20.0, 20.0, "B", "morning"))
+    
+    best, confidence, _ = profile.predict("morning")
+    print(f"After 400 days: {best.location_name} ({confidence:.0%})")
+    assert best.location_name == "B"
+    assert 0 < confidence <= 1
+
+
+def test_store_lazy_loads_and_updates_incrementally():
+    print("🧪 Testing lazy-loaded profile store\n")
+    
+    settings = get_settings()
+    original_log_dir = settings.log_dir
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        settings.log_dir = tmp
+        try:
+            when = datetime(2025, 6, 2, 8)
+            with open(f"{tmp}/locations_user_a.jsonl", "w") as f:
+                log = _log("user_a", when, 51.5074, -0.1278, "London", "morning")
+                f.write(json.dumps(log.dict(), default=str) + "\n")
+                # A damaged line does not lose the lines after it
+                f.write('{"user_id": "user_a", "latit\n')
+                f.write(json.dumps({"user_id": "user_a"}) + "\n")
+                log = _log("user_a", when + timedelta(minutes=5), 51.5074, -0.1278, "London", "morning")
+                f.write(json.dumps(log.model_dump(), default=str) + "\n")
+            
+            store = LocationProfileStore()
+            
+            # Not resident yet: observe() is a no-op, the file is the source of truth
+            store.observe(_log("user_b", when, 1.0, 1.0, "Nowhere", "morning"))
+            assert len(store) == 0
+            
+            cell, _, _ = store.predict("user_a", "morning")
+            assert cell.location_name == "London"
+            assert len(store) == 1
+            assert store.get("user_a").visits == 2
+            
+            # Resident: updated in place
+            for day in range(1, 4):
+                store.observe(_log("user_a", when + timedelta(days=day), 48.8566, 2.3522, "Paris", "morning"))
+            cell, _, _ = store.predict("user_a", "morning")
+            print(f"user_a morning → {cell.location_name}")
+            assert cell.location_name == "Paris"
+            
+            client = TestClient(app)
+            from app.services import profile_service
+            profile_service.location_profiles._profiles.pop("user_a", None)
+            response = client.get("/api/locations/predicted/user_a", params={"time_of_day": "morning"})
+            data = response.json()
+            print(f"Endpoint: {data}")
+            assert response.status_code == 200
+            assert data["prediction"]["location_name"] == "London"
+            
+            response = client.get("/api/locations/predicted/nobody")
+            assert response.json()["prediction"] is None
+            
+            assert client.get("/api/locations/predicted/user_a", params={"time_of_day": "brunch"}).status_code == 400
+        finally:
+            settings.log_dir = original_log_dir
+
+
+if __name__ == "__main__":
+    test_profile_prefers_recent_and_bucketed_locations()
+    test_profile_rescales_over_long_histories()
+    test_store_lazy_loads_and_updates_incrementally()
@@ -0,0 +1,115 @@
+"""Test the location type-ahead index (no network)."""
+import asyncio
+import json
+import tempfile
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.suggest_service import PrefixIndex, suggest_index
+
+
+def test_prefix_index_ranks_by_popularity():
+    print("🧪 Testing prefix index ranking\n")
+    
+    index = PrefixIndex()
+    index.record("Brooklyn, NY", "Brooklyn, Kings County, New York, United States", 40.65, -73.95)
+    index.record("Brooklyn, NY", "Brooklyn, Kings County, New York, United States", 40.65, -73.95)
+    index.record("Brookline, MA", "Brookline, Norfolk County, Massachusetts", 42.33, -71.12)
+    index.record("New York, NY", "New York, New York, United States", 40.71, -74.00)
+    index.record("São Paulo, Brazil", "São Paulo, Brazil", -23.55, -46.63)
+    
+    results = index.suggest("brook")
+    print(f"'brook' → {[r.short_name for r in results]}")
+    assert [r.short_name for r in results] == ["Brooklyn, NY", "Brookline, MA"]
+    
+    # Matches any word start, ignores accents and punctuation
+    assert [r.short_name for r in index.suggest("york")] == ["New York, NY"]
+    assert [r.short_name for r in index.suggest("New Yo")] == ["New York, NY"]
+    assert [r.short_name for r in index.suggest("sao")] == ["São Paulo, Brazil"]
+    assert index.suggest("zzz") == []
+    
+    # Cached results are invalidated by updates to locations they match...
+    index.suggest("sao")
+    index.suggest("b")
+    index.record("Brookline, MA", "Brookline, Norfolk County, Massachusetts", 42.33, -71.12, weight=5)
+    assert index.suggest("brook")[0].short_name == "Brookline, MA"
+    index.record("Maple Brook, MN", "Maple Brook, Minnesota", 46.0, -94.0, weight=9)
+    assert index.suggest("brook")[0].short_name == "Maple Brook, MN"
+    # ...and only those
+    assert "sao" in index._cache and "b" not in index._cache
+
+
+def test_snapshot_and_history():
+    print("🧪 Testing snapshot round-trip and history rebuild\n")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        log_dir = Path(tmp) / "logs"
+        log_dir.mkdir()
+        with open(log_dir / "locations_user_1.jsonl", "w") as f:
+            # Bad lines are skipped without losing the rest of the file
+            f.write("{truncated\n")
+            f.write(json.dumps({"latitude": 1.0}) + "\n")
+            for _ in range(3):
+                f.write(json.dumps({
+                    "location_name": "Paris, Île-de-France, France",
+                    "latitude": 48.85, "longitude": 2.35
+                }) + "\n")
+            # Bare coordinates are not suggested
+            f.write(json.dumps({
+                "location_name": "Location (48.86, 2.35)",
+                "latitude": 48.86, "longitude": 2.35
+            }) + "\n")
+        
+        snapshot = Path(tmp) / "index" / "suggest.json"
+        
+        built = PrefixIndex()
+        built.load(snapshot, log_dir)
+        assert snapshot.exists()
+        assert built.suggest("par")[0].popularity == 3
+        
+        # Loading adds to what was recorded before it finished
+        loaded = PrefixIndex()
+        loaded.record("Paris, France", "Paris, Île-de-France, France", 48.85, 2.35)
+        loaded.load(snapshot, log_dir)
+        print(f"Loaded {len(loaded)} location(s) from snapshot")
+        assert len(loaded) == 1
+        assert loaded.suggest("par")[0].popularity == 4
+        entry = loaded.suggest("paris")[0]
+        assert (entry.short_name, entry.location_name) == ("Paris, France", "Paris, Île-de-France, France")
+        
+        # Periodic snapshots from the event loop are written in a thread
+        # (the record made before loading is not in the snapshot yet)
+        towns = loaded._snapshots.every - loaded._snapshots.dirty
+        
+        async def updates():
+            for i in range(towns):
+                loaded.record(f"Town {i}", f"Town {i}", 1.0, 1.0)
+            assert loaded._snapshots.saving is not None
+            await loaded._snapshots.saving
+        
+        asyncio.run(updates())
+        assert len(json.loads(snapshot.read_text())["entries"]) == 1 + towns
+
+
+def test_suggest_endpoint():
+    print("🧪 Testing GET /api/location/suggest\n")
+    
+    suggest_index.record("Springfield, IL", "Springfield, Sangamon County, Illinois, United States", 39.8, -89.64)
+    
+    client = TestClient(app)
+    response = client.get("/api/location/suggest", params={"prefix": "spring"})
+    data = response.json()
+    
+    print(f"Status: {response.status_code}, suggestions: {data['suggestions']}")
+    assert response.status_code == 200
+    assert data["suggestions"][0]["short_name"] == "Springfield, IL"
+    
+    assert client.get("/api/location/suggest", params={"prefix": ""}).status_code == 422
+
+
+if __name__ == "__main__":
+    test_prefix_index_ranks_by_popularity()
+    test_snapshot_and_history()
+    test_suggest_endpoint()
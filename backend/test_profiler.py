@@ -0,0 +1,121 @@
+"""Test the admin sampling profiler and per-request cProfile (no network)."""
+import threading
+from collections import Counter
+
+from fastapi.testclient import TestClient
+
+from app.config import get_settings
+from app.main import app
+from app.services.profiler_service import collapsed, speedscope, stack_sampler
+
+TOKEN = "test-admin-token"
+
+
+def spin_until(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_admin_disabled_without_token():
+    settings = get_settings()
+    original = settings.admin_token
+    settings.admin_token = ""
+    try:
+        client = TestClient(app)
+        assert client.post("/admin/profile", params={"seconds": 0.1}).status_code == 404
+        response = client.get("/api/health", headers={"X-Profile": "1", "X-Admin-Token": ""})
+        assert response.json()["status"] == "healthy"
+    finally:
+        settings.admin_token = original
+
+
+def test_sampling_profile():
+    print("🧪 Testing POST /admin/profile\n")
+
+    settings = get_settings()
+    original = settings.admin_token
+    settings.admin_token = TOKEN
+    stop = threading.Event()
+    worker = threading.Thread(target=spin_until, args=(stop,), name="busy-worker")
+    worker.start()
+    try:
+        client = TestClient(app)
+        auth = {"X-Admin-Token": TOKEN}
+
+        assert client.post("/admin/profile", params={"seconds": 0.1}).status_code == 403
+        assert client.post("/admin/profile", params={"seconds": 1e6}, headers=auth).status_code == 400
+
+        response = client.post("/admin/profile", params={"seconds": 0.3, "interval_ms": 2}, headers=auth)
+        assert response.status_code == 200
+        assert int(response.headers["X-Profile-Samples"]) > 10
+        busy = [line for line in response.text.splitlines() if line.startswith("busy-worker;")]
+        print(f"Hottest busy-worker stack: {busy[0][-80:]}")
+        assert any("test_profiler:spin_until" in line for line in busy)
+
+        response = client.post(
+            "/admin/profile",
+            params={"seconds": 0.2, "format": "speedscope"},
+            headers=auth
+        )
+        profile = response.json()
+        assert profile["$schema"].startswith("https://www.speedscope.app/")
+        names = {frame["name"] for frame in profile["shared"]["frames"]}
+        assert "test_profiler:spin_until" in names
+        assert "busy-worker" in [p["name"] for p in profile["profiles"]]
+
+        # One profile at a time
+        assert stack_sampler.try_lock()
+        try:
+            assert client.post("/admin/profile", params={"seconds": 0.1}, headers=auth).status_code == 409
+        finally:
+            stack_sampler.unlock()
+    finally:
+        stop.set()
+        worker.join()
+        settings.admin_token = original
+
+    assert not stack_sampler.busy
+    print("✅ Collapsed stacks and speedscope JSON returned\n")
+
+
+def test_request_cprofile():
+    print("🧪 Testing X-Profile on a single request\n")
+
+    settings = get_settings()
+    original = settings.admin_token
+    settings.admin_token = TOKEN
+    try:
+        client = TestClient(app)
+        response = client.get("/api/health", headers={"X-Profile": "tottime", "X-Admin-Token": TOKEN})
+        assert response.status_code == 200
+        assert response.headers["X-Profile-Status"] == "200"
+        assert "function calls" in response.text
+        assert "health_check" in response.text
+
+        # Wrong token: a normal response
+        response = client.get("/api/health", headers={"X-Profile": "1", "X-Admin-Token": "nope"})
+        assert response.json()["status"] == "healthy"
+    finally:
+        settings.admin_token = original
+
+    print("✅ pstats returned for the profiled request only\n")
+
+
+def test_output_formats():
+    counts = Counter({"MainThread;a:f (a.py:1);b:g (b.py:2)": 3, "MainThread;a:f (a.py:1)": 1})
+    assert collapsed(counts) == "MainThread;a:f (a.py:1);b:g (b.py:2) 3\nMainThread;a:f (a.py:1) 1\n"
+
+    profile = speedscope(counts, 0.01)
+    assert profile["shared"]["frames"] == [
+        {"name": "a:f", "file": "a.py", "line": 1},
+        {"name": "b:g", "file": "b.py", "line": 2}
+    ]
+    assert profile["profiles"][0]["samples"] == [[0, 1], [0]]
+    assert profile["profiles"][0]["weights"] == [0.03, 0.01]
+
+
+if __name__ == "__main__":
+    test_admin_disabled_without_token()
+    test_sampling_profile()
+    test_request_cprofile()
+    test_output_formats()
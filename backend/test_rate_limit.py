@@ -0,0 +1,203 @@
+"""Test GCRA rate limiting per user and per IP (no network)."""
+import asyncio
+import json
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from app.config import get_settings
+from app.main import app
+from app.services.ratelimit_service import (
+    MemoryRateStore,
+    RateLimiter,
+    RateLimitMiddleware,
+    SQLiteRateStore,
+    gcra,
+    rate_limiter
+)
+
+
+def test_gcra_burst_and_refill():
+    print("🧪 Testing GCRA burst and steady rate\n")
+
+    store = MemoryRateStore()
+    # 6 per minute: one every 10 s, bursts of up to 6
+    bucket = [("k", 6, 10.0)]
+    decisions = [store.check(bucket, now=1000.0)[0] for _ in range(7)]
+    assert [d.allowed for d in decisions] == [True] * 6 + [False]
+    assert [d.remaining for d in decisions[:6]] == [5, 4, 3, 2, 1, 0]
+    assert abs(decisions[-1].retry_after - 10.0) < 1e-9
+
+    # One slot back after one interval, and the key is a single float
+    assert store.check(bucket, now=1010.0)[0].allowed
+    assert not store.check(bucket, now=1010.0)[0].allowed
+    assert len(store) == 1
+
+    # A request rejected by one bucket does not use up the other
+    user, ip = ("user", 1, 60.0), ("ip", 2, 30.0)
+    assert all(d.allowed for d in store.check([user, ip], now=1010.0))
+    assert [d.allowed for d in store.check([user, ip], now=1010.0)] == [False, True]
+    assert store.check([ip], now=1010.0)[0].allowed
+
+    # Idle keys (bucket full again) are swept
+    assert store.sweep(now=2000.0) == 3
+    assert len(store) == 0
+
+    allowed, tat, wait = gcra(None, 0.0, 1.0, 1)
+    assert allowed and tat == 1.0 and wait == 0.0
+    print("✅ GCRA behaves\n")
+
+
+def test_sqlite_store_is_shared():
+    print("🧪 Testing SQLite rate store shared between workers\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "ratelimit.sqlite3")
+        worker_a, worker_b = SQLiteRateStore(path), SQLiteRateStore(path)
+        try:
+            bucket = [("k", 2, 30.0)]
+            assert worker_a.check(bucket, now=100.0)[0].allowed
+            assert worker_b.check(bucket, now=100.0)[0].allowed
+            assert not worker_a.check(bucket, now=100.0)[0].allowed
+            assert worker_b.sweep(now=1000.0) == 1
+        finally:
+            worker_a.close()
+            worker_b.close()
+
+    print("✅ Counters shared through SQLite\n")
+
+
+def test_sqlite_store_fails_open():
+    print("🧪 Testing SQLite rate store under lock contention\n")
+
+    settings = get_settings()
+    original_routes = settings.rate_limit_routes
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "ratelimit.sqlite3"
+        store = SQLiteRateStore(str(path), timeout=0.05)
+        limiter = RateLimiter(store)
+        holder = None
+        try:
+            settings.rate_limit_routes = "/limited=1"
+            assert limiter.check("/limited", "u1", None, now=100.0).allowed
+
+            # Another worker holds the write lock
+            holder = sqlite3.connect(path, isolation_level=None)
+            holder.execute("BEGIN IMMEDIATE")
+
+            started = time.monotonic()
+            assert store.check([("k", 1, 60.0)], now=100.0) is None
+            assert asyncio.run(limiter.check_async("/limited", "u1", None)) is None
+            print(f"Two locked checks gave up after {(time.monotonic() - started) * 1000:.0f} ms")
+
+            holder.rollback()
+            assert not limiter.check("/limited", "u1", None, now=100.0).allowed
+        finally:
+            settings.rate_limit_routes = original_routes
+            if holder is not None:
+                holder.close()
+            store.close()
+
+    print("✅ Locked store lets requests through\n")
+
+
+def test_middleware_headers_and_429():
+    print("🧪 Testing rate-limit middleware on /api/location/suggest\n")
+
+    settings = get_settings()
+    original = (settings.rate_limit_routes, settings.rate_limit_ip_multiplier)
+    settings.rate_limit_routes = "/api/location/suggest=3"
+    settings.rate_limit_ip_multiplier = 1.5
+    rate_limiter.store.clear()
+
+    try:
+        client = TestClient(app)
+
+        def suggest(user_id):
+            return client.get(
+                "/api/location/suggest",
+                params={"prefix": "new"},
+                headers={"X-User-Id": user_id}
+            )
+
+        responses = [suggest("alice") for _ in range(4)]
+        print(f"alice: {[r.status_code for r in responses]}")
+        assert [r.status_code for r in responses] == [200, 200, 200, 429]
+        assert [r.headers["RateLimit-Remaining"] for r in responses[:3]] == ["2", "1", "0"]
+        assert responses[0].headers["RateLimit-Limit"] == "3"
+        assert int(responses[3].headers["Retry-After"]) >= 1
+
+        # A fresh user id gets its own bucket, but shares the IP bucket (5)
+        responses = [suggest(f"rotating-{i}") for i in range(3)]
+        print(f"rotating ids: {[r.status_code for r in responses]}")
+        assert [r.status_code for r in responses] == [200, 200, 429]
+
+        # Unlisted routes are not limited
+        assert client.get("/api/health").status_code == 200
+        assert "RateLimit-Limit" not in client.get("/api/health").headers
+    finally:
+        settings.rate_limit_routes, settings.rate_limit_ip_multiplier = original
+        rate_limiter.store.clear()
+
+    print("✅ Limits enforced with standard headers\n")
+
+
+def test_user_id_from_body_is_replayed():
+    print("🧪 Testing user_id read from a JSON body\n")
+
+    seen = {}
+
+    async def downstream(scope, receive, send):
+        message = await receive()
+        seen["body"] = message["body"]
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    settings = get_settings()
+    original = settings.rate_limit_routes
+    settings.rate_limit_routes = "/api/weather/by-coords=1"
+    limiter = RateLimiter(MemoryRateStore())
+    middleware = RateLimitMiddleware(downstream, limiter)
+
+    async def call():
+        body = json.dumps({"latitude": 1.0, "longitude": 2.0, "user_id": "bob"}).encode()
+        messages = [{"type": "http.request", "body": body, "more_body": False}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {
+            "type": "http",
+            "method": "POST",
+            "path": "/api/weather/by-coords",
+            "headers": [],
+            "query_string": b"",
+            "client": None
+        }
+        await middleware(scope, receive, send)
+        return body, sent[0]["status"]
+
+    try:
+        body, status = asyncio.run(call())
+        assert status == 200 and seen["body"] == body
+        _, status = asyncio.run(call())
+        assert status == 429  # same user_id, taken from the body
+    finally:
+        settings.rate_limit_routes = original
+
+    print("✅ Body user_id used and body passed through intact\n")
+
+
+if __name__ == "__main__":
+    test_gcra_burst_and_refill()
+    test_sqlite_store_is_shared()
+    test_sqlite_store_fails_open()
+    test_middleware_headers_and_429()
+    test_user_id_from_body_is_replayed()
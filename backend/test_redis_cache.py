@@ -0,0 +1,224 @@
+"""Test the Redis L2 cache tier against an embedded fake RESP server."""
+import asyncio
+import time
+from datetime import datetime
+
+from app.models.schemas import CurrentWeather
+from app.services.cache_service import (
+    RedisCache, TTLCache, TieredCache, pack_value, unpack_value
+)
+from app.services.redis_client import RedisClient, encode_command, read_reply
+
+
+class FakeRedis:
+    """Just enough of Redis for the cache tier: GET, SET [PX|EX] [NX], DEL, PTTL, PING, EVAL (unlock)."""
+
+    def __init__(self):
+        self.data: dict[bytes, tuple[bytes, float | None]] = {}
+        self.commands = 0
+        self.connections = 0
+        self.delay = 0.0
+
+    def _alive(self, key):
+        item = self.data.get(key)
+        if item and item[1] is not None and item[1] <= time.monotonic():
+            del self.data[key]
+            return None
+        return item
+
+    def handle(self, args: list[bytes]) -> bytes:
+        self.commands += 1
+        command = args[0].upper()
+        if command == b"PING":
+            return b"+PONG\r\n"
+        if command == b"GET":
+            item = self._alive(args[1])
+            if item is None:
+                return b"$-1\r\n"
+            return b"$%d\r\n%s\r\n" % (len(item[0]), item[0])
+        if command == b"SET":
+            key, value, options = args[1], args[2], [a.upper() for a in args[3:]]
+            expires = None
+            if b"PX" in options:
+                expires = time.monotonic() + int(args[3 + options.index(b"PX") + 1]) / 1000
+            if b"EX" in options:
+                expires = time.monotonic() + int(args[3 + options.index(b"EX") + 1])
+            if b"NX" in options and self._alive(key):
+                return b"$-1\r\n"
+            self.data[key] = (value, expires)
+            return b"+OK\r\n"
+        if command == b"DEL":
+            removed = sum(1 for key in args[1:] if self.data.pop(key, None) is not None)
+            return b":%d\r\n" % removed
+        if command == b"PTTL":
+            item = self._alive(args[1])
+            if item is None:
+                return b":-2\r\n"
+            if item[1] is None:
+                return b":-1\r\n"
+            return b":%d\r\n" % int((item[1] - time.monotonic()) * 1000)
+        if command == b"EVAL":
+            # Only the compare-and-delete unlock script is supported
+            key, token = args[3], args[4]
+            item = self._alive(key)
+            if item is not None and item[0] == token:
+                del self.data[key]
+                return b":1\r\n"
+            return b":0\r\n"
+        return b"-ERR unknown command\r\n"
+
+    async def serve(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                args = await read_reply(reader)
+                if self.delay:
+                    await asyncio.sleep(self.delay)
+                writer.write(self.handle(args))
+                await writer.drain()
+        except Exception:
+            writer.close()
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.serve, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        return f"redis://127.0.0.1:{port}/0"
+
+
+def _weather(temperature=11.0):
+    return CurrentWeather(
+        timestamp=datetime(2025, 11, 17, 8, 0),
+        temperature=temperature,
+        precipitation=0.0,
+        wind_speed=5.0,
+        humidity=60.0,
+        uv_index=2.0
+    )
+
+
+def _node(url, ttl=60):
+    return TieredCache(TTLCache(ttl_seconds=ttl), RedisCache(RedisClient(url), "weather", ttl), lock_ttl=2.0)
+
+
+def test_encoding():
+    assert encode_command("SET", "k", b"v", "PX", 100) == b"*5\r\n$3\r\nSET\r\n$1\r\nk\r\n$1\r\nv\r\n$2\r\nPX\r\n$3\r\n100\r\n"
+    packed = pack_value([_weather(), _weather(2.0)])
+    assert unpack_value(packed) == [_weather(), _weather(2.0)]
+    print(f"Packed size: {len(packed)} bytes")
+
+
+def test_cold_node_reads_through_l2():
+    print("🧪 Testing Redis L2 tier\n")
+
+    async def run():
+        fake = FakeRedis()
+        url = await fake.start()
+
+        warm, cold = _node(url), _node(url)
+        await warm.set("current:1:2", _weather())
+
+        # Cold node: L1 miss, L2 hit, then served from its own L1
+        assert await cold.get("current:1:2") == _weather()
+        commands = fake.commands
+        assert await cold.get("current:1:2") == _weather()
+        assert fake.commands == commands
+        assert cold.stats()["l2_hits"] == 1
+        assert 0 < cold.remaining_ttl("current:1:2") <= 60
+
+        await warm.delete("current:1:2")
+        assert await _node(url).get("current:1:2") is None
+
+        fake.server.close()
+
+    asyncio.run(run())
+
+
+def test_singleflight_across_nodes():
+    async def run():
+        fake = FakeRedis()
+        url = await fake.start()
+        nodes = [_node(url) for _ in range(5)]
+        upstream_calls = []
+
+        async def fetch():
+            upstream_calls.append(1)
+            await asyncio.sleep(0.1)
+            return _weather(20.0)
+
+        results = await asyncio.gather(*(node.get_or_set("current:5:5", fetch) for node in nodes))
+        fake.server.close()
+        return results, upstream_calls
+
+    results, upstream_calls = asyncio.run(run())
+    print(f"Upstream calls for 5 nodes: {len(upstream_calls)}")
+    assert len(upstream_calls) == 1
+    assert all(r == _weather(20.0) for r in results)
+
+
+def test_client_pool_and_cancellation():
+    async def run():
+        fake = FakeRedis()
+        client = RedisClient(await fake.start(), timeout=1.0, max_connections=3)
+        await client.set("a", b"1")
+        await client.set("b", b"2")
+
+        # Concurrent commands run on separate connections, up to the cap
+        fake.delay = 0.05
+        results = await asyncio.gather(*(client.get("a") for _ in range(6)))
+        assert results == [b"1"] * 6
+        assert fake.connections == 3
+
+        # A command cancelled mid-flight must not leave its reply behind
+        # for the next command on the same connection
+        task = asyncio.create_task(client.get("a"))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        fake.delay = 0.0
+        for _ in range(4):
+            assert await client.get("b") == b"2"
+
+        # Unlock only deletes a lock still holding our token
+        cache = RedisCache(client, "weather", 60)
+        token = await cache.lock("k", ttl=5)
+        await client.set("weather:k:lock", b"someone-else")
+        await cache.unlock("k", token)
+        assert await client.get("weather:k:lock") == b"someone-else"
+        token = await cache.lock("j", ttl=5)
+        await cache.unlock("j", token)
+        assert await client.get("weather:j:lock") is None
+
+        await client.close()
+        return fake
+
+    fake = asyncio.run(run())
+    print(f"Connections opened: {fake.connections}")
+
+
+def test_l2_outage_degrades_to_l1():
+    async def run():
+        # Nothing listens on this port
+        server = await asyncio.start_server(lambda r, w: None, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        server.close()
+        await server.wait_closed()
+
+        node = _node(f"redis://127.0.0.1:{port}")
+
+        async def fetch():
+            return _weather(7.0)
+
+        assert await node.get_or_set("current:9:9", fetch) == _weather(7.0)
+        assert await node.get("current:9:9") == _weather(7.0)
+        return node.stats()
+
+    stats = asyncio.run(run())
+    print(f"Stats during outage: {stats}")
+    assert stats["l2_errors"] > 0
+
+
+if __name__ == "__main__":
+    test_encoding()
+    test_cold_node_reads_through_l2()
+    test_singleflight_across_nodes()
+    test_client_pool_and_cancellation()
+    test_l2_outage_degrades_to_l1()
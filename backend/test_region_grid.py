@@ -0,0 +1,105 @@
+"""Test the regional tile grid and batched current-weather lookups (no network)."""
+import asyncio
+from datetime import datetime
+
+from app.config import get_settings
+from app.models.schemas import CurrentWeather
+from app.services import weather_service
+from app.services.region_service import Region, RegionGrid, parse_regions
+
+NOW = datetime(2025, 11, 17, 8, 0)
+
+
+def fake_weather(lat, lon):
+    """Conditions that vary linearly across the map."""
+    return CurrentWeather(
+        timestamp=NOW,
+        temperature=10 + (lat - 40) * 10 + (lon + 74) * 2,
+        precipitation=0.0,
+        wind_speed=5.0,
+        humidity=60 + (lat - 40) * 10,
+        uv_index=3.0
+    )
+
+
+def make_grid(batch_calls):
+    async def fetch_batch(points):
+        batch_calls.append(len(points))
+        return [fake_weather(lat, lon) for lat, lon in points]
+
+    grid = RegionGrid(fetch_batch, tile_deg=0.05)
+    grid.add_region(Region("nyc", 40.5, -74.3, 40.95, -73.7))
+    return grid
+
+
+def test_parse_regions():
+    regions = parse_regions("nyc:40.5,-74.3,40.95,-73.7; broken:1,2 ;sf:37.6,-122.6,37.9,-122.3")
+    assert [r.name for r in regions] == ["nyc", "sf"]
+    assert regions[1].contains(37.77, -122.42)
+    assert not regions[1].contains(40.7, -74.0)
+
+
+def test_region_served_from_few_batched_calls():
+    print("🧪 Testing regional tile grid\n")
+
+    settings = get_settings()
+    original_batch = settings.region_batch_size
+    settings.region_batch_size = 100
+
+    calls = []
+    grid = make_grid(calls)
+    try:
+        updated = asyncio.run(grid.refresh(grid.regions[0]))
+    finally:
+        settings.region_batch_size = original_batch
+
+    print(f"Tiles: {updated}, upstream calls: {len(calls)} {calls}")
+    assert updated == len(grid.nodes(grid.regions[0])) == 10 * 13
+    assert len(calls) == 2
+
+    # Linear field: bilinear interpolation is exact between nodes
+    for lat, lon in [(40.7128, -74.0060), (40.7306, -73.9352), (40.6501, -73.9496)]:
+        weather = grid.lookup(lat, lon)
+        expected = fake_weather(lat, lon)
+        assert abs(weather.temperature - expected.temperature) < 0.01
+        assert abs(weather.humidity - expected.humidity) < 0.01
+
+    assert grid.lookup(37.77, -122.42) is None
+    assert grid.stats()["hits"] == 3
+
+    # Missing corners: nearest available node answers
+    del grid._tiles[(814, -1481)]
+    weather = grid.lookup(40.7128, -74.0060)
+    assert weather.temperature == round(fake_weather(40.70, -74.00).temperature, 2)
+
+
+def test_fetch_current_weather_uses_region_grid():
+    settings = get_settings()
+    calls = []
+    grid = make_grid(calls)
+    asyncio.run(grid.refresh(grid.regions[0]))
+
+    original = (settings.region_grid_enabled, weather_service.region_grid)
+    settings.region_grid_enabled = True
+    weather_service.region_grid = grid
+    try:
+        # Many users across the metro, no per-point upstream calls
+        points = [(40.70 + i * 0.003, -74.00 + i * 0.004) for i in range(50)]
+        results = asyncio.run(_lookup_all(points))
+    finally:
+        settings.region_grid_enabled, weather_service.region_grid = original
+
+    assert len(results) == 50
+    # Only the two batched refresh calls reached upstream
+    assert len(calls) == 2
+    assert grid.stats()["hits"] == 50
+
+
+async def _lookup_all(points):
+    return [await weather_service.fetch_current_weather(lat, lon) for lat, lon in points]
+
+
+if __name__ == "__main__":
+    test_parse_regions()
+    test_region_served_from_few_batched_calls()
+    test_fetch_current_weather_uses_region_grid()
@@ -0,0 +1,81 @@
+"""Test WeatherResponse assembly from pre-serialized fragments (no network)."""
+import asyncio
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+from app.config import get_settings
+from app.main import app
+from app.models.internal import WeatherRecord
+from app.models.schemas import Coordinates, CurrentWeather, WeatherResponse
+from app.services import weather_service
+from app.services.cache_service import weather_cache
+from app.services.render_service import render_weather_response
+
+WEATHER = CurrentWeather(
+    timestamp=datetime(2025, 11, 17, 8, 0),
+    temperature=31.5,
+    precipitation=3.2,
+    wind_speed=35.0,
+    humidity=85.0,
+    uv_index=9.0
+)
+
+LOCATION = Coordinates(
+    latitude=48.8566,
+    longitude=2.3522,
+    location_name="Paris, Île-de-France, France",
+    confidence="high"
+)
+
+
+def _model_body(timestamp):
+    response = WeatherResponse(
+        query=LOCATION.location_name,
+        location=LOCATION,
+        current_weather=WEATHER,
+        suggestions=weather_service.generate_suggestions(WEATHER),
+        timestamp=timestamp
+    )
+    return response.model_dump_json().encode()
+
+
+def test_rendered_body_matches_model():
+    print("🧪 Testing fragment-based response rendering\n")
+    
+    timestamp = datetime(2025, 11, 17, 8, 15, 30, 123456)
+    body = render_weather_response(
+        LOCATION.location_name,
+        LOCATION,
+        WEATHER,
+        weather_service.suggestions_json(WEATHER),
+        timestamp
+    )
+    assert body == _model_body(timestamp)
+    
+    # And validates as a WeatherResponse
+    WeatherResponse.model_validate_json(body)
+
+
+def test_current_weather_endpoint_returns_rendered_body():
+    settings = get_settings()
+    key = weather_service.weather_cache_key(settings.default_location_lat, settings.default_location_lon)
+    record = WeatherRecord(**WEATHER.model_dump())
+    asyncio.run(weather_cache.set(key, record))
+    
+    client = TestClient(app)
+    response = client.post("/api/weather/current", json={"location": None})
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    data = response.json()
+    assert data["query"] == settings.default_location_name
+    assert data["current_weather"]["temperature"] == 31.5
+    assert [s["rule_triggered"] for s in data["suggestions"]] == [
+        "hot_weather", "high_wind", "moderate_rain", "high_humidity", "high_uv"
+    ]
+
+
+if __name__ == "__main__":
+    test_rendered_body_matches_model()
+    test_current_weather_endpoint_returns_rendered_body()
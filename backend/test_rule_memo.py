@@ -0,0 +1,64 @@
+"""Test the signature-keyed memo for weather suggestions and outfit rules."""
+import itertools
+from datetime import datetime
+
+from app.models.schemas import CurrentWeather
+from app.services import weather_service
+from app.services.fashion_service import FashionService, fashion_service
+
+TEMPERATURES = [-5, 0, 9.9, 10, 14.9, 15, 17.9, 18, 25, 25.1, 29.9, 30, 30.1, 35, 35.1]
+WIND_SPEEDS = [0, 20, 20.1, 30, 30.1, 50, 50.1]
+PRECIPITATION = [0, 0.1, 2, 2.1, 5, 5.1, 10, 10.1]
+HUMIDITY = [50, 80, 80.1]
+UV_INDEX = [0, 5.9, 6, 7.9, 8]
+
+
+def _weather(t, w, p, h, u):
+    return CurrentWeather(
+        timestamp=datetime(2025, 11, 17, 8, 0),
+        temperature=t,
+        precipitation=p,
+        wind_speed=w,
+        humidity=h,
+        uv_index=u
+    )
+
+
+def test_memoized_suggestions_match_rules():
+    print("🧪 Testing suggestion memo\n")
+    
+    for values in itertools.product(TEMPERATURES, WIND_SPEEDS, PRECIPITATION, HUMIDITY, UV_INDEX):
+        weather = _weather(*values)
+        assert weather_service.generate_suggestions(weather) == weather_service._evaluate_suggestions(weather), values
+    
+    print(f"Signatures seen: {len(weather_service._suggestion_memo)}")
+    
+    # Callers get their own list
+    weather = _weather(20, 0, 0, 50, 0)
+    weather_service.generate_suggestions(weather).clear()
+    assert weather_service.generate_suggestions(weather)
+
+
+def test_memoized_outfits_fill_in_numbers():
+    for t, w, p, u in itertools.product(TEMPERATURES, WIND_SPEEDS, PRECIPITATION, UV_INDEX):
+        inputs = {"temperature": t, "precipitation": p, "wind_speed": w, "uv_index": u}
+        expected = FashionService._evaluate(t, p, w, u)
+        expected["tips"] = [tip.format(wind_speed=w, uv_index=u) for tip in expected["tips"]]
+        assert fashion_service.get_recommendations(inputs) == expected, inputs
+    
+    # Same signature, different numbers
+    first = fashion_service.get_recommendations({"temperature": 12, "wind_speed": 25, "uv_index": 7})
+    second = fashion_service.get_recommendations({"temperature": 13, "wind_speed": 42.5, "uv_index": 6.5})
+    assert "💨 Windy (25 km/h) - secure loose items" in first["tips"]
+    assert "💨 Windy (42.5 km/h) - secure loose items" in second["tips"]
+    assert "☀️ High UV (6.5) - wear sunscreen SPF 30+" in second["tips"]
+    
+    # Mutating a result does not leak into the next one
+    first["layers"]["outer"].append("Cape")
+    third = fashion_service.get_recommendations({"temperature": 12, "wind_speed": 25, "uv_index": 7})
+    assert "Cape" not in third["layers"]["outer"]
+
+
+if __name__ == "__main__":
+    test_memoized_suggestions_match_rules()
+    test_memoized_outfits_fill_in_numbers()
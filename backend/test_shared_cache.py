@@ -0,0 +1,162 @@
+"""Test the SQLite cache backend shared between worker processes."""
+import asyncio
+import multiprocessing
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from app.models.schemas import CurrentWeather, LocationOption
+from app.services.cache_service import SQLiteCache, decode_value, encode_value
+
+
+def _weather(temperature):
+    return CurrentWeather(
+        timestamp=datetime(2025, 11, 17, 8, 0),
+        temperature=temperature,
+        precipitation=0.0,
+        wind_speed=5.0,
+        humidity=60.0,
+        uv_index=2.0
+    )
+
+
+def _worker_write(path):
+    cache = SQLiteCache(path, "weather", ttl_seconds=60)
+    asyncio.run(cache.set("current:4071:-7401", _weather(12.5)))
+    cache.close()
+
+
+def test_codec_round_trip():
+    option = LocationOption(
+        location_name="Paris, Île-de-France, France",
+        short_name="Paris, France",
+        latitude=48.8566,
+        longitude=2.3522,
+        confidence="high",
+        location_type="city"
+    )
+    for value in [_weather(3.0), [option, option], {"lat": "1.0", "items": [1, 2]}]:
+        assert decode_value(encode_value(value)) == value
+
+
+def test_sqlite_cache_shared_across_processes():
+    print("🧪 Testing SQLite cache backend\n")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "cache.sqlite3")
+        
+        # Another worker fills the cache...
+        process = multiprocessing.get_context("spawn").Process(target=_worker_write, args=(path,))
+        process.start()
+        process.join(30)
+        assert process.exitcode == 0
+        
+        # ...and this one reads it without an upstream call
+        cache = SQLiteCache(path, "weather", ttl_seconds=60)
+        
+        async def run():
+            weather = await cache.get("current:4071:-7401")
+            assert weather == _weather(12.5)
+            assert 0 < cache.remaining_ttl("current:4071:-7401") <= 60
+            assert 0 < await cache.remaining_ttl_async("current:4071:-7401") <= 60
+            
+            # Namespaces are isolated
+            other = SQLiteCache(path, "geocode", ttl_seconds=60)
+            assert await other.get("current:4071:-7401") is None
+            other.close()
+            
+            await cache.set("expired", [1, 2], ttl=0)
+            assert await cache.get("expired") is None
+            
+            await cache.delete("current:4071:-7401")
+            assert await cache.get("current:4071:-7401") is None
+        
+        asyncio.run(run())
+        print(f"Stats: {cache.stats()}")
+        cache.close()
+
+
+def test_sqlite_cache_bounded():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = SQLiteCache(str(Path(tmp) / "cache.sqlite3"), "geocode", ttl_seconds=60, max_entries=10)
+        
+        async def run():
+            for i in range(30):
+                await cache.set(f"q{i}", {"i": i}, ttl=60 + i)
+        
+        asyncio.run(run())
+        cache.purge()
+        assert len(cache) == 10
+        # The entries expiring last are kept
+        assert asyncio.run(cache.get("q29")) == {"i": 29}
+        cache.close()
+
+
+def test_sqlite_cache_errors_are_misses():
+    print("🧪 Testing SQLite cache under lock contention and corruption\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "cache.sqlite3"
+        cache = SQLiteCache(str(path), "weather", ttl_seconds=60, timeout=0.2)
+
+        async def contended():
+            await cache.set("a", 1)
+
+            # Another worker holds the write lock for longer than the timeout
+            holder = sqlite3.connect(path, isolation_level=None)
+            holder.execute("BEGIN IMMEDIATE")
+
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            task = asyncio.create_task(ticker())
+            started = time.monotonic()
+            await cache.set("b", 2)
+            await cache.delete("a")
+            elapsed = time.monotonic() - started
+            task.cancel()
+            holder.rollback()
+            holder.close()
+
+            # The event loop kept running while the writes waited
+            print(f"Locked writes gave up after {elapsed * 1000:.0f} ms ({ticks} loop ticks)")
+            assert elapsed < 2.0 and ticks >= 10
+            assert await cache.get("a") == 1
+            assert await cache.get("b") is None
+
+        asyncio.run(contended())
+        cache.close()
+
+        # A corrupt file: every call degrades instead of raising
+        path.unlink()
+        path.write_bytes(b"not a database" * 100)
+        cache = SQLiteCache(str(path), "weather", ttl_seconds=60)
+
+        async def corrupt():
+            assert await cache.get("a") is None
+            await cache.set("a", 1)
+            await cache.delete("a")
+            assert await cache.remaining_ttl_async("a") == 0.0
+
+        asyncio.run(corrupt())
+        cache.purge()
+        cache.clear()
+        assert len(cache) == 0
+        assert cache.remaining_ttl("a") == 0.0
+        cache.close()
+
+    print("✅ SQLite errors degrade to misses\n")
+
+
+if __name__ == "__main__":
+    test_codec_round_trip()
+    test_sqlite_cache_shared_across_processes()
+    test_sqlite_cache_bounded()
+    test_sqlite_cache_errors_are_misses()
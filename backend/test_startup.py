@@ -0,0 +1,31 @@
+"""Test that importing the app has no filesystem side effects."""
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent
+
+
+def test_import_creates_no_files():
+    print("🧪 Testing import app.main in an empty directory\n")
+
+    with tempfile.TemporaryDirectory() as cwd:
+        proc = subprocess.run(
+            [sys.executable, "-c", "import app.main"],
+            cwd=cwd,
+            env={**os.environ, "PYTHONPATH": str(BACKEND_DIR)},
+            capture_output=True,
+            text=True
+        )
+        assert proc.returncode == 0, proc.stderr
+        created = sorted(str(p.relative_to(cwd)) for p in Path(cwd).rglob("*"))
+
+    print(f"Created: {created}")
+    assert created == []
+    print("✅ Import touched nothing; directories are created on first write\n")
+
+
+if __name__ == "__main__":
+    test_import_creates_no_files()
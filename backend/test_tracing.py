@@ -0,0 +1,170 @@
+"""Test request tracing: spans, sampling, traceparent propagation (no network)."""
+import asyncio
+import logging
+import random
+
+import httpx
+
+from app.config import get_settings
+from app.main import app
+from app.services import weather_service
+from app.services.cache_service import weather_cache
+from app.services.ratelimit_service import rate_limiter
+from app.services.tracing_service import (
+    KIND_CLIENT,
+    KIND_SERVER,
+    InMemoryExporter,
+    RatioSampler,
+    TraceContextFilter,
+    TracingTransport,
+    otlp_payload,
+    parse_traceparent,
+    tracer
+)
+
+INCOMING = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+
+
+def _current_payload(request: httpx.Request) -> dict:
+    return {
+        "latitude": float(request.url.params["latitude"]),
+        "longitude": float(request.url.params["longitude"]),
+        "current": {
+            "time": "2025-11-17T08:00",
+            "temperature_2m": 12.0,
+            "precipitation": 0.0,
+            "relative_humidity_2m": 60,
+            "wind_speed_10m": 8.0,
+            "uv_index": 2.0
+        }
+    }
+
+
+def _request_weather(headers=None):
+    """POST /api/weather/current for a coordinate literal against a fake Open-Meteo."""
+    upstream_headers = []
+
+    async def upstream(request: httpx.Request) -> httpx.Response:
+        upstream_headers.append(request.headers.get("traceparent"))
+        return httpx.Response(200, json=_current_payload(request))
+
+    async def run():
+        client = httpx.AsyncClient(transport=TracingTransport(httpx.MockTransport(upstream)))
+        weather_service.get_client = lambda: client
+        try:
+            async with httpx.AsyncClient(app=app, base_url="http://test") as api:
+                return await api.post(
+                    "/api/weather/current",
+                    json={"location": "40.7128, -74.0060"},
+                    headers=headers or {}
+                )
+        finally:
+            await client.aclose()
+
+    original_get_client = weather_service.get_client
+    weather_cache.clear()
+    rate_limiter.store.clear()
+    try:
+        response = asyncio.run(run())
+    finally:
+        weather_service.get_client = original_get_client
+        weather_cache.clear()
+    return response, upstream_headers
+
+
+def test_request_spans_and_propagation():
+    print("🧪 Testing spans for /api/weather/current\n")
+
+    exporter = InMemoryExporter()
+    tracer.configure(exporter, ratio=1.0)
+    try:
+        response, upstream_headers = _request_weather()
+    finally:
+        tracer.configure(None, ratio=0.0)
+
+    assert response.status_code == 200
+    for span in exporter.spans:
+        print(f"  {span.name:<32} {span.duration_ms:8.3f}ms  parent={span.parent_id}")
+
+    server, = [span for span in exporter.spans if span.kind == KIND_SERVER]
+    assert server.name == "POST get_current_weather"
+    assert server.attributes["http.response.status_code"] == 200
+    assert response.headers["traceresponse"] == server.traceparent
+
+    names = {span.name for span in exporter.spans}
+    assert {"geocode", "weather.fetch", "suggestions.serialize", "GET api.open-meteo.com"} <= names
+    assert all(span.trace_id == server.trace_id for span in exporter.spans)
+
+    # The upstream call is a child of weather.fetch and carries its own span id
+    fetch, = exporter.by_name("weather.fetch")
+    client, = [span for span in exporter.spans if span.kind == KIND_CLIENT]
+    assert fetch.parent_id == server.span_id
+    assert client.parent_id == fetch.span_id
+    assert upstream_headers == [client.traceparent]
+    print("✅ One trace from route handler to upstream call\n")
+
+
+def test_incoming_traceparent_and_sampling():
+    print("🧪 Testing traceparent continuation and ratio sampling\n")
+
+    exporter = InMemoryExporter()
+    tracer.configure(exporter, ratio=0.0001)
+    try:
+        # The caller sampled this trace: it is recorded regardless of our ratio
+        response, upstream_headers = _request_weather({"traceparent": INCOMING})
+        server, = [span for span in exporter.spans if span.kind == KIND_SERVER]
+        assert server.trace_id == "4bf92f3577b34da6a3ce929d0e0e4736"
+        assert server.parent_id == "00f067aa0ba902b7"
+        assert upstream_headers[0].startswith("00-4bf92f3577b34da6a3ce929d0e0e4736-")
+
+        # Not sampled by the caller: nothing recorded, nothing propagated
+        exporter.clear()
+        response, upstream_headers = _request_weather({"traceparent": INCOMING[:-2] + "00"})
+        assert response.status_code == 200
+        assert exporter.spans == [] and upstream_headers == [None]
+    finally:
+        tracer.configure(None, ratio=0.0)
+
+    sampler = RatioSampler(0.25)
+    rng = random.Random(0)
+    kept = sum(sampler.should_sample(f"{rng.getrandbits(128):032x}") for _ in range(10000))
+    print(f"Kept {kept} of 10000 traces at ratio 0.25")
+    assert 2300 < kept < 2700
+    assert parse_traceparent("00-xyz-00f067aa0ba902b7-01") is None
+    print("✅ Sampling is parent-based and ratio-bounded\n")
+
+
+def test_disabled_tracing_records_nothing():
+    assert not tracer.enabled
+    response, upstream_headers = _request_weather()
+    assert response.status_code == 200
+    assert "traceresponse" not in response.headers
+    assert upstream_headers == [None]
+
+
+def test_otlp_payload_and_log_correlation():
+    exporter = InMemoryExporter()
+    tracer.configure(exporter, ratio=1.0)
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, "hello", None, None)
+    try:
+        with tracer.start_span("outer", attributes={"n": 3, "ok": True, "x": 0.5}) as span:
+            TraceContextFilter().filter(record)
+    finally:
+        tracer.configure(None, ratio=0.0)
+
+    assert record.trace_id == span.trace_id
+    assert record.trace == f" [trace_id={span.trace_id} span_id={span.span_id}]"
+
+    payload = otlp_payload(exporter.spans, get_settings().tracing_service_name)
+    otlp_span = payload["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+    assert otlp_span["traceId"] == span.trace_id and otlp_span["name"] == "outer"
+    assert {"key": "n", "value": {"intValue": "3"}} in otlp_span["attributes"]
+    assert {"key": "ok", "value": {"boolValue": True}} in otlp_span["attributes"]
+    assert int(otlp_span["endTimeUnixNano"]) >= int(otlp_span["startTimeUnixNano"])
+
+
+if __name__ == "__main__":
+    test_request_spans_and_propagation()
+    test_incoming_traceparent_and_sampling()
+    test_disabled_tracing_records_nothing()
+    test_otlp_payload_and_log_correlation()
@@ -0,0 +1,209 @@
+"""Test startup warm-up, cache snapshots and readiness (no network)."""
+import asyncio
+import json
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from app.config import get_settings
+from app.main import app
+from app.models.internal import WeatherRecord
+from app.services.cache_service import TTLCache, weather_cache
+from app.services.feedback_service import feedback_aggregator
+from app.services.prefetch_service import DemandForecast, PrefetchScheduler
+from app.services.suggest_service import suggest_index
+from app.services.warmup_service import Readiness, Warmup, readiness
+from app.services.weather_service import weather_cache_key
+
+
+def _record(temperature):
+    return WeatherRecord(
+        timestamp=datetime(2025, 11, 17, 8, 0),
+        temperature=temperature,
+        precipitation=0.0,
+        wind_speed=5.0,
+        humidity=60.0,
+        uv_index=2.0
+    )
+
+
+def test_cache_snapshot_round_trip():
+    print("🧪 Testing in-memory cache snapshots\n")
+
+    async def run(path):
+        cache = TTLCache(ttl_seconds=600)
+        await cache.set("fresh", _record(12.5))
+        await cache.set("short", _record(3.0), ttl=30)
+        await cache.set("gone", "x", ttl=0)
+        assert cache.save_snapshot(path) == 2
+
+        restored = TTLCache(ttl_seconds=600)
+        assert restored.load_snapshot(path) == 2
+        assert await restored.get("fresh") == _record(12.5)
+        assert 590 < restored.remaining_ttl("fresh") <= 600
+
+        # Time spent down counts against the TTL
+        snapshot = json.loads(path.read_text())
+        snapshot["saved_at"] -= 60
+        path.write_text(json.dumps(snapshot))
+        restored = TTLCache(ttl_seconds=600)
+        assert restored.load_snapshot(path) == 1
+        assert await restored.get("short") is None
+
+        assert TTLCache(ttl_seconds=600).load_snapshot(path.with_name("missing.json")) == 0
+
+        # Entries set since startup are fresher than the snapshot's
+        live = TTLCache(ttl_seconds=600)
+        await live.set("fresh", _record(20.0))
+        await live.set("other", _record(1.0))
+        assert await live.load_snapshot_async(path) == 0
+        assert await live.get("fresh") == _record(20.0)
+        assert len(live) == 2
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(Path(tmp) / "weather.json"))
+
+    print("✅ Snapshots restore live entries with their remaining TTL\n")
+
+
+def test_warmup_prefetches_and_reports_ready():
+    print("🧪 Testing warm-up steps\n")
+
+    settings = get_settings()
+    original = (
+        settings.cache_snapshot_dir,
+        settings.suggest_index_path,
+        settings.fashion_feedback_path,
+        settings.prefetch_enabled
+    )
+    fetched = []
+
+    async def fake_fetch(latitude, longitude):
+        fetched.append((latitude, longitude))
+        await weather_cache.set(weather_cache_key(latitude, longitude), _record(10.0))
+
+    async def run():
+        state = Readiness()
+        assert not state.ready
+        report = await Warmup(state, fetch=fake_fetch).run()
+        print(f"Warm-up report: {report}")
+        return state, report
+
+    with tempfile.TemporaryDirectory() as tmp:
+        settings.cache_snapshot_dir = tmp
+        settings.suggest_index_path = str(Path(tmp) / "suggest_index.json")
+        settings.fashion_feedback_path = str(Path(tmp) / "fashion_feedback.json")
+        settings.prefetch_enabled = False
+        weather_cache.clear()
+        try:
+            state, report = asyncio.run(run())
+        finally:
+            (
+                settings.cache_snapshot_dir,
+                settings.suggest_index_path,
+                settings.fashion_feedback_path,
+                settings.prefetch_enabled
+            ) = original
+            suggest_index._snapshots.path = None
+            feedback_aggregator._snapshots.path = None
+            weather_cache.clear()
+
+    assert state.ready
+    assert all(step["ok"] for step in report["steps"].values())
+    assert list(report["steps"]) == ["connection_pool", "cache_snapshots", "indexes", "prefetch"]
+    assert fetched[0] == (settings.default_location_lat, settings.default_location_lon)
+    print("✅ Warm-up ran every step and reported ready\n")
+
+
+def test_failed_step_does_not_block_readiness():
+    async def failing_fetch(latitude, longitude):
+        raise RuntimeError("upstream down")
+
+    async def run():
+        state = Readiness()
+        warmup = Warmup(state, fetch=failing_fetch)
+
+        async def broken():
+            raise OSError("disk unavailable")
+
+        warmup._load_caches = broken
+        warmup._load_indexes = broken
+        report = await warmup.run()
+        return state, report
+
+    state, report = asyncio.run(run())
+    assert state.ready
+    assert report["steps"]["cache_snapshots"] == {
+        "ok": False, "error": "disk unavailable", "seconds": report["steps"]["cache_snapshots"]["seconds"]
+    }
+    assert report["steps"]["prefetch"]["result"]["warmed"] == 0
+
+
+def test_prefetch_starts_after_warmup():
+    cycles = []
+
+    async def run():
+        warmup = Warmup(Readiness())
+        loaded = []
+
+        async def load_indexes():
+            await asyncio.sleep(0.05)
+            loaded.append(True)
+            return {}
+
+        async def skip():
+            return {}
+
+        warmup._load_caches = warmup._prefetch = skip
+        warmup._load_indexes = load_indexes
+
+        scheduler = PrefetchScheduler(DemandForecast())
+
+        async def run_once(now=None):
+            # The first cycle must see the demand history warm-up loaded
+            cycles.append(bool(loaded))
+            return 0
+
+        scheduler.run_once = run_once
+        warmup.start()
+        scheduler.start(after=warmup.wait)
+        await asyncio.sleep(0.2)
+        await scheduler.stop()
+        await warmup.stop()
+
+    asyncio.run(run())
+    assert cycles == [True]
+
+
+def test_health_endpoints():
+    print("🧪 Testing liveness and readiness endpoints\n")
+
+    client = TestClient(app)
+    original = readiness.ready
+    try:
+        readiness.ready = False
+        assert client.get("/api/health/live").status_code == 200
+        response = client.get("/api/health/ready")
+        assert response.status_code == 503
+        assert response.json()["status"] == "warming_up"
+        assert client.get("/api/health").json()["ready"] is False
+
+        readiness.ready = True
+        response = client.get("/api/health/ready")
+        assert response.status_code == 200
+        assert response.json()["status"] == "ready"
+        assert client.get("/api/health").json()["ready"] is True
+    finally:
+        readiness.ready = original
+
+    print("✅ Liveness and readiness reported separately\n")
+
+
+if __name__ == "__main__":
+    test_cache_snapshot_round_trip()
+    test_warmup_prefetches_and_reports_ready()
+    test_failed_step_does_not_block_readiness()
+    test_prefetch_starts_after_warmup()
+    test_health_endpoints()
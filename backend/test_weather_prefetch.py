@@ -0,0 +1,119 @@
+"""Test the demand forecast and predictive weather prefetch (no network)."""
+import asyncio
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+from app.config import get_settings
+from app.models.schemas import LocationLog
+from app.services.cache_service import TTLCache, weather_cache
+from app.services.prefetch_service import DemandForecast, PrefetchScheduler
+from app.services.weather_service import weather_cache_key
+
+
+def _log(lat, lon, name, hour, is_weekend=False):
+    return LocationLog(
+        user_id="u",
+        latitude=lat,
+        longitude=lon,
+        location_name=name,
+        time_of_day="morning",
+        day_of_week="saturday" if is_weekend else "monday",
+        is_weekend=is_weekend,
+        hour=hour,
+        action="weather_check",
+        method="auto_location"
+    )
+
+
+def test_ttl_cache_expiry_and_eviction():
+    async def run():
+        cache = TTLCache(ttl_seconds=60, max_entries=2)
+        await cache.set("a", 1)
+        await cache.set("b", 2)
+        await cache.get("a")
+        await cache.set("c", 3)  # evicts least recently used "b"
+        assert await cache.get("b") is None
+        assert await cache.get("a") == 1
+        
+        await cache.set("d", 4, ttl=0)
+        assert await cache.get("d") is None
+        assert 59 < cache.remaining_ttl("a") <= 60
+        print(f"Cache stats: {cache.stats()}")
+    
+    asyncio.run(run())
+
+
+def test_prefetch_warms_top_cells_within_budget():
+    print("🧪 Testing predictive prefetch\n")
+    
+    settings = get_settings()
+    original = (settings.prefetch_top_cells, settings.prefetch_max_calls_per_hour)
+    settings.prefetch_top_cells = 3
+    settings.prefetch_max_calls_per_hour = 2
+    
+    forecast = DemandForecast()
+    # 8am weekday demand: Midtown busiest, then Brooklyn, then Queens
+    for _ in range(5):
+        forecast.observe(_log(40.7549, -73.9840, "Midtown", 8))
+    for _ in range(3):
+        forecast.observe(_log(40.6782, -73.9442, "Brooklyn", 8))
+    forecast.observe(_log(40.7282, -73.7949, "Queens", 8))
+    # Weekend demand does not count on a Monday
+    for _ in range(10):
+        forecast.observe(_log(40.5795, -73.8370, "Beach", 8, is_weekend=True))
+    
+    fetched = []
+    
+    async def fake_fetch(latitude, longitude, refresh=False):
+        fetched.append((latitude, longitude))
+        await weather_cache.set(weather_cache_key(latitude, longitude), "warm")
+    
+    async def run():
+        weather_cache.clear()
+        scheduler = PrefetchScheduler(forecast, fetch=fake_fetch)
+        
+        # 7:57 on a Monday - 5 minute lead targets the 8am slot
+        monday = datetime(2025, 11, 17, 7, 57)
+        calls = await scheduler.run_once(monday)
+        print(f"First cycle: {calls} upstream call(s)")
+        assert calls == 2  # capped by budget
+        assert fetched == [(40.7549, -73.9840), (40.6782, -73.9442)]
+        
+        # Same target hour: the budget is spent for this hour
+        assert await scheduler.run_once(datetime(2025, 11, 17, 7, 58)) == 0
+        
+        # During the hour, cells about to expire are re-warmed with the
+        # normal TTL; fresh ones are left alone
+        await weather_cache.set(weather_cache_key(40.7549, -73.9840), "stale", 30)
+        assert await scheduler.run_once(datetime(2025, 11, 17, 8, 1)) == 2
+        assert fetched[2:] == [(40.7549, -73.9840), (40.7282, -73.7949)]
+        assert weather_cache.remaining_ttl(weather_cache_key(40.7549, -73.9840)) > 500
+        assert await scheduler.run_once(datetime(2025, 11, 17, 8, 2)) == 0
+        
+        # Next hour has no recorded demand
+        assert await scheduler.run_once(datetime(2025, 11, 17, 8, 56)) == 0
+    
+    try:
+        asyncio.run(run())
+    finally:
+        settings.prefetch_top_cells, settings.prefetch_max_calls_per_hour = original
+        weather_cache.clear()
+
+
+def test_history_skips_bad_lines():
+    with tempfile.TemporaryDirectory() as tmp:
+        good = _log(40.7549, -73.9840, "Midtown", 8).model_dump_json()
+        Path(tmp, "locations_u.jsonl").write_text(
+            f"{good}\n{{not json\n{{\"user_id\": \"u\"}}\n{good}\n"
+        )
+        forecast = DemandForecast()
+        assert forecast.load_history(Path(tmp)) == 2
+        cells = forecast.top_cells(datetime(2025, 11, 17, 8, 0), 5)
+        assert [cell.counts[8] for cell in cells] == [2.0]
+
+
+if __name__ == "__main__":
+    test_ttl_cache_expiry_and_eviction()
+    test_prefetch_warms_top_cells_within_budget()
+    test_history_skips_bad_lines()
@@ -1,4 +1,5 @@
 import axios from 'axios';
+import { getUserId } from '../utils/userSessions';
 
 const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || 'http://localhost:8000';
 
@@ -14,6 +15,9 @@ const apiClient = axios.create({
 // Request interceptor (for future auth tokens)
 apiClient.interceptors.request.use(
   (config) => {
+    // Rate limits are applied per user id (and per IP)
+    config.headers['X-User-Id'] = getUserId();
+    
     // Future Phase 3: Add auth token here
     // const token = localStorage.getItem('token');
     // if (token) {
@@ -47,6 +51,13 @@ apiClient.interceptors.response.use(
         case 404:
           console.error('❌ Not Found:', data.detail);
           break;
+        case 429:
+          console.error(
+            '❌ Too Many Requests, retry in',
+            error.response.headers['retry-after'],
+            's'
+          );
+          break;
         case 500:
           console.error('❌ Server Error:', data.detail);
           break;
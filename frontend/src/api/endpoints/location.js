@@ -11,4 +11,17 @@ export const locationAPI = {
     });
     return data;
   },
+
+  /**
+   * Type-ahead suggestions from previously resolved locations (no geocoder call)
+   * @param {string} prefix
+   * @param {number} limit
+   * @returns {Promise}
+   */
+  suggest: async (prefix, limit = 5) => {
+    const { data } = await apiClient.get('/api/location/suggest', {
+      params: { prefix, limit }
+    });
+    return data.suggestions;
+  },
 };
\ No newline at end of file
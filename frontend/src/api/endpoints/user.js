@@ -1,4 +1,5 @@
 import apiClient from '../client';
+import { enqueueEvent } from '../eventQueue';
 
 // USER SESSION HELPER
 /**
@@ -36,36 +37,39 @@ export const userAPI = {
   },
 
   /**
-   * Get fashion recommendations based on weather
+   * Get fashion recommendations based on weather, with tips
+   * personalized from this user's past feedback
    */
   getFashionRecommendations: async (weatherData) => {
     const { data } = await apiClient.post('/api/fashion/recommendations', {
       temperature: weatherData.temperature,
       precipitation: weatherData.precipitation,
       wind_speed: weatherData.wind_speed,
-      uv_index: weatherData.uv_index
+      uv_index: weatherData.uv_index,
+      user_id: getUserId(),
+      personalized: true
     });
     return data;
   },
 
   /**
-   * Submit fashion feedback to backend
+   * Submit fashion feedback to backend (sent with the next event batch)
    */
   submitFashionFeedback: async (weatherConditions, tipsShown, feedback) => {
-    const { data } = await apiClient.post('/api/feedback/fashion', {
+    enqueueEvent('fashion_feedback', {
       user_id: getUserId(),
       weather_conditions: weatherConditions,
       tips_shown: tipsShown,
       feedback: feedback
     });
-    return data;
+    return { status: 'queued' };
   },
 
   /**
-   * Save user preference to backend
+   * Save user preference to backend (sent with the next event batch)
    */
   savePreference: async (preferenceType, value) => {
-    const { data } = await apiClient.post('/api/preferences', {
+    enqueueEvent('preference', {
       user_id: getUserId(),
       preference_type: preferenceType,
       value: value,
@@ -77,7 +81,7 @@ export const userAPI = {
     prefs[preferenceType] = value;
     localStorage.setItem('weather_agent_preferences', JSON.stringify(prefs));
     
-    return data;
+    return { status: 'queued' };
   },
 
   /**
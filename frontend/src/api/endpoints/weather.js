@@ -17,10 +17,9 @@ export const weatherAPI = {
    * @param {number} days
    * @returns {Promise}
    */
-  getForecast: async (location, days = 7) => {
-    const { data } = await apiClient.post('/api/weather/forecast', { 
-      location, 
-      days 
+  getForecast: async (location, days = 7, hours = 24) => {
+    const { data } = await apiClient.get('/api/weather/forecast', {
+      params: { location, days, hours }
     });
     return data;
   },
@@ -0,0 +1,90 @@
+import apiClient from './client';
+
+/* Client-side event buffer: preferences and feedback are sent together
+   to POST /api/events/batch instead of one request each. */
+
+const BATCH_ENDPOINT = '/api/events/batch';
+const FLUSH_INTERVAL_MS = 5000;
+const MAX_BATCH = 50;     // keeps a beacon well under its 64 KB limit
+const MAX_QUEUED = 500;   // oldest events are dropped past this
+
+let queue = [];
+let flushTimer = null;
+
+/**
+ * Buffer an event for the next batch
+ * @param {string} kind - preference | location | fashion_feedback
+ * @param {Object} event - Fields of the matching backend model
+ */
+export const enqueueEvent = (kind, event) => {
+  queue.push({ kind, timestamp: new Date().toISOString(), ...event });
+  if (queue.length > MAX_QUEUED) {
+    queue = queue.slice(-MAX_QUEUED);
+  }
+
+  if (queue.length >= MAX_BATCH) {
+    flushEvents();
+  } else if (!flushTimer) {
+    flushTimer = setTimeout(flushEvents, FLUSH_INTERVAL_MS);
+  }
+};
+
+/**
+ * Send buffered events now
+ * @returns {Promise<number>} Events sent
+ */
+export const flushEvents = async () => {
+  clearTimeout(flushTimer);
+  flushTimer = null;
+  if (queue.length === 0) return 0;
+
+  const events = queue.slice(0, MAX_BATCH);
+  queue = queue.slice(MAX_BATCH);
+
+  try {
+    await apiClient.post(BATCH_ENDPOINT, { events });
+  } catch (error) {
+    const status = error.response?.status;
+    // Offline, throttled or server trouble: retry with the next flush.
+    // A rejected (4xx) batch would be rejected again, so it is dropped.
+    if (!status || status === 429 || status >= 500) {
+      queue = events.concat(queue).slice(-MAX_QUEUED);
+      flushTimer = setTimeout(flushEvents, FLUSH_INTERVAL_MS);
+    }
+    return 0;
+  }
+
+  if (queue.length > 0 && !flushTimer) {
+    flushTimer = setTimeout(flushEvents, 0);
+  }
+  return events.length;
+};
+
+/**
+ * Page is going away: hand the buffer to the browser with sendBeacon,
+ * which survives unload. text/plain keeps it a simple cross-origin
+ * request (no CORS preflight); the backend reads either content type.
+ */
+const flushOnHide = () => {
+  if (queue.length === 0) return;
+
+  const url = `${apiClient.defaults.baseURL}${BATCH_ENDPOINT}`;
+  while (queue.length > 0) {
+    const events = queue.slice(0, MAX_BATCH);
+    const blob = new Blob([JSON.stringify({ events })], { type: 'text/plain;charset=UTF-8' });
+    if (!navigator.sendBeacon?.(url, blob)) {
+      flushEvents();
+      return;
+    }
+    queue = queue.slice(MAX_BATCH);
+  }
+  clearTimeout(flushTimer);
+  flushTimer = null;
+};
+
+if (typeof window !== 'undefined') {
+  window.addEventListener('pagehide', flushOnHide);
+  document.addEventListener('visibilitychange', () => {
+    if (document.visibilityState === 'hidden') flushOnHide();
+  });
+}